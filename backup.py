@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Online backups of the time tracker database
+===========================================
+
+``python main.py backup`` writes a copy to the ``backups`` folder in the user
+data folder, ``python main.py backup --list`` shows the copies and
+``python main.py restore [FILE]`` puts one back (the newest by default). The
+GUI makes a backup in the background once BACKUP_INTERVAL has passed since
+the last one and offers both under File.
+
+Copies are taken with the SQLite backup API on a connection of their own,
+BACKUP_PAGES pages at a time with a short sleep in between, from a single
+read snapshot: the app keeps reading and writing meanwhile and the copy is
+never torn. Each copy is checked with ``PRAGMA integrity_check`` before it
+replaces anything; only the newest KEEP_BACKUPS are kept, and the newest
+KEEP_LABELLED of each kind of labelled copy (e.g. "before-restore"). Archive files (see Store.archive)
+are not part of a backup: they do not change once written.
+"""
+from __future__ import annotations
+
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from tracker import Store, user_data_dir
+
+BACKUP_DIR = "backups"
+KEEP_BACKUPS = 7
+KEEP_LABELLED = 3  # per label, e.g. "before-restore" copies
+BACKUP_INTERVAL = 24 * 3600  # seconds between scheduled backups
+BACKUP_STARTUP_DELAY = 60  # the GUI leaves the disk to its first queries for this long
+BACKUP_PAGES = 256  # pages copied per step: 1 MiB with the default page size
+BACKUP_SLEEP = 0.005  # pause after each step, so the app's own queries get the disk
+
+
+def backup_folder() -> Path:
+    return user_data_dir() / BACKUP_DIR
+
+
+def list_backups(db_path: Path, folder: Optional[Path] = None) -> List[Path]:
+    """Backups of the database at `db_path`, newest first."""
+    folder = folder or backup_folder()
+    # the timestamp in the name sorts chronologically
+    return sorted(folder.glob(f"{db_path.stem}-*.sqlite3"), reverse=True)
+
+
+def check_integrity(conn: sqlite3.Connection) -> None:
+    problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    if problems != ["ok"]:
+        raise ValueError("Integrity check failed: " + "; ".join(problems[:3]))
+
+
+def is_scheduled(path: Path) -> bool:
+    """True for plain backups, False for labelled ones such as "before-restore" copies."""
+    return path.stem[-15:].replace("-", "").isdigit()  # ends with the YYYYmmdd-HHMMSS stamp
+
+
+def make_backup(
+    db_path: Path,
+    folder: Optional[Path] = None,
+    keep: int = KEEP_BACKUPS,
+    pages: int = BACKUP_PAGES,
+    sleep: float = BACKUP_SLEEP,
+    label: str = "",
+) -> Path:
+    """Copy the database at `db_path` into `folder`, verify the copy and prune old ones.
+
+    `label` marks copies taken for a reason (e.g. before a restore); those
+    are not counted against `keep`, only the newest KEEP_LABELLED with the
+    same label are kept. Returns the path of the new backup.
+    """
+    folder = folder or backup_folder()
+    folder.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    dest = folder / f"{db_path.stem}-{stamp}{'-' + label if label else ''}.sqlite3"
+    tmp = dest.with_suffix(".tmp")
+    src = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True, isolation_level=None)
+    try:
+        dst = sqlite3.connect(tmp)
+        try:
+            # Copy from one read transaction: under WAL it is a snapshot the app's
+            # writes do not touch. Without it every write from another connection
+            # restarts the copy, and a busy app would keep it from ever finishing.
+            src.execute("BEGIN")
+            src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+            # backup(sleep=...) only sleeps when a step finds the database busy;
+            # pause after every step instead
+            def pause(status: int, remaining: int, total: int) -> None:
+                if remaining and sleep:
+                    time.sleep(sleep)
+
+            src.backup(dst, pages=pages, progress=pause)
+            dst.execute("PRAGMA journal_mode=DELETE")  # one self-contained file, no -wal next to it
+            check_integrity(dst)
+        finally:
+            dst.close()
+        tmp.replace(dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        src.close()
+    if label:
+        stale = [p for p in list_backups(db_path, folder) if p.stem.endswith("-" + label)][KEEP_LABELLED:]
+    else:
+        stale = [p for p in list_backups(db_path, folder) if is_scheduled(p)][keep:]
+    for old in stale:
+        old.unlink(missing_ok=True)
+    return dest
+
+
+def restore_backup(store: Store, src: Path) -> Path:
+    """Replace the contents of `store` with the backup at `src`.
+
+    The backup is verified first and the current contents are saved as a
+    "before-restore" backup, so a restore can itself be undone. Other
+    instances see the restore as a change (Store.poll_changes). Returns
+    the path of that safety copy.
+    """
+    if not src.is_file():
+        raise ValueError(f"No such backup: {src}")
+    backup = sqlite3.connect(f"{src.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        check_integrity(backup)
+        saved = make_backup(store.path, label="before-restore")
+        backup.backup(store.conn, pages=BACKUP_PAGES)
+    finally:
+        backup.close()
+    store.reload()
+    return saved
+
+
+class BackupScheduler:
+    """Run make_backup on a background thread once BACKUP_INTERVAL has passed.
+
+    Call poll() now and then (the GUI does from its 1 s tick); it only looks
+    at the clock unless a backup is due. The last error, if any, is kept in
+    `error`, the path of the last backup in `result`.
+    """
+
+    def __init__(
+        self, db_path: Path, interval: float = BACKUP_INTERVAL, folder: Optional[Path] = None, delay: float = 0.0,
+    ):
+        self.db_path = db_path
+        self.interval = interval
+        self.not_before = time.time() + delay  # no scheduled backup before then
+        self.folder = folder or backup_folder()
+        newest = list_backups(db_path, self.folder)
+        self.last = newest[0].stat().st_mtime if newest else 0.0
+        self.result: Optional[Path] = None  # the newest backup made here
+        self.error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> None:
+        now = time.time()
+        if now - self.last >= self.interval and now >= self.not_before:
+            self.start()
+
+    def start(self) -> None:
+        """Back up now, unless a backup is already running."""
+        if self.running:
+            return
+        self.last = time.time()  # also after a failure: retry at the next interval, not every second
+        self._thread = threading.Thread(target=self._run, name="jattrack-backup", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        try:
+            self.result = make_backup(self.db_path, self.folder)
+            self.error = None
+        except (sqlite3.Error, OSError, ValueError) as ex:
+            self.error = ex
+            print(f"jattrack: backup failed: {ex}", file=sys.stderr)
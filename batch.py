@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar entry batches
+======================
+
+An EntryBatch holds many entries as four int64 columns (id, project id,
+start and end epoch) instead of one sqlite3.Row per entry: 32 bytes per
+entry rather than several hundred, filled from a cursor in chunks without
+creating a Python object per value.
+
+Aggregations (clamping to a window, per-project sums, splitting at local
+midnight) run over whole columns: with NumPy when it is installed, else as
+plain loops over the `array` module. Both give the same results; see
+``python bench.py batch``.
+"""
+from __future__ import annotations
+
+import bisect
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure Python loops give the same results
+    np = None
+
+# rows fetched per fetchmany() while filling a batch
+CHUNK = 10_000
+
+
+class EntryBatch:
+    """Array-backed columns of entries; the end of a running entry is the time it was loaded."""
+
+    __slots__ = ("ids", "project_ids", "starts", "ends", "projects", "use_numpy")
+
+    def __init__(self, projects: Optional[Dict[int, str]] = None, use_numpy: Optional[bool] = None):
+        self.ids = array("q")
+        self.project_ids = array("q")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.projects: Dict[int, str] = dict(projects or {})  # project names by id, one string each
+        self.use_numpy = np is not None if use_numpy is None else use_numpy and np is not None
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[Tuple[int, int, int, int]], projects: Optional[Dict[int, str]] = None,
+        use_numpy: Optional[bool] = None,
+    ) -> "EntryBatch":
+        """Build a batch from (id, project_id, start_epoch, end_epoch) rows, e.g. a cursor."""
+        batch = cls(projects, use_numpy)
+        batch.extend(rows)
+        return batch
+
+    def extend(self, rows: Iterable[Tuple[int, int, int, int]]) -> None:
+        fetchmany = getattr(rows, "fetchmany", None)
+        if fetchmany is None:
+            it = iter(rows)
+            fetchmany = lambda n: [row for _, row in zip(range(n), it)]
+        while True:
+            chunk = fetchmany(CHUNK)
+            if not chunk:
+                return
+            ids, project_ids, starts, ends = zip(*chunk)
+            self.ids.extend(ids)
+            self.project_ids.extend(project_ids)
+            self.starts.extend(starts)
+            self.ends.extend(ends)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the columns (the project table aside)."""
+        return sum(col.itemsize * len(col) for col in (self.ids, self.project_ids, self.starts, self.ends))
+
+    def durations(self) -> array:
+        if self.use_numpy:
+            return array("q", (self._np(self.ends) - self._np(self.starts)).tobytes())
+        return array("q", [e - s for s, e in zip(self.starts, self.ends)])
+
+    @staticmethod
+    def _np(col: array) -> Any:
+        return np.frombuffer(col, dtype=np.int64)  # no copy
+
+    # --- aggregations ---
+    def total(self, lo: Optional[int] = None, hi: Optional[int] = None) -> int:
+        """Seconds of all entries clamped to [lo, hi)."""
+        return sum(self.per_project(lo, hi).values())
+
+    def per_project(self, lo: Optional[int] = None, hi: Optional[int] = None) -> Dict[int, int]:
+        """{project_id: seconds} of the entries clamped to [lo, hi)."""
+        if self.use_numpy:
+            pids, starts, ends = self._np_clamped(lo, hi)
+            keys, inverse = np.unique(pids, return_inverse=True)
+            sums = np.bincount(inverse, weights=ends - starts, minlength=len(keys))
+            return {int(k): int(v) for k, v in zip(keys, np.rint(sums)) if v}
+        totals: Dict[int, int] = {}
+        lo = -(2 ** 62) if lo is None else lo
+        hi = 2 ** 62 if hi is None else hi
+        get = totals.get
+        for pid, s, e in zip(self.project_ids, self.starts, self.ends):
+            s = lo if s < lo else s
+            e = hi if e > hi else e
+            if e > s:
+                totals[pid] = get(pid, 0) + e - s
+        return totals
+
+    def per_day(self, lo: Optional[int] = None, hi: Optional[int] = None) -> Dict[Tuple[str, int], int]:
+        """{(local ISO day, project_id): seconds}, entries split at local midnight and clamped to [lo, hi)."""
+        if not len(self):
+            return {}
+        if self.use_numpy:
+            return self._per_day_numpy(lo, hi)
+        lo = -(2 ** 62) if lo is None else lo
+        hi = 2 ** 62 if hi is None else hi
+        first = max(min(self.starts), lo)
+        last = min(max(self.ends), hi)
+        if last <= first:
+            return {}
+        days, bounds = _midnights(first, last)
+        totals: Dict[Tuple[int, int], int] = {}
+        get = totals.get
+        k = 0
+        for pid, s, e in zip(self.project_ids, self.starts, self.ends):
+            s = lo if s < lo else s
+            e = hi if e > hi else e
+            if e <= s:
+                continue
+            if not bounds[k] <= s < bounds[k + 1]:  # rows come roughly in order: usually the same day
+                k = bisect.bisect_right(bounds, s) - 1
+            j = k
+            while e > bounds[j + 1]:  # crosses midnight
+                totals[j, pid] = get((j, pid), 0) + bounds[j + 1] - s
+                s = bounds[j + 1]
+                j += 1
+            totals[j, pid] = get((j, pid), 0) + e - s
+        return {(days[j], pid): seconds for (j, pid), seconds in totals.items() if seconds}
+
+    def _np_clamped(self, lo: Optional[int], hi: Optional[int]) -> Tuple[Any, Any, Any]:
+        pids, starts, ends = self._np(self.project_ids), self._np(self.starts), self._np(self.ends)
+        if lo is not None:
+            starts = np.maximum(starts, lo)
+        if hi is not None:
+            ends = np.minimum(ends, hi)
+        keep = ends > starts
+        return pids[keep], starts[keep], ends[keep]
+
+    def _per_day_numpy(self, lo: Optional[int], hi: Optional[int]) -> Dict[Tuple[str, int], int]:
+        pids, starts, ends = self._np_clamped(lo, hi)
+        if not len(pids):
+            return {}
+        days, bounds_list = _midnights(int(starts.min()), int(ends.max()))
+        bounds = np.array(bounds_list, dtype=np.int64)
+        first = np.searchsorted(bounds, starts, side="right") - 1
+        last = np.searchsorted(bounds, ends - 1, side="right") - 1
+        keys, inverse = np.unique(pids, return_inverse=True)
+        # the few entries that cross midnight: one (day, seconds) piece per day they touch
+        multi = np.nonzero(last > first)[0]
+        spans = (last - first + 1)[multi]
+        piece_entry = np.repeat(multi, spans)
+        piece_day = np.repeat(first[multi], spans) + (np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans))
+        piece_s = np.maximum(starts[piece_entry], bounds[piece_day])
+        piece_e = np.minimum(ends[piece_entry], bounds[piece_day + 1])
+        single = last == first
+        cell = np.concatenate((first[single] * len(keys) + inverse[single], piece_day * len(keys) + inverse[piece_entry]))
+        secs = np.concatenate(((ends - starts)[single], piece_e - piece_s))
+        # sum over the cells that occur, not a dense days x projects array
+        occupied, where = np.unique(cell, return_inverse=True)
+        sums = np.rint(np.bincount(where, weights=secs)).astype(np.int64)
+        nonzero = sums != 0
+        occupied, sums = occupied[nonzero], sums[nonzero]
+        # tolist() converts whole columns at once; int() per cell would dominate
+        day_names = [days[j] for j in (occupied // len(keys)).tolist()]
+        cell_keys = zip(day_names, keys[occupied % len(keys)].tolist())
+        return dict(zip(cell_keys, sums.tolist()))
+
+
+def _midnights(first: int, last: int) -> Tuple[List[str], List[int]]:
+    """ISO days covering epochs [first, last) and their local midnights, plus the end of the last day."""
+    day = datetime.fromtimestamp(first).date()
+    end_day = datetime.fromtimestamp(max(first, last - 1)).date()
+    dates = [day + timedelta(days=k) for k in range((end_day - day).days + 2)]
+    # as tracker.day_bounds, computed once per midnight instead of twice
+    midnight = datetime.min.time()
+    return [d.isoformat() for d in dates[:-1]], [int(datetime.combine(d, midnight).timestamp()) for d in dates]
@@ -0,0 +1,1014 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks and regression checks for the data layer
+===================================================
+
+Usage
+-----
+python bench.py plans [--entries N] [--analyze]
+python bench.py startup [--runs N] [--budget-ms MS]
+python bench.py gui-startup [--runs N] [--frozen dist/jattrack]
+python bench.py import [--rows N]
+python bench.py roundtrip [--pairs N] [--journal wal|delete|both]
+python bench.py search [--entries N]
+python bench.py archive [--entries N] [--keep-years N]
+python bench.py batch [--entries N]
+python bench.py typing [--entries N] [--key-ms MS]
+python bench.py backup [--entries N]
+python bench.py sync [--entries N] [--day N] [--days N]
+python bench.py maintain [--entries N] [--delete F]
+python bench.py overlaps [--sizes N,N,...]
+python bench.py serve [--seconds S] [--clients N] [--min-rps R]
+
+Each command builds its own synthetic database in a temporary directory and
+never touches the real user database. Commands exit non‑zero on failure so
+they can be used from CI.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from maintenance import RUNNING_INDEXES
+from tracker import Store, iso_to_epoch, rebuild_rollup
+
+
+# syllable-built vocabulary so task/notes text has a realistic word distribution
+_SYLLABLES = (
+    "ka", "lo", "mi", "ne", "ru", "sta", "ver", "in", "bo", "tex", "qua", "dri",
+    "fen", "gol", "pi", "sul", "ha", "jo", "wen", "cor", "zu", "plo", "ek", "tra",
+)
+WORDS = sorted({a + b + c for a in _SYLLABLES for b in _SYLLABLES for c in ("", "n", "s", "x")})
+# Zipf-Mandelbrot ranks, shuffled so frequency does not follow the alphabet
+RANKED_WORDS = random.Random(0).sample(WORDS, len(WORDS))
+_CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 2.7) for rank in range(len(RANKED_WORDS))))
+
+
+def _text(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choices(RANKED_WORDS, cum_weights=_CUM_WEIGHTS, k=words))
+
+
+def build_synthetic_db(path: Path, entries: int, projects: int = 50, seed: int = 1) -> Store:
+    """Create a Store with `entries` closed entries spread back from today plus one running entry."""
+    rnd = random.Random(seed)
+    store = Store(path)
+    pids = [store.upsert_project(f"Project {i:03d}") for i in range(projects)]
+    t = datetime.now().replace(microsecond=0) - timedelta(days=1)
+    rows = []
+    for _ in range(entries):
+        dur = rnd.randint(5 * 60, 3 * 3600)
+        t -= timedelta(seconds=dur + rnd.randint(0, 2 * 3600))
+        start_epoch, offset = iso_to_epoch(t.isoformat())
+        end = t + timedelta(seconds=dur)
+        rows.append((
+            rnd.choice(pids), _text(rnd, 3), _text(rnd, rnd.randint(0, 8)), t.isoformat(), end.isoformat(), dur,
+            start_epoch, start_epoch + dur, offset,
+        ))
+    rows.reverse()  # ids grow with time, as they do in real use
+    with store.transaction() as cur, store._fts_deferred(cur):
+        cur.executemany(
+            "INSERT INTO entries(project_id, task, notes, start_ts, end_ts, duration_s, start_epoch, end_epoch, utc_offset) "
+            "VALUES(?,?,?,?,?,?,?,?,?)",
+            rows,
+        )
+        rebuild_rollup(cur)
+    store.start_entry("Project 000", "running", "")
+    return store
+
+
+# ----------------------------
+# plans: EXPLAIN QUERY PLAN regression check
+# ----------------------------
+
+# Statements that intentionally read a whole (small) table.
+FULL_SCAN_OK = (
+    "SELECT name, id FROM projects",  # ProjectRegistry (re)load
+)
+# Statements whose one-sided range ("x>?") intentionally runs to the newest rows.
+OPEN_RANGE_OK = (
+    "INSERT INTO entries_fts(rowid, task, notes) SELECT id, task, notes FROM entries WHERE id >",  # rows just imported
+    "SELECT id, project_id, start_epoch, end_epoch FROM entries WHERE end_epoch >",  # rebuild_rollup(since)
+)
+# Virtual tables that answer a MATCH or rowid constraint from their own index.
+SEARCHABLE_VIRTUAL_TABLES = {"entries_fts"}
+# The longest VALUES list a statement may scan (Store.overlapping's SPAN_GROUPS has 10 rows).
+MAX_CONSTANT_ROWS = 16
+
+
+def exercise_store(store: Store) -> None:
+    """Call every Store query path once so its SQL shows up in the trace."""
+    today = date.today()
+    first = today.replace(day=1)
+    store._today = None
+    store.today_snapshot()
+    store.registry.reload(store.conn.execute("SELECT name, id FROM projects"))
+    running = store.get_running_entry()
+    store.get_entry(int(running["id"]))
+    for project in (None, "Project 001"):
+        store.query_entries(first, today, project)
+        page = store.query_page(first, today, project, limit=50)
+        if page:
+            store.query_page(first, today, project, after=(page[-1]["start_epoch"], page[-1]["id"]), limit=50)
+        store.query_totals(first, today, project)
+    for group_by in ("day", "week", "month", "project"):
+        store.summary(first, today, group_by)
+    store.gaps_and_overlaps(today - timedelta(days=today.weekday()), today)
+    store.overlapping(int(running["start_epoch"]) - 86400, None, exclude=int(running["id"]))
+    for project in (None, "Project 001"):
+        store.search(RANKED_WORDS[0], first, today, project)
+        # a page past the ranked window: the older matches, newest first
+        store.search(RANKED_WORDS[0], first, today, project, offset=store.SEARCH_WINDOW)
+        store.search_totals(RANKED_WORDS[0], first, today, project)
+    # a range that reaches the archives, if any
+    old = date(today.year - 3, 1, 1), date(today.year - 2, 12, 31)
+    for project in (None, "Project 001"):
+        page = store.query_page(*old, project, limit=50)
+        if page:
+            store.query_page(*old, project, after=(page[-1]["start_epoch"], page[-1]["id"]), limit=50)
+        store.query_totals(*old, project)
+    since = store.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+    entry_id = store.start_entry("Project 002", "bench", "")
+    store.stop_entry(entry_id)
+    row = store.get_entry(entry_id)
+    store.update_entry(entry_id, "Project 003", "bench", "", row["start_ts"], row["end_ts"])
+    # the same changes arriving from another device, as a newer edit
+    _, records = store.changes_since(since)
+    store.apply_records([dict(r, clock=r["clock"] + 1, device="bench") for r in records])
+    store.delete_entry(entry_id)
+    # bulk edits from a multi-row selection
+    ids = [store.start_entry("Project 002", "bench", "") for _ in range(3)]
+    store.stop_entry(ids[-1])
+    store.update_entries(ids, project="Project 003", task="bench bulk", shift_s=-60)
+    store.delete_entries(ids)
+    # the rollup recount of a few days (bulk import, older builds' writes)
+    with store.transaction() as cur:
+        rebuild_rollup(cur, int(running["start_epoch"]) - 86400, int(time.time()))
+
+
+def _unbounded_step(detail: str, bounded: set) -> bool:
+    """True for plan steps that may visit a whole table or index."""
+    words = detail.split()
+    if words[0] == "SCAN":
+        # the rows of a short VALUES list in the statement itself, e.g. "SCAN 10 CONSTANT ROWS"
+        if detail.endswith(" CONSTANT ROWS"):
+            return int(words[1]) > MAX_CONSTANT_ROWS
+        # a virtual table lookup with a MATCH or rowid constraint in its idxStr, e.g. "INDEX 32:M2"
+        if " VIRTUAL TABLE INDEX " in detail:
+            idx_str = words[-1].partition(":")[2]
+            return words[1] not in SEARCHABLE_VIRTUAL_TABLES or not ("M" in idx_str or "=" in idx_str)
+        # an index that holds only the running entry (the other partial indexes,
+        # idx_entries_end and idx_entries_span, hold every finished entry), or a
+        # subquery (materialized or a co-routine) that yields what its own
+        # (separately checked) plan produced
+        return words[-1] not in RUNNING_INDEXES and words[-1] not in bounded
+    if words[0] == "SEARCH" and detail.endswith(")") and " USING " in detail:
+        if detail.split(" USING ", 1)[1].split(" (", 1)[0].split()[-1] in RUNNING_INDEXES:
+            return False
+        # a range with one side open, e.g. "(end_epoch>?)", walks to the end of the index
+        sides: Dict[str, set] = {}
+        for term in detail[detail.rindex("(") + 1:-1].split(" AND "):
+            m = re.fullmatch(r"(<expr>|\w+)([<>])=?\?", term)
+            if m:
+                sides.setdefault(m.group(1), set()).add(m.group(2))
+        return any(len(ops) == 1 for ops in sides.values())
+    return False
+
+
+def cmd_plans(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = build_synthetic_db(Path(tmp) / "plans.sqlite3", args.entries)
+        store.archive(date(date.today().year - 1, 1, 1), vacuum=False)
+        if args.analyze:  # the plans once maintenance.py has gathered statistics
+            from maintenance import run_all
+
+            run_all(store, Path(tmp) / "maintenance.log")
+        statements: List[str] = []
+        store.conn.set_trace_callback(statements.append)
+        exercise_store(store)
+        store.conn.set_trace_callback(None)
+
+        failures = 0
+        seen = set()
+        for sql in statements:
+            sql = " ".join(sql.split())
+            if sql in seen or sql.split(" ", 1)[0].upper() not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+                continue
+            seen.add(sql)
+            plan = [r[3] for r in store.conn.execute("EXPLAIN QUERY PLAN " + sql)]
+            bounded = {p.split(" ", 1)[1] for p in plan if p.startswith(("MATERIALIZE ", "CO-ROUTINE "))}
+            steps = [p for p in plan if _unbounded_step(p, bounded)]
+            bad = any(
+                not any(sql.startswith(ok) for ok in (FULL_SCAN_OK if p.startswith("SCAN") else OPEN_RANGE_OK))
+                for p in steps
+            )
+            failures += bool(bad)
+            print(("FAIL " if bad else "ok   ") + sql[:110])
+            for p in plan:
+                print("       " + p)
+        print(f"{len(seen)} statements checked, {failures} unbounded read(s)")
+        return 1 if failures else 0
+
+
+# ----------------------------
+# startup: wall time of the headless CLI
+# ----------------------------
+
+MAIN_PY = Path(__file__).resolve().parent / "main.py"
+
+
+def _time_runs(cmd: List[str], runs: int) -> List[float]:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def cmd_startup(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "startup.sqlite3"
+        build_synthetic_db(db, args.entries).conn.close()
+        # first run may still migrate / warm the page cache; don't count it
+        subprocess.run([sys.executable, str(MAIN_PY), "--db", str(db), "status"], check=True, stdout=subprocess.DEVNULL)
+
+        baseline = _time_runs([sys.executable, "-c", "pass"], args.runs)
+        print(f"{'python -c pass':<24} min {min(baseline):6.1f} ms   median {statistics.median(baseline):6.1f} ms")
+        cli = [sys.executable, str(MAIN_PY), "--db", str(db)]
+        timings = {
+            "status": _time_runs(cli + ["status"], args.runs),
+            "today": _time_runs(cli + ["today"], args.runs),
+            "start": [],
+            "stop": [],
+        }
+        for _ in range(args.runs):
+            timings["start"] += _time_runs(cli + ["start", "Project 001", "bench"], 1)
+            timings["stop"] += _time_runs(cli + ["stop"], 1)
+
+        failures = 0
+        for command, times in timings.items():
+            median = statistics.median(times)
+            bad = median > args.budget_ms
+            failures += bad
+            print(f"{'main.py ' + command:<24} min {min(times):6.1f} ms   median {median:6.1f} ms"
+                  + ("   OVER BUDGET" if bad else ""))
+        return 1 if failures else 0
+
+
+# ----------------------------
+# gui-startup: import time and time to first paint, from source and frozen
+# ----------------------------
+
+def _import_ms(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter (python -X importtime)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          check=True, capture_output=True, text=True, cwd=MAIN_PY.parent)
+    for line in proc.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000
+    raise ValueError(f"{module} not in -X importtime output")
+
+
+def _gui_startup(cmd: List[str], runs: int, probe: Path) -> Dict[str, List[float]]:
+    """Milliseconds from process launch to gui.run, first paint and first data, per run."""
+    import os
+
+    env = dict(os.environ, TIMETRACKER_STARTUP_PROBE=str(probe))
+    times: Dict[str, List[float]] = {}
+    for _ in range(runs):
+        probe.unlink(missing_ok=True)
+        launched = time.time()
+        subprocess.run(cmd + ["gui"], check=True, env=env, timeout=60)
+        for mark in probe.read_text().split():
+            name, _, at = mark.partition("=")
+            times.setdefault(name, []).append((float(at) - launched) * 1000)
+    return times
+
+
+def cmd_gui_startup(args: argparse.Namespace) -> int:
+    import os
+
+    builds = [("source", [sys.executable, str(MAIN_PY)])]
+    if args.frozen:
+        builds.append(("frozen", [str(Path(args.frozen).resolve())]))
+    # as installed: from .pyc files, even under PYTHONDONTWRITEBYTECODE
+    subprocess.run([sys.executable, "-m", "compileall", "-q", "-l", str(MAIN_PY.parent)], check=True)
+    gui_ms = statistics.median(_import_ms("gui") for _ in range(args.runs))
+    tk_ms = statistics.median(_import_ms("tkinter") for _ in range(args.runs))
+    print(f"import gui {gui_ms:6.1f} ms   of which tkinter {tk_ms:6.1f} ms   (median of {args.runs})")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "startup.sqlite3"
+        build_synthetic_db(db, args.entries).conn.close()
+        for name, cmd in builds:
+            cmd = cmd + ["--db", str(db)]
+            # the CLI never loads Tk: for a frozen build this is mostly unpacking
+            cli = _time_runs(cmd + ["status"], args.runs)
+            print(f"{name:<7} status                  median {statistics.median(cli):7.1f} ms")
+        if sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+            print("no display: time to first paint skipped")
+            return 0
+        for name, cmd in builds:
+            times = _gui_startup(cmd + ["--db", str(db)], args.runs, Path(tmp) / "probe.txt")
+            print(f"{name:<7} gui.run {statistics.median(times['run']):7.1f} ms   first paint "
+                  f"{statistics.median(times['paint']):7.1f} ms   data shown {statistics.median(times['loaded']):7.1f} ms")
+    return 0
+
+
+# ----------------------------
+# import: bulk import throughput
+# ----------------------------
+
+def cmd_import(args: argparse.Namespace) -> int:
+    import json
+
+    rnd = random.Random(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "history.jsonl"
+        t = datetime(2015, 1, 1, 8, 0, 0)
+        with src.open("w", encoding="utf-8") as f:
+            for _ in range(args.rows):
+                dur = rnd.randint(5 * 60, 3 * 3600)
+                end = t + timedelta(seconds=dur)
+                f.write(json.dumps({
+                    "project": f"Client {rnd.randint(0, 499):03d}",
+                    "task": f"task {rnd.randint(0, 9999)}",
+                    "notes": "",
+                    "start": t.isoformat(),
+                    "end": end.isoformat(),
+                }) + "\n")
+                t = end + timedelta(seconds=rnd.randint(0, 3600))
+        store = Store(Path(tmp) / "import.sqlite3")
+        for label in ("fresh", "again (all duplicates)"):
+            started = time.perf_counter()
+            inserted, skipped = store.bulk_import(src)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<24} {inserted:>9} inserted {skipped:>9} skipped  {elapsed:6.2f}s"
+                  f"  ({args.rows / elapsed:,.0f} rows/s)")
+        return 0
+
+
+# ----------------------------
+# roundtrip: start/stop write latency
+# ----------------------------
+
+def _commit_per_statement(store: Store) -> None:
+    """Run `store` the way it ran before unit-of-work transactions and WAL.
+
+    Rollback journal with synchronous=FULL, and no BEGIN: in autocommit mode
+    every statement is its own transaction with its own fsyncs.
+    """
+    store.conn.execute("PRAGMA journal_mode=DELETE")
+    store.conn.execute("PRAGMA synchronous=FULL")
+    store.transaction = lambda: nullcontext(store.conn.cursor())
+
+
+def cmd_roundtrip(args: argparse.Namespace) -> int:
+    modes = ("delete", "wal") if args.journal == "both" else (args.journal,)
+    medians: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in modes:
+            store = build_synthetic_db(Path(tmp) / f"roundtrip-{mode}.sqlite3", args.entries)
+            if mode == "delete":
+                _commit_per_statement(store)
+            starts: List[float] = []
+            stops: List[float] = []
+            for i in range(args.pairs):
+                t0 = time.perf_counter()
+                entry_id = store.start_entry(f"Project {i % 50:03d}", "roundtrip", "")
+                t1 = time.perf_counter()
+                store.stop_entry(entry_id)
+                t2 = time.perf_counter()
+                starts.append((t1 - t0) * 1000)
+                stops.append((t2 - t1) * 1000)
+            journal = store.conn.execute("PRAGMA journal_mode").fetchone()[0]
+            sync = store.conn.execute("PRAGMA synchronous").fetchone()[0]
+            commits = "commit per statement" if mode == "delete" else "one commit per operation"
+            print(f"journal_mode={journal} synchronous={sync}, {commits}")
+            for label, times in (("start_entry", starts), ("stop_entry", stops)):
+                print(f"  {label:<12} median {statistics.median(times):7.3f} ms   "
+                      f"p95 {sorted(times)[int(len(times) * 0.95)]:7.3f} ms")
+            medians[mode] = statistics.median(a + b for a, b in zip(starts, stops))
+            store.conn.close()
+    if len(medians) == 2:
+        print(f"start+stop median: {medians['delete']:.3f} ms before, {medians['wal']:.3f} ms after "
+              f"({medians['delete'] / medians['wal']:.1f}x)")
+    return 0
+
+
+# ----------------------------
+# search: full-text search latency
+# ----------------------------
+
+def cmd_search(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        store = build_synthetic_db(Path(tmp) / "search.sqlite3", args.entries)
+        print(f"built {args.entries} entries in {time.perf_counter() - started:.1f}s (fts={store.has_fts})")
+        everything = (date(1970, 1, 2), date.today())
+        last_year = (date.today() - timedelta(days=365), date.today())
+        cases = [
+            ("common word", RANKED_WORDS[0], everything, None),
+            ("mid-frequency word", RANKED_WORDS[50], everything, None),
+            ("rare word", RANKED_WORDS[-1], everything, None),
+            ("short prefix", RANKED_WORDS[10][:3] + "*", everything, None),
+            ("long prefix", RANKED_WORDS[0][:4] + "*", everything, None),
+            ("two words", f"{RANKED_WORDS[1]} {RANKED_WORDS[2]}", everything, None),
+            ("rare + year + project", RANKED_WORDS[-7], last_year, "Project 007"),
+        ]
+        failures = 0
+        for label, text, (start, end), project in cases:
+            times = []
+            for _ in range(args.runs):
+                t0 = time.perf_counter()
+                rows = store.search(text, start, end, project, limit=200)
+                times.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            count, _ = store.search_totals(text, start, end, project)
+            totals_ms = (time.perf_counter() - t0) * 1000
+            median = statistics.median(times)
+            bad = median > args.budget_ms
+            failures += bad
+            # totals load after the first page in the GUI, so only the page is budgeted
+            print(f"{label:<24} {text!r:<16} {count:>8} matches  first page {len(rows):>3} rows  "
+                  f"median {median:7.2f} ms  totals {totals_ms:7.1f} ms" + ("   OVER BUDGET" if bad else ""))
+            # scrolling to the end, as the GUI and /entries?q= page: every match exactly once
+            window = store.search_window(text, start, end, project)
+            seen: List[int] = []
+            while True:
+                page = store.search(text, start, end, project, limit=1000, offset=len(seen), window=window)
+                seen += [r["id"] for r in page]
+                if len(page) < 1000:
+                    break
+            if len(seen) != count or len(set(seen)) != count:
+                failures += 1
+                print(f"{'':<24} paging returned {len(seen)} rows, {len(set(seen))} distinct, of {count}   FAIL")
+        return 1 if failures else 0
+
+
+# ----------------------------
+# archive: hot database size and query latency before/after archiving
+# ----------------------------
+
+def _median_ms(fn, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def _db_size(db: Path) -> int:
+    """Bytes on disk of a WAL-mode database: the file and its -wal file."""
+    wal = db.with_name(db.name + "-wal")
+    return db.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+
+
+def cmd_archive(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "archive.sqlite3"
+        store = build_synthetic_db(db, args.entries)
+        store.conn.execute("VACUUM")
+        store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        today = date.today()
+        everything = (date(1900, 1, 1), today)
+        month = (today.replace(day=1), today)
+        old = (date(today.year - 3, 1, 1), date(today.year - 2, 12, 31))
+        cases = [
+            ("this month: page", lambda s: s.query_page(*month, None)),
+            ("this month: totals", lambda s: s.query_totals(*month, None)),
+            ("two old years: page", lambda s: s.query_page(*old, "Project 001")),
+            ("two old years: totals", lambda s: s.query_totals(*old, "Project 001")),
+            ("open + this month page", lambda s: Store(db).query_page(*month, None)),
+        ]
+        expected = store.query_totals(*everything, None)
+        before = {label: _median_ms(lambda: fn(store), args.runs) for label, fn in cases}
+        size_before = _db_size(db)
+
+        cutoff = date(today.year - args.keep_years + 1, 1, 1)
+        started = time.perf_counter()
+        moved = store.archive(cutoff)
+        elapsed = time.perf_counter() - started
+        print(f"archived {sum(moved.values())} of {args.entries} entries before {cutoff} "
+              f"into {len(moved)} files in {elapsed:.1f}s")
+        print(f"hot database + wal {size_before / 2 ** 20:8.1f} MiB -> {_db_size(db) / 2 ** 20:6.1f} MiB")
+        for label, fn in cases:
+            after = _median_ms(lambda: fn(store), args.runs)
+            print(f"{label:<24} before {before[label]:8.2f} ms   after {after:8.2f} ms")
+
+        # nothing may be lost or duplicated on the way
+        totals = store.query_totals(*everything, None)
+        exported = sum(1 for _ in store.iter_entries(*everything, None))
+        ok = totals == expected and exported == expected[0]
+        print(f"entries {expected[0]} before, {totals[0]} after, {exported} exported" + ("" if ok else "   MISMATCH"))
+        return 0 if ok else 1
+
+
+# ----------------------------
+# batch: columnar EntryBatch against per-row aggregation
+# ----------------------------
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    import tracemalloc
+
+    from batch import EntryBatch, np
+    from tracker import split_days
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        store = build_synthetic_db(Path(tmp) / "batch.sqlite3", args.entries)
+        print(f"built {args.entries} entries in {time.perf_counter() - started:.1f}s")
+        everything = (date(1900, 1, 1), date.today())
+        sql = "SELECT id, project_id, start_epoch, end_epoch FROM entries WHERE end_epoch IS NOT NULL"
+
+        tracemalloc.start()
+        rows, fetch_rows = _timed(lambda: store.conn.execute(sql).fetchall())
+        rows_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        batch, fetch_batch = _timed(lambda: store.load_batch(*everything))
+        n = len(rows)
+        print(f"{'sqlite3.Row list':<22} {rows_bytes / n:7.1f} bytes/entry   fetch {fetch_rows:6.2f}s")
+        print(f"{'EntryBatch':<22} {batch.nbytes / len(batch):7.1f} bytes/entry   fetch {fetch_batch:6.2f}s")
+
+        def per_day_rows():
+            totals = {}
+            for r in rows:
+                for day, seconds in split_days(r["start_epoch"], r["end_epoch"]):
+                    totals[day, r["project_id"]] = totals.get((day, r["project_id"]), 0) + seconds
+            return totals
+
+        def per_project_rows():
+            totals = {}
+            for r in rows:
+                totals[r["project_id"]] = totals.get(r["project_id"], 0) + r["end_epoch"] - r["start_epoch"]
+            return totals
+
+        backends = [("rows + split_days", per_day_rows, per_project_rows)]
+        for label, use_numpy in (("array", False), ("numpy", True)):
+            if use_numpy and np is None:
+                print("numpy not installed: skipped")
+                continue
+            b = EntryBatch.from_rows(store.conn.execute(sql), use_numpy=use_numpy)
+            backends.append((f"EntryBatch ({label})", b.per_day, b.per_project))
+
+        expected = None
+        failures = 0
+        for label, per_day, per_project in backends:
+            days, t_day = _timed(per_day)
+            projects, t_project = _timed(per_project)
+            if expected is None:
+                expected = days, projects
+            bad = (days, projects) != expected
+            failures += bad
+            print(f"{label:<22} per day {t_day:6.2f}s ({n / t_day / 1e6:5.2f} M entries/s)   "
+                  f"per project {t_project:6.3f}s ({n / t_project / 1e6:6.2f} M entries/s)"
+                  + ("   MISMATCH" if bad else ""))
+        return 1 if failures else 0
+
+
+# ----------------------------
+# typing: live filtering while the search text is typed
+# ----------------------------
+
+def cmd_typing(args: argparse.Namespace) -> int:
+    from gui import AsyncStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "typing.sqlite3"
+        build_synthetic_db(db_path, args.entries).conn.close()
+        everything = (date(1900, 1, 1), date.today(), None)
+        word = RANKED_WORDS[0]
+        # what the search box holds after each keystroke
+        texts = [word[:i] + "*" for i in range(1, len(word))] + [word]
+        db = AsyncStore(db_path)
+        db.submit(lambda s: s.search(word, *everything)).result()  # warm the cache
+        print(f"typing {word!r}, one key every {args.key_ms:.0f} ms, over {args.entries} entries")
+        for label, every_key, cancel in (
+            ("query per key", True, False),
+            ("query per key, cancel", True, True),
+            ("debounced, cancel", False, True),
+        ):
+            inflight = []
+            for i, text in enumerate(texts):
+                last = i == len(texts) - 1
+                if every_key or last:
+                    if cancel:
+                        for fut in inflight:
+                            db.cancel(fut)
+                    inflight = [
+                        db.submit(lambda s, t=text: s.search(t, *everything), interruptible=cancel),
+                        db.submit(lambda s, t=text: s.search_totals(t, *everything), interruptible=cancel),
+                    ]
+                if not last:
+                    time.sleep(args.key_ms / 1000)
+            typed = time.perf_counter()
+            for fut in inflight:
+                fut.result()
+            print(f"{label:<24} newest result {(time.perf_counter() - typed) * 1000:8.1f} ms after the last key")
+        db.close()
+        return 0
+
+
+# ----------------------------
+# backup: app latency while an online backup runs
+# ----------------------------
+
+def cmd_backup(args: argparse.Namespace) -> int:
+    import threading
+
+    from backup import make_backup
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "backup.sqlite3"
+        store = build_synthetic_db(db, args.entries)
+        store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        month = (date.today().replace(day=1), date.today(), None)
+
+        def app_ops(until) -> List[float]:
+            # what the GUI does: refresh the history page and start/stop entries
+            times = []
+            while not until():
+                t0 = time.perf_counter()
+                store.query_page(*month)
+                entry_id = store.start_entry("Project 001", "bench", "")
+                store.stop_entry(entry_id)
+                times.append((time.perf_counter() - t0) * 1000)
+                time.sleep(0.01)
+            return times
+
+        deadline = time.perf_counter() + 1.0
+        idle = app_ops(lambda: time.perf_counter() > deadline)
+        result: List[Path] = []
+        thread = threading.Thread(target=lambda: result.append(make_backup(db, Path(tmp) / "backups")))
+        started = time.perf_counter()
+        thread.start()
+        during = app_ops(lambda: not thread.is_alive())
+        elapsed = time.perf_counter() - started
+        thread.join()
+        print(f"backup of {db.stat().st_size / 2 ** 20:.1f} MiB took {elapsed:.2f}s, "
+              f"verified copy {result[0].stat().st_size / 2 ** 20:.1f} MiB" if result else "backup failed")
+        for label, times in (("idle", idle), ("during backup", during)):
+            print(f"app round trip {label:<14} median {statistics.median(times):6.2f} ms   max {max(times):7.2f} ms"
+                  f"   ({len(times)} samples)")
+        return 0 if result else 1
+
+
+# ----------------------------
+# maintain: idle-time statistics and incremental vacuum
+# ----------------------------
+
+def cmd_maintain(args: argparse.Namespace) -> int:
+    import maintenance
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "maintain.sqlite3"
+        log = Path(tmp) / maintenance.LOG_NAME
+        store = build_synthetic_db(db, args.entries)
+        # a database from before maintenance.py: no auto_vacuum, no statistics
+        store.conn.execute("PRAGMA auto_vacuum=NONE")
+        store.conn.execute("VACUUM")
+        store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        month = (date.today().replace(day=1), date.today(), None)
+
+        def app_ms() -> float:
+            # what the GUI does between two steps: refresh the history page, start and stop an entry
+            t0 = time.perf_counter()
+            store.query_page(*month)
+            store.stop_entry(store.start_entry("Project 001", "bench", ""))
+            return (time.perf_counter() - t0) * 1000
+
+        def size() -> str:
+            main = db.stat().st_size
+            return f"{main / 2 ** 20:.1f} MiB + {(_db_size(db) - main) / 2 ** 20:.1f} MiB wal"
+
+        before = [app_ms() for _ in range(20)]
+        print(f"database {size()}, {args.entries} entries")
+        for step in ("convert", "analyze"):
+            if maintenance.next_step(store) != step:
+                print(f"expected step {step}, got {maintenance.next_step(store)}")
+                return 1
+            r = maintenance.run_step(store, step, log)
+            print(f"{step:<8} {r.seconds * 1000:9.1f} ms   database {size()}")
+
+        # old years cleared out, plus scattered deletes that only leave half-empty pages
+        ids = [r[0] for r in store.conn.execute("SELECT id FROM entries WHERE end_epoch IS NOT NULL ORDER BY start_epoch")]
+        oldest = int(len(ids) * args.delete)
+        doomed = ids[:oldest] + random.Random(2).sample(ids[oldest:], (len(ids) - oldest) // 10)
+        for k in range(0, len(doomed), 10_000):
+            store.delete_entries(doomed[k:k + 10_000])
+        bloated = size()
+        free = store.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        print(f"deleted {len(doomed)} entries: {bloated}, {free} free pages")
+        deleted = [app_ms() for _ in range(20)]  # also gets FTS merges after the deletes out of the way
+
+        steps: List[float] = []
+        during: List[float] = []
+        reclaimed = 0
+        while maintenance.next_step(store) == "vacuum":
+            r = maintenance.run_step(store, "vacuum", log)
+            steps.append(r.seconds * 1000)
+            reclaimed += r.reclaimed
+            during.append(app_ms())
+        print(f"vacuum   {len(steps)} steps, median {statistics.median(steps) if steps else 0:.1f} ms, "
+              f"max {max(steps, default=0):.1f} ms, {reclaimed / 2 ** 20:.1f} MiB reclaimed")
+        print(f"database {bloated} -> {size()}")
+        for label, times in (("before", before), ("after deletes", deleted), ("between steps", during)):
+            if times:
+                print(f"app round trip {label:<14} median {statistics.median(times):6.2f} ms   max {max(times):7.2f} ms")
+        print(f"{len(log.read_text().splitlines())} lines in {log.name}; next step: {maintenance.next_step(store)}")
+        # a small or compact database may have nothing to reclaim; that is not a failure
+        stuck = free >= maintenance.VACUUM_MIN_FREE and not reclaimed
+        return 0 if not stuck and maintenance.next_step(store) is None else 1
+
+
+# ----------------------------
+# overlaps: the interval index against history size
+# ----------------------------
+
+def cmd_overlaps(args: argparse.Namespace) -> int:
+    plain = "SELECT id FROM entries WHERE end_epoch > ?1 AND start_epoch < ?2 ORDER BY start_epoch, id"
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(size) for size in args.sizes.split(",")):
+            store = build_synthetic_db(Path(tmp) / f"overlaps-{n}.sqlite3", n)
+            lo, hi = store.conn.execute("SELECT MIN(start_epoch), MAX(end_epoch) FROM entries").fetchone()
+            rnd = random.Random(n)
+            # an hour somewhere in the history, as EditDialog checks; half of them in the last year
+            ranges = [(a, a + 3600) for a in (rnd.randint(max(lo, hi - 365 * 86400) if k % 2 else lo, hi)
+                                              for k in range(args.runs))]
+            found, t_index = _timed(lambda: [
+                [r["id"] for r in store.overlapping(a, b) if r["end_epoch"] is not None] for a, b in ranges
+            ])
+            scanned, t_scan = _timed(lambda: [[r[0] for r in store.conn.execute(plain, (a, b))] for a, b in ranges])
+            ok &= found == scanned
+            week = date.today() - timedelta(days=date.today().weekday())
+            _, elapsed = _timed(lambda: store.gaps_and_overlaps(week, date.today()))
+            print(f"{n:>9} entries   overlapping() {t_index / len(ranges) * 1000:7.3f} ms   "
+                  f"range scan {t_scan / len(ranges) * 1000:8.3f} ms   gaps_and_overlaps(this week) {elapsed * 1000:6.2f} ms")
+            store.conn.close()
+    print("results match" if ok else "MISMATCH between overlapping() and the range scan")
+    return 0 if ok else 1
+
+
+# ----------------------------
+# sync: cost of a day's sync against history size
+# ----------------------------
+
+def cmd_sync(args: argparse.Namespace) -> int:
+    from sync import sync_folder
+
+    with tempfile.TemporaryDirectory() as tmp:
+        laptop = build_synthetic_db(Path(tmp) / "laptop.sqlite3", args.entries)
+        desktop = Store(Path(tmp) / "desktop.sqlite3")
+        folder = Path(tmp) / "shared"
+
+        def size() -> int:
+            return sum(f.stat().st_size for f in folder.glob("*"))
+
+        def timed_sync(store: Store, name: str) -> None:
+            before = size()
+            started = time.perf_counter()
+            sent, applied, ignored = sync_folder(store, folder)
+            ms = (time.perf_counter() - started) * 1000
+            print(f"  {name:<8} {ms:9.1f} ms   sent {sent:>7}   applied {applied:>7}   ignored {ignored:>4}   "
+                  f"+{(size() - before) / 1024:.1f} KiB")
+
+        print(f"first sync, {args.entries:,} entries of history")
+        timed_sync(laptop, "laptop")
+        timed_sync(desktop, "desktop")
+
+        # a day's work on both machines, including edits and deletes of old entries;
+        # the first round after the initial sync also pays for its checkpoint
+        for day in range(1, args.days + 1):
+            for store, n in ((laptop, args.day), (desktop, args.day // 2)):
+                for i in range(n):
+                    store.stop_entry(store.start_entry(f"Project {i % 7:03d}", f"day {day} work {i}", "notes"))
+            for row in laptop.query_page(date(2000, 1, 1), date.today() - timedelta(days=10 * day), None, limit=5):
+                laptop.update_entry(row["id"], "Project 001", row["task"], "edited", row["start_ts"], row["end_ts"])
+            for row in desktop.query_page(date(2000, 1, 1), date.today() - timedelta(days=30 * day), None, limit=2):
+                desktop.delete_entry(row["id"])
+            print(f"day {day}: sync after {args.day + args.day // 2} new entries, 5 edits and 2 deletes")
+            timed_sync(laptop, "laptop")
+            timed_sync(desktop, "desktop")
+            timed_sync(laptop, "laptop")
+
+        def content(store: Store) -> List[tuple]:
+            return sorted(tuple(r) for r in store.conn.execute(
+                "SELECT e.uid, p.name, e.task, e.notes, e.start_epoch, e.end_epoch "
+                "FROM entries e JOIN projects p ON p.id = e.project_id"))
+
+        same = content(laptop) == content(desktop)
+        print("databases identical" if same else "databases DIFFER")
+        return 0 if same else 1
+
+
+# ----------------------------
+# serve: load test of the HTTP API
+# ----------------------------
+
+async def _poll_status(host: str, port: int, until: float, latencies: List[float]) -> None:
+    import asyncio
+
+    reader, writer = await asyncio.open_connection(host, port)
+    request = f"GET /status HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+    try:
+        while time.perf_counter() < until:
+            started = time.perf_counter()
+            writer.write(request)
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        writer.close()
+
+
+async def _toggle_timer(host: str, port: int, until: float, every: float) -> int:
+    """Start/stop through the API every `every` seconds so the status cache keeps being invalidated."""
+    import asyncio
+
+    writes = 0
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < until:
+            path = "/stop" if writes % 2 else "/start"
+            body = b'{"project": "Load test", "task": "toggle"}'
+            writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            writes += 1
+            await asyncio.sleep(every)
+    finally:
+        writer.close()
+    return writes
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    import asyncio
+    import socket
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "serve.sqlite3"
+        build_synthetic_db(db, args.entries).conn.close()
+        with socket.socket() as sock:  # let the OS pick a free port
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = subprocess.Popen(
+            [sys.executable, str(MAIN_PY), "--db", str(db), "serve", "--port", str(port)],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.time() + 10
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                    break
+                except OSError:
+                    if time.time() > deadline or server.poll() is not None:
+                        print("server did not start")
+                        return 1
+                    time.sleep(0.05)
+
+            async def load() -> int:
+                until = time.perf_counter() + args.seconds
+                polls = [_poll_status("127.0.0.1", port, until, latencies) for _ in range(args.clients)]
+                results = await asyncio.gather(_toggle_timer("127.0.0.1", port, until, args.write_every), *polls)
+                return results[0]
+
+            latencies: List[float] = []
+            writes = asyncio.run(load())
+        finally:
+            server.terminate()
+            server.wait()
+    latencies.sort()
+    rps = len(latencies) / args.seconds
+    print(f"{args.clients} keep-alive clients, {writes} start/stop writes during the run")
+    print(f"GET /status  {len(latencies)} requests  {rps:,.0f} req/s  "
+          f"p50 {latencies[len(latencies) // 2]:.2f} ms  p99 {latencies[int(len(latencies) * 0.99)]:.2f} ms")
+    if rps < args.min_rps:
+        print(f"below {args.min_rps:,.0f} req/s")
+        return 1
+    return 0
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("plans", help="fail if any Store query falls back to a full table scan")
+    p.add_argument("--entries", type=int, default=200_000)
+    p.add_argument("--analyze", action="store_true", help="run maintenance.run_all first, as an idle GUI would have")
+    p.set_defaults(func=cmd_plans)
+
+    p = sub.add_parser("startup", help="time CLI invocations; fail if the median exceeds the budget")
+    p.add_argument("--runs", type=int, default=20)
+    p.add_argument("--entries", type=int, default=100_000)
+    p.add_argument("--budget-ms", type=float, default=100.0)
+    p.set_defaults(func=cmd_startup)
+
+    p = sub.add_parser("gui-startup", help="import time of gui and time from launch to first paint and first data")
+    p.add_argument("--runs", type=int, default=10)
+    p.add_argument("--entries", type=int, default=100_000)
+    p.add_argument("--frozen", metavar="EXE", help="also time a PyInstaller build, e.g. dist/jattrack")
+    p.set_defaults(func=cmd_gui_startup)
+
+    p = sub.add_parser("import", help="time Store.bulk_import on a generated JSONL history")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("roundtrip", help="time start_entry/stop_entry pairs on a file database")
+    p.add_argument("--pairs", type=int, default=200)
+    p.add_argument("--entries", type=int, default=50_000)
+    p.add_argument("--journal", choices=("wal", "delete", "both"), default="both",
+                   help="delete: rollback journal and a commit per statement, as before WAL (default: both)")
+    p.set_defaults(func=cmd_roundtrip)
+
+    p = sub.add_parser("search", help="time ranked full-text search on a large database")
+    p.add_argument("--entries", type=int, default=1_000_000)
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--budget-ms", type=float, default=50.0)
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("archive", help="hot database size and query latency before/after Store.archive")
+    p.add_argument("--entries", type=int, default=200_000)
+    p.add_argument("--keep-years", type=int, default=2, help="current years left in the hot database")
+    p.add_argument("--runs", type=int, default=20)
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("batch", help="memory and aggregation speed of EntryBatch against sqlite3.Row loops")
+    p.add_argument("--entries", type=int, default=1_000_000)
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("typing", help="latency of the newest search while typing, with and without cancellation")
+    p.add_argument("--entries", type=int, default=300_000)
+    p.add_argument("--key-ms", type=float, default=80.0, help="time between keystrokes")
+    p.set_defaults(func=cmd_typing)
+
+    p = sub.add_parser("backup", help="query and write latency while backup.make_backup copies the database")
+    p.add_argument("--entries", type=int, default=300_000)
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser("sync", help="time and size of sync.sync_folder for a day's work against a large history")
+    p.add_argument("--entries", type=int, default=300_000)
+    p.add_argument("--day", type=int, default=20, help="entries started on the laptop (half as many on the desktop)")
+    p.add_argument("--days", type=int, default=3)
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser("maintain", help="cost of each maintenance.py step and the space incremental vacuum returns")
+    p.add_argument("--entries", type=int, default=300_000)
+    p.add_argument("--delete", type=float, default=0.3, help="fraction of the entries deleted before vacuuming")
+    p.set_defaults(func=cmd_maintain)
+
+    p = sub.add_parser("overlaps", help="latency of Store.overlapping against history size, and a plain range scan")
+    p.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated entry counts")
+    p.add_argument("--runs", type=int, default=200)
+    p.set_defaults(func=cmd_overlaps)
+
+    p = sub.add_parser("serve", help="load-test GET /status of `main.py serve` while writes invalidate its cache")
+    p.add_argument("--entries", type=int, default=100_000)
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument("--clients", type=int, default=16)
+    p.add_argument("--write-every", type=float, default=0.1, help="seconds between API start/stop writes")
+    p.add_argument("--min-rps", type=float, default=2000.0)
+    p.set_defaults(func=cmd_serve)
+
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    rc = args.func(args)
+    print(f"[{args.command}] {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation for the time tracker
+===========================================
+
+Off by default and never imported unless asked for. Enable it per run with
+``python main.py --stats ...`` or for every run with ``TIMETRACKER_STATS=1``.
+
+While enabled, every Store method and the GUI refresh paths record call
+counts, a latency histogram and the rows they returned; the sqlite3 trace
+callback times each SQL statement. Statements slower than the threshold
+(``--slow-ms`` / ``TIMETRACKER_SLOW_MS``, default 50 ms) are appended to
+``slow_queries.log`` in the user data folder. The numbers accumulate across
+runs in ``stats.json`` next to it, which ``python main.py stats`` prints and
+Help → Diagnostics shows.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+STATS_NAME = "stats.json"
+SLOW_LOG_NAME = "slow_queries.log"
+DEFAULT_SLOW_MS = 50.0
+
+# upper bounds of the latency histogram buckets; one more bucket catches the rest
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000)
+
+# distinct SQL texts kept; statements with literals inlined would otherwise grow without bound
+MAX_STATEMENTS = 500
+
+# literals in the expanded SQL the trace callback reports
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+# Store methods left unwrapped: timing a context manager's creation says nothing
+_SKIP = {"transaction"}
+
+
+def _new_op() -> Dict[str, Any]:
+    return {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "hist": [0] * (len(BUCKETS_MS) + 1)}
+
+
+def _add(op: Dict[str, Any], ms: float, rows: int = 0, error: bool = False) -> None:
+    op["calls"] += 1
+    op["errors"] += error
+    op["total_ms"] += ms
+    op["max_ms"] = max(op["max_ms"], ms)
+    op["rows"] += rows
+    op["hist"][bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+
+def percentile(op: Dict[str, Any], q: float) -> float:
+    """Upper bound of the histogram bucket holding the q-th quantile (capped at the maximum)."""
+    target = q * op["calls"]
+    seen = 0
+    for bound, count in zip(BUCKETS_MS + (op["max_ms"],), op["hist"]):
+        seen += count
+        if count and seen >= target:
+            return min(bound, op["max_ms"])
+    return op["max_ms"]
+
+
+class Recorder:
+    """Collect operation and statement timings; thread-safe.
+
+    Statement time is approximate: the trace callback only reports when a
+    statement starts, so it runs until the next statement starts or the
+    Store call that issued it returns.
+    """
+
+    def __init__(self, stats_path: Path, slow_log_path: Path, slow_ms: float = DEFAULT_SLOW_MS):
+        self.stats_path = stats_path
+        self.slow_log_path = slow_log_path
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._local = threading.local()  # per thread: call stack and the statement in progress
+        self.data = load_stats(stats_path)
+        self.data["buckets_ms"] = list(BUCKETS_MS)
+        self.data["slow_ms"] = slow_ms
+
+    @classmethod
+    def open(cls, folder: Path, slow_ms: float = DEFAULT_SLOW_MS) -> "Recorder":
+        return cls(folder / STATS_NAME, folder / SLOW_LOG_NAME, slow_ms)
+
+    # --- recording ---
+    def record(self, name: str, ms: float, rows: int = 0, error: bool = False, kind: str = "operations") -> None:
+        with self._lock:
+            ops = self.data[kind]
+            op = ops.get(name)
+            if op is None:
+                if kind == "statements" and len(ops) >= MAX_STATEMENTS:
+                    return
+                op = ops[name] = _new_op()
+            _add(op, ms, rows, error)
+
+    def wrap(self, name: str, fn: F) -> F:
+        """Return `fn` timed under `name`; list results count as rows returned."""
+        local = self._local
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            stack = local.__dict__.setdefault("stack", [])
+            stack.append(name)
+            started = time.perf_counter()
+            result: Any = None
+            error = True
+            try:
+                result = fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                now = time.perf_counter()
+                self._finish_statement(now)
+                stack.pop()
+                rows = len(result) if isinstance(result, list) else 0
+                self.record(name, (now - started) * 1000, rows, error)
+
+        return timed  # type: ignore[return-value]
+
+    def instrument(self, obj: Any, prefix: str, names: Optional[List[str]] = None) -> None:
+        """Replace methods of `obj` by timed wrappers (all public and private ones by default)."""
+        cls = type(obj)
+        if names is None:
+            names = [
+                n for n, attr in vars(cls).items()
+                if callable(attr) and not n.startswith("__") and n not in _SKIP
+                and not isinstance(attr, (staticmethod, classmethod))
+            ]
+        for n in names:
+            setattr(obj, n, self.wrap(f"{prefix}.{n}", getattr(obj, n)))
+
+    def instrument_store(self, store: Any) -> None:
+        self.instrument(store, "Store")
+        store.conn.set_trace_callback(self.on_statement)
+
+    def on_statement(self, sql: str) -> None:
+        if sql.startswith("--"):
+            return  # FTS5 internals: part of the statement that runs them
+        sql = " ".join(sql.split())
+        current = self._local.__dict__.get("statement")
+        if current is not None and current[0] == sql:
+            return  # triggers report the statement that fired them again
+        now = time.perf_counter()
+        self._finish_statement(now)
+        stack = self._local.__dict__.get("stack") or ["-"]
+        self._local.statement = (sql, now, stack[-1])
+
+    def _finish_statement(self, now: float) -> None:
+        current = self._local.__dict__.pop("statement", None)
+        if current is None:
+            return
+        sql, started, owner = current
+        ms = (now - started) * 1000
+        # parameters arrive inlined: group by the statement's shape, which also
+        # keeps task and notes text out of the stats file
+        self.record(_LITERALS.sub("?", sql)[:300], ms, kind="statements")
+        if ms >= self.slow_ms:
+            self._log_slow(sql, ms, owner)
+
+    def _log_slow(self, sql: str, ms: float, owner: str) -> None:
+        # with its parameters, so the statement can be re-run under EXPLAIN QUERY PLAN
+        line = f"{datetime.now().isoformat(timespec='seconds')}\t{ms:.1f} ms\t{owner}\t{sql}\n"
+        try:
+            self.slow_log_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.slow_log_path.open("a", encoding="utf-8") as fh:
+                fh.write(line)
+        except OSError:
+            pass  # diagnostics must never break the app
+
+    # --- persistence ---
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self.data))
+
+    def save(self) -> None:
+        data = self.snapshot()
+        data["updated"] = datetime.now().isoformat(timespec="seconds")
+        try:
+            self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.stats_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            tmp.replace(self.stats_path)
+        except OSError:
+            pass
+
+
+def load_stats(path: Path) -> Dict[str, Any]:
+    """Read persisted stats; a missing or unreadable file yields empty stats."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("buckets_ms") != list(BUCKETS_MS):
+            raise ValueError("histogram layout changed")
+    except (OSError, ValueError):
+        data = {"since": datetime.now().isoformat(timespec="seconds")}
+    data.setdefault("operations", {})
+    data.setdefault("statements", {})
+    return data
+
+
+def report_rows(ops: Dict[str, Dict[str, Any]], limit: Optional[int] = None) -> List[Tuple[str, int, float, float, float, int]]:
+    """(name, calls, mean ms, p95 ms, max ms, rows), slowest in total first."""
+    rows = [
+        (name, op["calls"], op["total_ms"] / op["calls"], percentile(op, 0.95), op["max_ms"], op["rows"])
+        for name, op in sorted(ops.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+        if op["calls"]
+    ]
+    return rows[:limit] if limit is not None else rows
+
+
+def format_report(data: Dict[str, Any], statements: int = 10) -> str:
+    """Plain-text tables of operations and the `statements` slowest SQL statements."""
+    lines = [f"Stats since {data.get('since', '?')} (updated {data.get('updated', 'never')})", ""]
+    header = f"{'calls':>8} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9} {'rows':>9}  "
+    for title, kind, limit in (("Operation", "operations", None), ("Statement", "statements", statements)):
+        rows = report_rows(data[kind], limit)
+        if not rows:
+            continue
+        lines.append(header + title)
+        for name, calls, mean, p95, top, count in rows:
+            lines.append(f"{calls:>8} {mean:>9.2f} {p95:>9.2f} {top:>9.2f} {count:>9}  {name[:120]}")
+        lines.append("")
+    if len(lines) == 2:
+        lines.append("No data recorded yet.")
+    return "\n".join(lines).rstrip()
@@ -0,0 +1,1373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tkinter GUI for the time tracker
+================================
+
+Imported lazily by ``tracker.py`` so that the command line interface never pays
+for loading Tk. Start it with ``python main.py`` (no arguments) or
+``python main.py gui``.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, NamedTuple, Optional, List, Tuple, TypeVar
+
+import tkinter as tk
+from tkinter import ttk  # messagebox and filedialog are imported where used
+
+from tracker import (
+    APP_NAME, ENTRY_GONE, MIN_GAP, DaySnapshot, ProjectRegistry, Store, day_bounds, iso_to_epoch, parse_hhmm,
+    pretty_duration, user_data_dir,
+)
+
+if TYPE_CHECKING:
+    from backup import BackupScheduler
+    from diagnostics import Recorder
+    from maintenance import MaintenanceScheduler
+
+T = TypeVar("T")
+
+# ----------------------------
+# Database thread
+# ----------------------------
+
+class AsyncStore:
+    """Run a Store on one dedicated worker thread.
+
+    The worker owns the sqlite3 connection; callers hand it operations of the
+    form ``fn(store)`` and get a concurrent.futures.Future back, so the Tk event
+    loop never waits on a slow or locked database.
+    """
+
+    def __init__(self, path: Path, recorder: Optional[Recorder] = None):
+        self.path = path
+        self.recorder = recorder
+        self._jobs: "queue.Queue[Optional[Tuple[Future, Callable[[Store], Any], bool]]]" = queue.Queue()
+        # the job running on the worker, if it may be interrupted; guarded by _lock
+        self._lock = threading.Lock()
+        self._interruptible: Optional[Future] = None
+        self._store: Optional[Store] = None
+        self._thread = threading.Thread(target=self._run, name="jattrack-db", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            store: Optional[Store] = Store(self.path)
+            init_error: Optional[BaseException] = None
+            if self.recorder is not None:
+                self.recorder.instrument_store(store)
+        except BaseException as ex:  # report it through every future instead of dying silently
+            store, init_error = None, ex
+        self._store = store
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            fut, fn, interruptible = job
+            if not fut.set_running_or_notify_cancel():
+                continue  # cancelled while queued
+            if interruptible:
+                with self._lock:
+                    self._interruptible = fut
+            try:
+                if init_error is not None:
+                    raise init_error
+                result = fn(store)
+            except BaseException as ex:
+                result, error = None, ex
+            else:
+                error = None
+            if interruptible:
+                with self._lock:
+                    self._interruptible = None
+            if error is not None:
+                fut.set_exception(error)
+            else:
+                fut.set_result(result)
+        if store is not None:
+            store.conn.close()
+
+    def submit(self, fn: Callable[[Store], T], interruptible: bool = False) -> "Future[T]":
+        """Queue ``fn(store)``. Only read-only work may be `interruptible` (see cancel)."""
+        fut: "Future[T]" = Future()
+        self._jobs.put((fut, fn, interruptible))
+        return fut
+
+    def cancel(self, fut: Future) -> None:
+        """Drop a queued job, or abort the SQL statement of a running interruptible one.
+
+        An aborted job fails with sqlite3.OperationalError ("interrupted").
+        """
+        if fut.cancel():
+            return
+        with self._lock:
+            # while the lock is held the worker cannot move on to another job,
+            # so the interrupt cannot hit someone else's statement
+            if self._interruptible is fut and self._store is not None:
+                self._store.conn.interrupt()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Finish queued work and close the connection."""
+        self._jobs.put(None)
+        self._thread.join(timeout)
+
+
+# ----------------------------
+# GUI layer
+# ----------------------------
+
+# keys that move around in a combobox rather than change its text
+_NAV_KEYS = {"Up", "Down", "Left", "Right", "Return", "KP_Enter", "Escape", "Tab", "Home", "End"}
+
+
+def attach_autocomplete(
+    cb: ttk.Combobox, registry: Callable[[], Optional[ProjectRegistry]], head: Tuple[str, ...] = ()
+) -> None:
+    """Narrow a combobox's dropdown to prefix/substring matches from the registry as the user types."""
+    def on_key(event):
+        reg = registry()
+        if event.keysym in _NAV_KEYS or reg is None:
+            return
+        cb["values"] = list(head) + reg.match(cb.get())
+
+    cb.bind("<KeyRelease>", on_key, add="+")
+
+
+class FormState(NamedTuple):  # not a dataclass: `dataclasses` pulls in `inspect` at startup
+    project: tk.StringVar
+    task: tk.StringVar
+    notes: tk.StringVar
+
+
+class TimeTrackerApp(ttk.Frame):
+    PAGE_SIZE = 200  # history rows fetched per keyset page
+    FILTER_DELAY_MS = 300  # pause in typing before the filter fields are applied
+    BUSY_DELAY_MS = 150  # only show the busy state for work that is noticeably slow
+    # Tk-thread work timed when diagnostics are enabled
+    INSTRUMENTED = ("_refresh_table", "_update_today_total", "_tick")
+
+    def __init__(self, master: tk.Tk, db: AsyncStore):
+        super().__init__(master)
+        self.master = master
+        self.db = db
+        if db.recorder is not None:
+            db.recorder.instrument(self, "gui", list(self.INSTRUMENTED))
+        self.running_id: Optional[int] = None
+        self.timer_job: Optional[str] = None
+        self.snapshot: Optional[DaySnapshot] = None
+        self.registry: Optional[ProjectRegistry] = None  # owned by the Store; read-only here
+        # history paging state: active filter and search text, keyset of the last
+        # loaded row (plain listing) or number of rows loaded and the ranked
+        # window (search, see Store.search_window)
+        self._filter: Optional[Tuple[date, date, Optional[str]]] = None
+        self._search = ""
+        self._page_after: Optional[Tuple[int, int]] = None
+        self._page_offset = 0
+        self._page_window: Optional[Tuple[int, int]] = None
+        self._page_done = True
+        self._page_pending = False
+        self._requested: Optional[Tuple[Tuple[date, date, Optional[str]], str]] = None  # newest filter and search asked for
+        self._filter_job: Optional[str] = None
+        self._keys: Dict[str, Tuple[int, int]] = {}  # (start_epoch, id) of each row, by item id (= entry id)
+        # database calls in flight and the newest generation per result key
+        self._results: "queue.Queue[Tuple[Future, Callable[[Future], None]]]" = queue.Queue()
+        self._generations: Dict[str, int] = {}
+        self._interruptible: Dict[str, Future] = {}  # in flight, by key
+        self._pending = 0
+        self._busy_pending = 0
+        self._busy_job: Optional[str] = None
+        self._busy = False
+        self._poll_job: Optional[str] = None
+        # daily backups on a thread and connection of their own, set up by the first tick
+        self.backups: Optional[BackupScheduler] = None
+        self._backup_requested = False  # report the outcome of "Back Up Now"
+        # ANALYZE and incremental vacuum, a step at a time while the app is idle; set up once it is
+        self.maintenance: Optional[MaintenanceScheduler] = None
+        self._last_input = time.monotonic()
+
+        self.state = FormState(
+            project=tk.StringVar(),
+            task=tk.StringVar(),
+            notes=tk.StringVar(),
+        )
+
+        self._build_ui()
+
+    def load(self):
+        """Ask for projects, the running entry and history; call once the window is painted."""
+        self._load_projects()
+        self._load_running()
+        self._refresh_table()
+        self._tick()
+
+    # --- UI builders ---
+    def _build_ui(self):
+        self.master.title(APP_NAME)
+        self.master.geometry("980x600")
+        self.master.minsize(820, 520)
+
+        # top menu
+        menubar = tk.Menu(self.master)
+        filemenu = tk.Menu(menubar, tearoff=0)
+        filemenu.add_command(label="Import CSV/JSONL…", command=self.on_import)
+        filemenu.add_command(label="Export CSV…", command=self.on_export_csv)
+        filemenu.add_separator()
+        filemenu.add_command(label="Back Up Now", command=self.on_backup)
+        filemenu.add_command(label="Restore Backup…", command=self.on_restore)
+        filemenu.add_separator()
+        filemenu.add_command(label="Exit", command=self.master.destroy)
+        menubar.add_cascade(label="File", menu=filemenu)
+
+        viewmenu = tk.Menu(menubar, tearoff=0)
+        viewmenu.add_command(label="Gaps and Overlaps…", command=self.on_gaps)
+        menubar.add_cascade(label="View", menu=viewmenu)
+
+        helpmenu = tk.Menu(menubar, tearoff=0)
+        helpmenu.add_command(label="Diagnostics", command=self.on_diagnostics)
+        helpmenu.add_command(label="About", command=self.on_about)
+        menubar.add_cascade(label="Help", menu=helpmenu)
+        self.master.config(menu=menubar)
+
+        # main layout
+        container = ttk.Frame(self.master, padding=10)
+        container.pack(fill=tk.BOTH, expand=True)
+
+        form = ttk.LabelFrame(container, text="New Entry")
+        form.pack(fill=tk.X)
+
+        ttk.Label(form, text="Project").grid(row=0, column=0, sticky=tk.W, padx=6, pady=6)
+        self.project_cb = ttk.Combobox(form, textvariable=self.state.project)
+        self.project_cb.grid(row=0, column=1, sticky=tk.EW, padx=6, pady=6)
+        attach_autocomplete(self.project_cb, lambda: self.registry)
+
+        ttk.Label(form, text="Task").grid(row=0, column=2, sticky=tk.W, padx=6, pady=6)
+        self.task_entry = ttk.Entry(form, textvariable=self.state.task)
+        self.task_entry.grid(row=0, column=3, sticky=tk.EW, padx=6, pady=6)
+
+        ttk.Label(form, text="Notes").grid(row=0, column=4, sticky=tk.W, padx=6, pady=6)
+        self.notes_entry = ttk.Entry(form, textvariable=self.state.notes)
+        self.notes_entry.grid(row=0, column=5, sticky=tk.EW, padx=6, pady=6)
+
+        form.columnconfigure(1, weight=2)
+        form.columnconfigure(3, weight=3)
+        form.columnconfigure(5, weight=3)
+
+        buttons = ttk.Frame(container)
+        buttons.pack(fill=tk.X, pady=(6, 2))
+
+        self.start_btn = tk.Button(
+            buttons,
+            text="Start",
+            command=self.on_start,
+            bg="#2e7d32",
+            fg="white",
+            activebackground="#388e3c",
+            activeforeground="white",
+            font=("Segoe UI", 10, "bold"),
+            padx=16,
+            pady=6,
+        )
+        self.stop_btn = tk.Button(
+            buttons,
+            text="Stop",
+            command=self.on_stop,
+            state=tk.DISABLED,
+            bg="#c62828",
+            fg="white",
+            activebackground="#e53935",
+            activeforeground="white",
+            font=("Segoe UI", 10, "bold"),
+            padx=16,
+            pady=6,
+        )
+        self.delete_btn = ttk.Button(buttons, text="Delete Selected", command=self.on_delete)
+        self.edit_btn = ttk.Button(buttons, text="Edit Selected", command=self.on_edit_selected)
+
+        self.start_btn.pack(side=tk.LEFT, padx=4)
+        self.stop_btn.pack(side=tk.LEFT, padx=4)
+        self.edit_btn.pack(side=tk.LEFT, padx=4)
+        self.delete_btn.pack(side=tk.LEFT, padx=4)
+
+        stats = ttk.Frame(container)
+        stats.pack(fill=tk.X)
+        self.live_label = ttk.Label(stats, text="Not running", font=("Segoe UI", 11, "bold"))
+        self.today_total = ttk.Label(stats, text="Today: 00:00:00")
+        self.live_label.pack(side=tk.LEFT, padx=4, pady=6)
+        self.today_total.pack(side=tk.RIGHT, padx=4, pady=6)
+
+        # Filters
+        filters = ttk.LabelFrame(container, text="Filter")
+        filters.pack(fill=tk.X, pady=(4, 0))
+
+        ttk.Label(filters, text="From").grid(row=0, column=0, sticky=tk.W, padx=6, pady=6)
+        ttk.Label(filters, text="To").grid(row=0, column=2, sticky=tk.W, padx=6, pady=6)
+        ttk.Label(filters, text="Project").grid(row=0, column=4, sticky=tk.W, padx=6, pady=6)
+
+        self.from_entry = ttk.Entry(filters)
+        self.to_entry = ttk.Entry(filters)
+        self.filter_project_cb = ttk.Combobox(filters, values=["(any)"])
+        self.filter_project_cb.set("(any)")
+        attach_autocomplete(self.filter_project_cb, lambda: self.registry, head=("(any)",))
+
+        today = date.today()
+        first_of_month = today.replace(day=1)
+        self.from_entry.insert(0, first_of_month.isoformat())
+        self.to_entry.insert(0, today.isoformat())
+
+        self.from_entry.grid(row=0, column=1, sticky=tk.EW, padx=6, pady=6)
+        self.to_entry.grid(row=0, column=3, sticky=tk.EW, padx=6, pady=6)
+        self.filter_project_cb.grid(row=0, column=5, sticky=tk.EW, padx=6, pady=6)
+
+        filters.columnconfigure(1, weight=1)
+        filters.columnconfigure(3, weight=1)
+        filters.columnconfigure(5, weight=1)
+
+        self.apply_filter_btn = ttk.Button(filters, text="Apply", command=self._refresh_table)
+        self.apply_filter_btn.grid(row=0, column=6, padx=6)
+
+        self.filter_summary = ttk.Label(filters, text="")
+        self.filter_summary.grid(row=0, column=7, sticky=tk.E, padx=6)
+
+        ttk.Label(filters, text="Search").grid(row=1, column=0, sticky=tk.W, padx=6, pady=(0, 6))
+        self.search_entry = ttk.Entry(filters)
+        self.search_entry.grid(row=1, column=1, columnspan=5, sticky=tk.EW, padx=6, pady=(0, 6))
+        self.search_entry.bind("<Return>", lambda e: self._refresh_table())
+        self.filter_error = ttk.Label(filters, text="", foreground="#c62828")
+        self.filter_error.grid(row=1, column=6, columnspan=2, sticky=tk.W, padx=6, pady=(0, 6))
+
+        # live filtering: every edit re-queries once typing pauses
+        for widget in (self.from_entry, self.to_entry, self.filter_project_cb, self.search_entry):
+            widget.bind("<KeyRelease>", self._schedule_filter, add="+")
+        for widget in (self.from_entry, self.to_entry):
+            widget.bind("<Return>", lambda e: self._refresh_table())
+        self.filter_project_cb.bind("<<ComboboxSelected>>", self._schedule_filter, add="+")
+
+        # Table
+        table_frame = ttk.Frame(container)
+        table_frame.pack(fill=tk.BOTH, expand=True, pady=6)
+
+        cols = ("id", "project", "task", "notes", "start", "end", "duration")
+        self.tree = ttk.Treeview(table_frame, columns=cols, show="headings", selectmode="extended")
+        for c, w in zip(cols, (60, 140, 220, 240, 140, 140, 110)):
+            self.tree.heading(c, text=c.title())
+            self.tree.column(c, width=w, anchor=tk.W)
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+
+        self.vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.vsb.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # bindings
+        self.tree.bind("<Double-1>", lambda e: self.on_edit_selected())
+        self.tree.bind("<Delete>", lambda e: self.on_delete())
+        self.tree.bind("<Control-a>", lambda e: self.tree.selection_set(self.tree.get_children()))
+        self.master.bind("<Control-Return>", lambda e: self.on_start())
+        self.master.bind("<Escape>", lambda e: self.on_stop())
+        for sequence in ("<KeyPress>", "<ButtonPress>"):
+            self.master.bind_all(sequence, self._on_input, add="+")
+
+    # --- database calls ---
+    def _call(
+        self,
+        fn: Callable[[Store], Any],
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        key: Optional[str] = None,
+        busy: bool = True,
+        interruptible: bool = False,
+    ) -> None:
+        """Run ``fn(store)`` on the database thread and hand the result back via after().
+
+        With a `key`, only the newest call for that key is delivered; results of
+        older calls (e.g. a previous filter) are dropped. Read-only calls may be
+        `interruptible`: a newer call for their key then also cancels them, or
+        aborts their query if it already runs. `busy` calls put the action
+        buttons into their busy state until they complete.
+        """
+        generation = None
+        if key is not None:
+            generation = self._generations[key] = self._generations.get(key, 0) + 1
+            stale = self._interruptible.pop(key, None)
+            if stale is not None:
+                self.db.cancel(stale)
+
+        def deliver(fut: Future) -> None:
+            if busy:
+                self._busy_pending -= 1
+                self._update_busy()
+            if generation is not None and self._generations.get(key) != generation:
+                return  # superseded by a newer call
+            if self._interruptible.get(key) is fut:
+                del self._interruptible[key]
+            ex = fut.exception()
+            if ex is not None:
+                if on_error is not None:
+                    on_error(ex)
+                else:
+                    from tkinter import messagebox
+
+                    messagebox.showerror("Database error", str(ex))
+            elif on_done is not None:
+                on_done(fut.result())
+
+        fut = self.db.submit(fn, interruptible and key is not None)
+        if interruptible and key is not None:
+            self._interruptible[key] = fut
+        self._pending += 1
+        if busy:
+            self._busy_pending += 1
+            self._update_busy()
+        # the done callback runs on the worker thread; only hand over through the queue
+        fut.add_done_callback(lambda f: self._results.put((f, deliver)))
+        if self._poll_job is None:
+            self._poll_job = self.after(10, self._poll_results)
+
+    def _poll_results(self):
+        self._poll_job = None
+        while True:
+            try:
+                fut, deliver = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            deliver(fut)
+        if self._pending:
+            self._poll_job = self.after(10, self._poll_results)
+
+    def _update_busy(self):
+        if self._busy_pending and not self._busy and self._busy_job is None:
+            self._busy_job = self.after(self.BUSY_DELAY_MS, self._enter_busy)
+        elif not self._busy_pending:
+            if self._busy_job is not None:
+                self.after_cancel(self._busy_job)
+                self._busy_job = None
+            if self._busy:
+                self._busy = False
+                self.master.configure(cursor="")
+                self._apply_buttons()
+
+    def _enter_busy(self):
+        self._busy_job = None
+        if not self._busy_pending:
+            return
+        self._busy = True
+        self.master.configure(cursor="watch")
+        self._apply_buttons()
+
+    def _apply_buttons(self):
+        if self._busy:
+            for btn in (self.start_btn, self.stop_btn, self.edit_btn, self.delete_btn, self.apply_filter_btn):
+                btn.configure(state=tk.DISABLED)
+            return
+        running = bool(self.running_id)
+        self.start_btn.configure(state=tk.DISABLED if running else tk.NORMAL)
+        self.stop_btn.configure(state=tk.NORMAL if running else tk.DISABLED)
+        for btn in (self.edit_btn, self.delete_btn, self.apply_filter_btn):
+            btn.configure(state=tk.NORMAL)
+
+    # --- actions ---
+    def _load_projects(self):
+        # the registry lives in memory on the Store: no SQL involved
+        self._call(lambda s: s.registry, self._set_registry, key="projects", busy=False)
+
+    def _set_registry(self, registry: ProjectRegistry):
+        self.registry = registry
+        names = registry.names()
+        self.project_cb["values"] = names
+        self.filter_project_cb["values"] = ["(any)"] + names
+
+    def _load_running(self):
+        self._call(lambda s: s.today_snapshot(), self._set_snapshot, key="today", busy=False)
+
+    def _set_snapshot(self, snap: DaySnapshot):
+        self.snapshot = snap
+        self.running_id = snap.running_id
+        if snap.running_id:
+            self.live_label.configure(text=f"Running: {snap.running_project} — {snap.running_task}")
+        else:
+            self.live_label.configure(text="Not running")
+        self._apply_buttons()
+        self._update_today_total()
+
+    def _tick(self):
+        # update live timer + today total every 1s
+        self._update_today_total()
+        self._maintain_if_idle()
+        # another instance or a script may have written: one PRAGMA when nothing did
+        self._call(lambda s: s.poll_changes(), self._on_external_change, key="changes", busy=False)
+        backups = self._backup_scheduler()
+        backups.poll()
+        if self._backup_requested and not backups.running:
+            self._backup_requested = False
+            from tkinter import messagebox
+
+            if backups.error is not None:
+                messagebox.showerror("Backup failed", str(backups.error))
+            else:
+                messagebox.showinfo("Backup", f"Saved to {backups.result}")
+        self.timer_job = self.after(1000, self._tick)
+
+    def _backup_scheduler(self) -> BackupScheduler:
+        # backup.py and the scan of the backup folder wait until the window is painted
+        if self.backups is None:
+            from backup import BACKUP_STARTUP_DELAY, BackupScheduler
+
+            self.backups = BackupScheduler(self.db.path, delay=BACKUP_STARTUP_DELAY)
+        return self.backups
+
+    def _on_input(self, _event=None):
+        self._last_input = time.monotonic()
+
+    def _maintain_if_idle(self):
+        # idle: nothing tracked, no queries in flight, no key press or click for a while
+        if self.running_id or self._pending:
+            return
+        idle_for = time.monotonic() - self._last_input
+        if self.maintenance is None:
+            from maintenance import IDLE_AFTER, MaintenanceScheduler
+
+            if idle_for < IDLE_AFTER:
+                return  # no step can be due before then
+            self.maintenance = MaintenanceScheduler()
+        maintenance = self.maintenance
+        if not maintenance.due(idle_for):
+            return
+        maintenance.in_flight = True
+
+        def done(_):
+            maintenance.in_flight = False
+
+        self._call(maintenance.step, done, on_error=done, busy=False)
+
+    def _on_external_change(self, changed: FrozenSet[str]):
+        if "projects" in changed:
+            self._load_projects()
+        if "entries" in changed:
+            self._load_running()
+            self._reload_history()
+
+    def _update_today_total(self):
+        # plain arithmetic on the last snapshot; the database is only asked again after writes
+        snap = self.snapshot
+        if snap is None:
+            return
+        if snap.day != date.today():
+            self._load_running()
+        now = datetime.now()
+        self.today_total.configure(text=f"Today: {pretty_duration(snap.total(now))}")
+
+        if self.running_id and snap.running_id == self.running_id:
+            self.live_label.configure(
+                text=f"Running: {snap.running_project} — {snap.running_task} ({pretty_duration(snap.elapsed(now))})"
+            )
+
+    def _read_filter(self) -> Optional[Tuple[date, date, Optional[str]]]:
+        try:
+            start_date = date.fromisoformat(self.from_entry.get().strip())
+            end_date = date.fromisoformat(self.to_entry.get().strip())
+            if end_date < start_date:
+                raise ValueError
+        except ValueError:
+            # shown next to the fields: a dialog would interrupt typing
+            self.filter_error.configure(text="Dates are YYYY-MM-DD, From before To")
+            return None
+        self.filter_error.configure(text="")
+
+        project = self.filter_project_cb.get().strip()
+        if project in ("", "(any)"):
+            project = None
+        return start_date, end_date, project
+
+    def _refresh_table(self):
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+            self._filter_job = None
+        flt = self._read_filter()
+        if flt is None:
+            return
+        self._load_history(flt, self.search_entry.get().strip())
+
+    def _schedule_filter(self, event=None):
+        """Re-query FILTER_DELAY_MS after the last edit of a filter field."""
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(self.FILTER_DELAY_MS, self._apply_live_filter)
+
+    def _apply_live_filter(self):
+        self._filter_job = None
+        flt = self._read_filter()
+        text = self.search_entry.get().strip()
+        if flt is not None and (flt, text) != self._requested:
+            self._load_history(flt, text)
+
+    def _history_failed(self, ex: BaseException):
+        self.filter_error.configure(text=f"Query failed: {ex}")
+        self.filter_summary.configure(text="")
+
+    def _reload_history(self):
+        # re-run the filter the table shows, not whatever is half-typed in the fields
+        if self._filter is not None:
+            self._load_history(self._filter, self._search)
+
+    def _load_history(self, flt: Tuple[date, date, Optional[str]], text: str):
+        self._requested = (flt, text)
+        limit = self.PAGE_SIZE
+        if text:
+            def page(s: Store) -> Tuple[Optional[Tuple[int, int]], List[sqlite3.Row]]:
+                window = s.search_window(text, *flt)  # later pages rank the same matches
+                return window, s.search(text, *flt, limit=limit, window=window)
+        else:
+            page = lambda s: (None, s.query_page(*flt, limit=limit))
+        # totals follow in a second call: counting every hit of a common word
+        # takes longer than ranking the first page
+        # a newer filter aborts these queries; the summary's "…" shows progress
+        self._call(page, lambda result: self._show_first_page(flt, text, *result), on_error=self._history_failed,
+                   key="history", busy=False, interruptible=True)
+        self._load_totals(flt, text)
+
+    def _load_totals(self, flt: Tuple[date, date, Optional[str]], text: str):
+        if text:
+            totals = lambda s: s.search_totals(text, *flt)
+        else:
+            totals = lambda s: s.query_totals(*flt)
+        self._call(totals, self._show_totals, on_error=self._history_failed,
+                   key="history-totals", busy=False, interruptible=True)
+
+    def _show_first_page(self, flt, text: str, window: Optional[Tuple[int, int]], rows: List[sqlite3.Row]):
+        same = flt == self._filter and text == self._search
+        if same and not text:
+            # the same listing again (Apply, another instance wrote): update it in place
+            self._merge_page(rows)
+            return
+        selection = self.tree.selection() if same else ()
+        self._filter = flt
+        self._search = text
+        self._page_after = None
+        self._page_offset = 0
+        self._page_window = window
+        self._page_done = False
+        if not same:
+            self.filter_summary.configure(text="…")
+        self.tree.heading("notes", text="Match" if text else "Notes")
+        # clear
+        self.tree.delete(*self.tree.get_children())
+        self._keys.clear()
+        self._insert_page(rows)
+        self.tree.selection_set([iid for iid in selection if self.tree.exists(iid)])
+
+    def _show_totals(self, totals: Tuple[int, int]):
+        count, seconds = totals
+        self.filter_summary.configure(text=f"{count} entries · {pretty_duration(seconds)}")
+
+    def _row_values(self, r: sqlite3.Row, notes: Any = None) -> Tuple[Any, ...]:
+        return (
+            r["id"], r["project"], r["task"], r["notes"] if notes is None else notes, r["start_ts"], r["end_ts"],
+            pretty_duration(int(r["duration_s"] or 0)),
+        )
+
+    def _insert_page(self, rows: List[sqlite3.Row]):
+        for r in rows:
+            iid = str(r["id"])
+            if self.tree.exists(iid):
+                continue  # already placed by a targeted update
+            self.tree.insert("", tk.END, iid=iid, values=self._row_values(r, r["snippet"] if self._search else None))
+            self._keys[iid] = (r["start_epoch"], r["id"])
+        if rows:
+            self._page_after = (rows[-1]["start_epoch"], rows[-1]["id"])
+        self._page_offset += len(rows)
+        self._page_done = len(rows) < self.PAGE_SIZE
+
+    def _merge_page(self, rows: List[sqlite3.Row]):
+        """Apply a fresh first page of the current listing to the loaded rows.
+
+        Rows the page covers are updated, moved, inserted or removed; loaded
+        rows below it stay. Selection and scroll position are kept.
+        """
+        fresh = {str(r["id"]) for r in rows}
+        bottom = (rows[-1]["start_epoch"], rows[-1]["id"]) if len(rows) >= self.PAGE_SIZE else None
+        for iid in self.tree.get_children():
+            if iid not in fresh and (bottom is None or self._keys[iid] >= bottom):
+                self.tree.delete(iid)
+                del self._keys[iid]
+        # everything still loaded that the page does not cover sorts below it
+        for index, r in enumerate(rows):
+            iid = str(r["id"])
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=self._row_values(r))
+                if self.tree.index(iid) != index:
+                    self.tree.move(iid, "", index)
+            else:
+                self.tree.insert("", index, iid=iid, values=self._row_values(r))
+            self._keys[iid] = (r["start_epoch"], r["id"])
+        children = self.tree.get_children()
+        if children:
+            self._page_after = self._keys[children[-1]]
+        if bottom is None:
+            self._page_done = True
+
+    def _refresh_entries(self, *ids: Optional[int]):
+        """Update the history rows of the entries a write touched instead of reloading the table."""
+        ids = [i for i in ids if i]
+        if self._filter is None:
+            return
+        self._load_totals(self._filter, self._search)
+        if not ids:
+            return
+        generation = self._generations.get("history")
+
+        def apply(rows: List[sqlite3.Row]):
+            if generation != self._generations.get("history"):
+                return  # a new listing is on its way and already includes the write
+            found = {r["id"]: r for r in rows}
+            put: List[sqlite3.Row] = []
+            for entry_id in ids:
+                iid, r = str(entry_id), found.get(entry_id)
+                if r is not None and self._search:
+                    # whether it still matches is the search's business; refresh the row as is
+                    if self.tree.exists(iid):
+                        self.tree.item(iid, values=self._row_values(r, self.tree.set(iid, "notes")))
+                elif r is not None and self._in_view(r):
+                    put.append(r)
+                elif self.tree.exists(iid):
+                    self.tree.delete(iid)
+                    del self._keys[iid]
+                    if self._search:
+                        self._page_offset -= 1  # the offset of the next page shifts with it
+            if len(put) == 1:
+                self._put_row(put[0])
+            elif put:
+                self._put_rows(put)
+
+        self._call(lambda s: s.get_entries(ids), apply, busy=False)
+
+    def _in_view(self, r: sqlite3.Row) -> bool:
+        """Whether a row belongs to the listing and to the part of it already loaded."""
+        start_date, end_date, project = self._filter
+        lo, _ = day_bounds(start_date)
+        _, hi = day_bounds(end_date)
+        if not lo <= r["start_epoch"] < hi or (project and r["project"] != project):
+            return False
+        # rows past the last loaded one arrive with a later page
+        return self._page_done or self._page_after is None or (r["start_epoch"], r["id"]) > self._page_after
+
+    def _put_row(self, r: sqlite3.Row):
+        """Insert or update one row at its place in the newest-first order."""
+        iid, key = str(r["id"]), (r["start_epoch"], r["id"])
+        exists = self.tree.exists(iid)
+        if exists:
+            self.tree.item(iid, values=self._row_values(r))
+            if self._keys[iid] == key:
+                return
+        # new and edited entries are usually near the top, so a linear search is fine
+        others = [other for other in self.tree.get_children() if other != iid]
+        index = next((i for i, other in enumerate(others) if self._keys[other] < key), len(others))
+        if exists:
+            self.tree.move(iid, "", index)
+        else:
+            self.tree.insert("", index, iid=iid, values=self._row_values(r))
+        self._keys[iid] = key
+
+    def _put_rows(self, rows: List[sqlite3.Row]):
+        """_put_row for many rows (a bulk edit): update them in place, then reorder the table once."""
+        for r in rows:
+            iid = str(r["id"])
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=self._row_values(r))
+            else:
+                self.tree.insert("", tk.END, iid=iid, values=self._row_values(r))
+            self._keys[iid] = (r["start_epoch"], r["id"])
+        children = self.tree.get_children()
+        ordered = sorted(children, key=self._keys.__getitem__, reverse=True)
+        if ordered != list(children):
+            self.tree.set_children("", *ordered)
+
+    def _load_next_page(self):
+        if self._page_done or self._filter is None:
+            self._page_pending = False
+            return
+        flt, text, after, offset, limit = self._filter, self._search, self._page_after, self._page_offset, self.PAGE_SIZE
+        window = self._page_window
+        generation = self._generations.get("history")
+
+        def show(rows: List[sqlite3.Row]):
+            self._page_pending = False
+            # a new filter has been requested meanwhile: this page belongs to the old one
+            if generation == self._generations.get("history") and self._page_offset == offset:
+                self._insert_page(rows)
+
+        if text:
+            self._call(lambda s: s.search(text, *flt, limit=limit, offset=offset, window=window), show, busy=False)
+        else:
+            self._call(lambda s: s.query_page(*flt, after=after, limit=limit), show, busy=False)
+
+    def _on_tree_scroll(self, first: str, last: str):
+        self.vsb.set(first, last)
+        # fetch the next page lazily once the view nears the end of what is loaded
+        if float(last) > 0.9 and not self._page_done and not self._page_pending:
+            self._page_pending = True
+            self.after_idle(self._load_next_page)
+
+    def on_start(self):
+        from tkinter import messagebox
+
+        if self._busy:
+            return
+        project = self.state.project.get().strip()
+        task = self.state.task.get().strip()
+        notes = self.state.notes.get().strip()
+        if not project:
+            messagebox.showwarning("Missing project", "Please enter a project name.")
+            return
+        if not task:
+            task = "(untitled)"
+        previous = self.running_id  # stopped by start_entry
+        self._call(
+            lambda s: s.start_entry(project, task, notes),
+            lambda entry_id: self._after_start(entry_id, previous),
+            on_error=lambda ex: messagebox.showerror("Cannot start", str(ex)),
+        )
+
+    def _after_start(self, entry_id: int, previous: Optional[int]):
+        self.running_id = entry_id
+        self.state.notes.set("")
+        self._load_projects()
+        self._load_running()
+        self._refresh_entries(previous, entry_id)
+
+    def on_stop(self):
+        from tkinter import messagebox
+
+        if not self.running_id or self._busy:
+            return
+        entry_id, self.running_id = self.running_id, None
+        self._apply_buttons()
+
+        def failed(ex: BaseException):
+            messagebox.showerror("Cannot stop", str(ex))
+            self._load_running()
+
+        self._call(lambda s: s.stop_entry(entry_id), lambda _: self._after_write(entry_id), on_error=failed)
+
+    def _after_write(self, *entry_ids: int):
+        self._load_running()
+        self._refresh_entries(*entry_ids)
+
+    def on_delete(self):
+        from tkinter import messagebox
+
+        sel = self._selected_ids()
+        if not sel:
+            return
+        question = "Delete the selected entry?" if len(sel) == 1 else f"Delete the {len(sel)} selected entries?"
+        if messagebox.askyesno("Delete", question):
+            self._call(lambda s: s.delete_entries(sel), lambda _: self._after_write(*sel))
+
+    def _selected_ids(self) -> List[int]:
+        return [int(iid) for iid in self.tree.selection()]  # item ids are entry ids
+
+    def on_edit_selected(self):
+        from tkinter import messagebox
+
+        sel = self._selected_ids()
+        if len(sel) > 1:
+            on_saved = lambda: self._after_edit(*sel)
+            self._call(lambda s: s.registry, lambda registry: BulkEditDialog(self.master, self._call, sel, registry, on_saved))
+            return
+        if not sel:
+            return
+        sel_id = sel[0]
+
+        def open_dialog(result: Tuple[Optional[sqlite3.Row], ProjectRegistry]):
+            row, registry = result
+            if row is None:
+                messagebox.showinfo("Edit", ENTRY_GONE)
+            else:
+                EditDialog(self.master, self._call, row, registry, on_saved=lambda: self._after_edit(sel_id))
+
+        self._call(lambda s: (s.get_entry(sel_id), s.registry), open_dialog)
+
+    def _after_edit(self, *entry_ids: int):
+        self._refresh_entries(*entry_ids)
+        self._load_running()
+        self._load_projects()
+
+    def on_export_csv(self):
+        from tkinter import filedialog, messagebox
+
+        # export filtered rows
+        flt = self._read_filter()
+        if flt is None:
+            return
+        start_date, end_date, project = flt
+
+        def ask_destination(totals: Tuple[int, int]):
+            if not totals[0]:
+                messagebox.showinfo("Nothing to export", "No rows for selected filter.")
+                return
+            dest = filedialog.asksaveasfilename(
+                title="Export CSV",
+                defaultextension=".csv",
+                filetypes=[("CSV", "*.csv"), ("All files", "*.*")],
+                initialfile=f"timetracker_{start_date}_{end_date}.csv",
+            )
+            if not dest:
+                return
+            self._call(
+                lambda s: s.export_csv(s.iter_entries(*flt), Path(dest)),
+                lambda _: messagebox.showinfo("Exported", f"Saved to {dest}"),
+                on_error=lambda ex: messagebox.showerror("Export failed", str(ex)),
+            )
+
+        self._call(lambda s: s.query_totals(*flt), ask_destination)
+
+    def on_import(self):
+        from tkinter import filedialog, messagebox
+
+        src = filedialog.askopenfilename(
+            title="Import entries",
+            filetypes=[("CSV export", "*.csv"), ("JSON lines", "*.jsonl *.ndjson"), ("All files", "*.*")],
+        )
+        if not src:
+            return
+
+        def imported(result: Tuple[int, int]):
+            inserted, skipped = result
+            messagebox.showinfo("Imported", f"Imported {inserted} entries ({skipped} skipped).")
+            self._load_projects()
+            self._load_running()
+            self._reload_history()
+
+        self._call(
+            lambda s: s.bulk_import(Path(src)),
+            imported,
+            on_error=lambda ex: messagebox.showerror("Import failed", str(ex)),
+        )
+
+    def on_backup(self):
+        self._backup_scheduler().start()
+        self._backup_requested = True
+
+    def on_restore(self):
+        from tkinter import filedialog, messagebox
+        from backup import backup_folder, restore_backup
+
+        src = filedialog.askopenfilename(
+            title="Restore backup",
+            initialdir=str(backup_folder()),
+            filetypes=[("Backups", "*.sqlite3"), ("All files", "*.*")],
+        )
+        if not src or not messagebox.askyesno(
+            "Restore", f"Replace all entries with the backup\n{src}?\n\nThe current data is backed up first."
+        ):
+            return
+
+        def restored(saved: Path):
+            messagebox.showinfo("Restored", f"Restored {src}.\nPrevious data saved to {saved}")
+            self._load_projects()
+            self._load_running()
+            self._reload_history()
+
+        self._call(
+            lambda s: restore_backup(s, Path(src)),
+            restored,
+            on_error=lambda ex: messagebox.showerror("Restore failed", str(ex)),
+        )
+
+    def on_about(self):
+        from tkinter import messagebox
+
+        messagebox.showinfo(
+            "About",
+            f"{APP_NAME}\nSimple cross‑platform time tracking.\nDatabase: {self.db.path}",
+        )
+
+    def on_diagnostics(self):
+        DiagnosticsWindow(self.master, self.db.recorder)
+
+    def on_gaps(self):
+        GapsWindow(self.master, self._call)
+
+
+class GapsWindow(tk.Toplevel):
+    """Untracked gaps and overlapping entries of a week (Store.gaps_and_overlaps)."""
+
+    COLUMNS = ("kind", "day", "time", "duration", "entries")
+    HEADINGS = ("", "Day", "Time", "Duration", "Entries")
+
+    def __init__(self, master: tk.Tk, call):
+        super().__init__(master)
+        self.title("Gaps and Overlaps")
+        self.call = call
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday())
+
+        frm = ttk.Frame(self, padding=10)
+        frm.pack(fill=tk.BOTH, expand=True)
+        self.summary_lbl = ttk.Label(frm, text="…")
+        self.summary_lbl.pack(anchor=tk.W, pady=(0, 6))
+
+        self.tree = ttk.Treeview(frm, columns=self.COLUMNS, show="headings", height=16)
+        for c, heading, w in zip(self.COLUMNS, self.HEADINGS, (70, 110, 110, 80, 420)):
+            self.tree.heading(c, text=heading)
+            self.tree.column(c, width=w, anchor=tk.W)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        btns = ttk.Frame(frm)
+        btns.pack(fill=tk.X, pady=(8, 0))
+        ttk.Button(btns, text="◀ Previous Week", command=lambda: self.show_week(-7)).pack(side=tk.LEFT, padx=4)
+        ttk.Button(btns, text="Next Week ▶", command=lambda: self.show_week(7)).pack(side=tk.LEFT, padx=4)
+        ttk.Button(btns, text="Close", command=self.destroy).pack(side=tk.RIGHT, padx=4)
+        ttk.Button(btns, text="Refresh", command=self.refresh).pack(side=tk.RIGHT, padx=4)
+        self.refresh()
+
+    def show_week(self, days: int):
+        self.monday += timedelta(days=days)
+        self.refresh()
+
+    def refresh(self):
+        monday = self.monday
+        sunday = monday + timedelta(days=6)
+        self.summary_lbl.configure(text=f"Week of {monday.isoformat()}: …")
+        self.call(lambda s: s.gaps_and_overlaps(monday, sunday, MIN_GAP), lambda result: self._show(monday, *result))
+
+    def _show(self, monday: date, gaps: List[Tuple[int, int]], overlaps: List[Tuple[sqlite3.Row, sqlite3.Row, int]]):
+        if not self.winfo_exists() or monday != self.monday:
+            return  # closed, or another week asked for meanwhile
+        describe = lambda r: f"#{r['id']} {r['project']} — {r['task']}"
+        rows = [(start, "Gap", end - start, "") for start, end in gaps]
+        rows += [
+            (second["start_epoch"], "Overlap", seconds, f"{describe(first)}  ×  {describe(second)}")
+            for first, second, seconds in overlaps
+        ]
+        self.tree.delete(*self.tree.get_children())
+        for start, kind, seconds, entries in sorted(rows, key=lambda row: row[0]):
+            at = datetime.fromtimestamp(start)
+            until = datetime.fromtimestamp(start + seconds)
+            self.tree.insert("", tk.END, values=(
+                kind, at.strftime("%a %Y-%m-%d"), f"{at:%H:%M}–{until:%H:%M}", pretty_duration(seconds), entries,
+            ))
+        self.summary_lbl.configure(
+            text=f"Week of {monday.isoformat()}: {len(gaps)} gaps of {MIN_GAP // 60} minutes or more, "
+                 f"{len(overlaps)} overlaps"
+        )
+
+
+class DiagnosticsWindow(tk.Toplevel):
+    """Timings recorded by diagnostics.Recorder: live ones if enabled, else the saved stats."""
+
+    COLUMNS = ("name", "calls", "mean", "p95", "max", "rows")
+    HEADINGS = ("Name", "Calls", "Mean ms", "p95 ms", "Max ms", "Rows")
+
+    def __init__(self, master: tk.Tk, recorder: Optional[Recorder]):
+        super().__init__(master)
+        self.title("Diagnostics")
+        self.recorder = recorder
+
+        frm = ttk.Frame(self, padding=10)
+        frm.pack(fill=tk.BOTH, expand=True)
+        if recorder is not None:
+            status = f"Recording. Statements over {recorder.slow_ms:g} ms go to {recorder.slow_log_path}"
+        else:
+            status = "Recording is off (start with --stats or TIMETRACKER_STATS=1); showing saved stats."
+        self.status_lbl = ttk.Label(frm, text=status)
+        self.status_lbl.pack(anchor=tk.W, pady=(0, 6))
+
+        notebook = ttk.Notebook(frm)
+        notebook.pack(fill=tk.BOTH, expand=True)
+        self.trees: Dict[str, ttk.Treeview] = {}
+        for kind, title, width in (("operations", "Operations", 260), ("statements", "SQL statements", 520)):
+            tree = ttk.Treeview(notebook, columns=self.COLUMNS, show="headings", height=16)
+            for c, heading, w in zip(self.COLUMNS, self.HEADINGS, (width, 70, 80, 80, 80, 80)):
+                tree.heading(c, text=heading)
+                tree.column(c, width=w, anchor=tk.W if c == "name" else tk.E)
+            notebook.add(tree, text=title)
+            self.trees[kind] = tree
+
+        btns = ttk.Frame(frm)
+        btns.pack(fill=tk.X, pady=(8, 0))
+        ttk.Button(btns, text="Close", command=self.destroy).pack(side=tk.RIGHT, padx=4)
+        ttk.Button(btns, text="Export JSON…", command=self.on_export).pack(side=tk.RIGHT, padx=4)
+        ttk.Button(btns, text="Refresh", command=self.refresh).pack(side=tk.RIGHT, padx=4)
+        self.refresh()
+
+    def _data(self) -> Dict[str, Any]:
+        from diagnostics import STATS_NAME, load_stats
+
+        if self.recorder is not None:
+            return self.recorder.snapshot()
+        return load_stats(user_data_dir() / STATS_NAME)
+
+    def refresh(self):
+        from diagnostics import report_rows
+
+        data = self._data()
+        for kind, tree in self.trees.items():
+            tree.delete(*tree.get_children())
+            for name, calls, mean, p95, top, rows in report_rows(data[kind]):
+                tree.insert("", tk.END, values=(name, calls, f"{mean:.2f}", f"{p95:.2f}", f"{top:.2f}", rows))
+
+    def on_export(self):
+        import json
+        from tkinter import filedialog, messagebox
+
+        dest = filedialog.asksaveasfilename(
+            parent=self,
+            title="Export diagnostics",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("All files", "*.*")],
+            initialfile="timetracker_stats.json",
+        )
+        if not dest:
+            return
+        try:
+            Path(dest).write_text(json.dumps(self._data(), indent=1), encoding="utf-8")
+        except OSError as ex:
+            messagebox.showerror("Export failed", str(ex), parent=self)
+
+
+class EditDialog(tk.Toplevel):
+    def __init__(self, master: tk.Tk, call, row: sqlite3.Row, registry: ProjectRegistry, on_saved):
+        super().__init__(master)
+        self.title("Edit Entry")
+        self.resizable(False, False)
+        self.call = call  # TimeTrackerApp._call: runs store operations off the Tk thread
+        self.entry_id = int(row["id"])
+        self.on_saved = on_saved
+
+        self.vars = {
+            "project": tk.StringVar(),
+            "task": tk.StringVar(),
+            "notes": tk.StringVar(),
+            "start": tk.StringVar(),
+            "end": tk.StringVar(),
+            "duration": tk.StringVar(),
+        }
+
+        self.vars["project"].set(row["project"])
+        self.vars["task"].set(row["task"])
+        self.vars["notes"].set(row["notes"] or "")
+        self.vars["start"].set(row["start_ts"])
+        self.vars["end"].set(row["end_ts"] or "")
+        self.vars["duration"].set(pretty_duration(int(row["duration_s"] or 0)))
+
+        frm = ttk.Frame(self, padding=10)
+        frm.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frm, text="Project").grid(row=0, column=0, sticky=tk.W, padx=6, pady=6)
+        self.project_cb = ttk.Combobox(frm, textvariable=self.vars["project"], values=registry.names())
+        self.project_cb.grid(row=0, column=1, sticky=tk.EW, padx=6, pady=6)
+        attach_autocomplete(self.project_cb, lambda: registry)
+
+        ttk.Label(frm, text="Task").grid(row=1, column=0, sticky=tk.W, padx=6, pady=6)
+        ttk.Entry(frm, textvariable=self.vars["task"]).grid(row=1, column=1, sticky=tk.EW, padx=6, pady=6)
+
+        ttk.Label(frm, text="Notes").grid(row=2, column=0, sticky=tk.W, padx=6, pady=6)
+        ttk.Entry(frm, textvariable=self.vars["notes"]).grid(row=2, column=1, sticky=tk.EW, padx=6, pady=6)
+
+        ttk.Label(frm, text="Start (ISO)").grid(row=3, column=0, sticky=tk.W, padx=6, pady=6)
+        ttk.Entry(frm, textvariable=self.vars["start"]).grid(row=3, column=1, sticky=tk.EW, padx=6, pady=6)
+
+        ttk.Label(frm, text="End (ISO or empty)").grid(row=4, column=0, sticky=tk.W, padx=6, pady=6)
+        ttk.Entry(frm, textvariable=self.vars["end"]).grid(row=4, column=1, sticky=tk.EW, padx=6, pady=6)
+
+        self.error_lbl = ttk.Label(frm, text="", foreground="red")
+        self.error_lbl.grid(row=5, column=0, columnspan=2, sticky=tk.W, padx=6)
+
+        btns = ttk.Frame(frm)
+        btns.grid(row=6, column=0, columnspan=2, sticky=tk.E, pady=(8, 0))
+        self.save_btn = ttk.Button(btns, text="Save", command=self.on_save)
+        self.save_btn.pack(side=tk.RIGHT, padx=4)
+        ttk.Button(btns, text="Cancel", command=self.destroy).pack(side=tk.RIGHT, padx=4)
+
+        frm.columnconfigure(1, weight=1)
+
+    def on_save(self):
+        proj = self.vars["project"].get().strip()
+        task = self.vars["task"].get().strip() or "(untitled)"
+        notes = self.vars["notes"].get().strip()
+        start_txt = self.vars["start"].get().strip()
+        end_txt = self.vars["end"].get().strip()
+        try:
+            # basic validation
+            start_epoch, _ = iso_to_epoch(start_txt)
+            end_iso = end_epoch = None
+            if end_txt:
+                end_epoch, _ = iso_to_epoch(end_txt)
+                end_iso = end_txt
+        except Exception as ex:
+            self.error_lbl.configure(text=str(ex))
+            return
+
+        def saved(_):
+            self.on_saved()
+            self.destroy()
+
+        def failed(ex: BaseException):
+            self.save_btn.configure(state=tk.NORMAL)
+            self.error_lbl.configure(text=str(ex))
+
+        def save(overlapping: List[sqlite3.Row]):
+            if overlapping and not self._confirm_overlap(overlapping):
+                self.save_btn.configure(state=tk.NORMAL)
+                return
+            self.call(lambda s: s.update_entry(entry_id, proj, task, notes, start_txt, end_iso), saved, on_error=failed)
+
+        self.save_btn.configure(state=tk.DISABLED)
+        entry_id = self.entry_id
+        self.call(lambda s: s.overlapping(start_epoch, end_epoch, exclude=entry_id), save, on_error=failed)
+
+    def _confirm_overlap(self, rows: List[sqlite3.Row]) -> bool:
+        from tkinter import messagebox
+
+        shown = [
+            f"• {r['project']} — {r['task']}  {r['start_ts'].replace('T', ' ')[:16]}–"
+            + (r["end_ts"].replace("T", " ")[:16] if r["end_ts"] else "now")
+            for r in rows[:5]
+        ]
+        if len(rows) > 5:
+            shown.append(f"… and {len(rows) - 5} more")
+        return messagebox.askyesno(
+            "Overlapping entries", "This entry overlaps:\n" + "\n".join(shown) + "\n\nSave anyway?", parent=self
+        )
+
+
+class BulkEditDialog(tk.Toplevel):
+    """Edit several entries at once: fields left empty keep each entry's own value."""
+
+    def __init__(self, master: tk.Tk, call, entry_ids: List[int], registry: ProjectRegistry, on_saved):
+        super().__init__(master)
+        self.title(f"Edit {len(entry_ids)} Entries")
+        self.resizable(False, False)
+        self.call = call
+        self.entry_ids = list(entry_ids)
+        self.on_saved = on_saved
+
+        self.vars = {"project": tk.StringVar(), "task": tk.StringVar(), "shift": tk.StringVar()}
+
+        frm = ttk.Frame(self, padding=10)
+        frm.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frm, text="Move to project").grid(row=0, column=0, sticky=tk.W, padx=6, pady=6)
+        self.project_cb = ttk.Combobox(frm, textvariable=self.vars["project"], values=registry.names())
+        self.project_cb.grid(row=0, column=1, sticky=tk.EW, padx=6, pady=6)
+        attach_autocomplete(self.project_cb, lambda: registry)
+
+        ttk.Label(frm, text="Rename task to").grid(row=1, column=0, sticky=tk.W, padx=6, pady=6)
+        ttk.Entry(frm, textvariable=self.vars["task"]).grid(row=1, column=1, sticky=tk.EW, padx=6, pady=6)
+
+        ttk.Label(frm, text="Shift times by (±H:MM)").grid(row=2, column=0, sticky=tk.W, padx=6, pady=6)
+        ttk.Entry(frm, textvariable=self.vars["shift"]).grid(row=2, column=1, sticky=tk.EW, padx=6, pady=6)
+
+        ttk.Label(frm, text="Empty fields are left as they are.").grid(row=3, column=0, columnspan=2, sticky=tk.W, padx=6)
+        self.error_lbl = ttk.Label(frm, text="", foreground="red")
+        self.error_lbl.grid(row=4, column=0, columnspan=2, sticky=tk.W, padx=6)
+
+        btns = ttk.Frame(frm)
+        btns.grid(row=5, column=0, columnspan=2, sticky=tk.E, pady=(8, 0))
+        self.save_btn = ttk.Button(btns, text="Save", command=self.on_save)
+        self.save_btn.pack(side=tk.RIGHT, padx=4)
+        ttk.Button(btns, text="Cancel", command=self.destroy).pack(side=tk.RIGHT, padx=4)
+
+        frm.columnconfigure(1, weight=1)
+
+    def on_save(self):
+        proj = self.vars["project"].get().strip() or None
+        task = self.vars["task"].get().strip() or None
+        shift_txt = self.vars["shift"].get().strip()
+        shift = 0
+        if shift_txt:
+            sign = -1 if shift_txt[0] == "-" else 1
+            secs = parse_hhmm(shift_txt.lstrip("+-"))
+            if secs is None:
+                self.error_lbl.configure(text="Shift must look like 1:30 or -0:15")
+                return
+            shift = sign * secs
+        if proj is None and task is None and not shift:
+            self.destroy()
+            return
+
+        def saved(_):
+            self.on_saved()
+            self.destroy()
+
+        def failed(ex: BaseException):
+            self.save_btn.configure(state=tk.NORMAL)
+            self.error_lbl.configure(text=str(ex))
+
+        self.save_btn.configure(state=tk.DISABLED)
+        ids = self.entry_ids
+        self.call(lambda s: s.update_entries(ids, proj, task, shift), saved, on_error=failed)
+
+
+# ----------------------------
+# Entry point
+# ----------------------------
+
+STARTUP_PROBE_ENV = "TIMETRACKER_STARTUP_PROBE"
+
+
+def _probe_startup(root: tk.Tk, app: TimeTrackerApp, dest: Path, marks: List[Tuple[str, float]]) -> None:
+    """Append startup timestamps to `dest` once the first data has arrived, then close (bench.py gui-startup)."""
+
+    def check():
+        if app._pending:
+            root.after(5, check)
+            return
+        marks.append(("loaded", time.time()))
+        with dest.open("a", encoding="utf-8") as fh:
+            fh.write(" ".join(f"{name}={t:.6f}" for name, t in marks) + "\n")
+        root.destroy()
+
+    root.after(5, check)
+
+
+def run(db_path: Path, recorder: Optional[Recorder] = None) -> None:
+    probe = os.environ.get(STARTUP_PROBE_ENV)  # file to append startup timings to
+    marks = [("run", time.time())]
+    db = AsyncStore(db_path, recorder)
+
+    root = tk.Tk()
+    # platform‑aware ttk styling
+    try:
+        from tkinter import font as tkfont
+        default_font = tkfont.nametofont("TkDefaultFont")
+        default_font.configure(size=10)
+    except Exception:
+        pass
+
+    style = ttk.Style()
+    # Use 'clam' for better cross‑platform look
+    try:
+        style.theme_use('clam')
+    except Exception:
+        pass
+
+    app = TimeTrackerApp(root, db)
+    app.pack(fill=tk.BOTH, expand=True)
+    # Paint the empty window first and only then ask for data: the worker opens
+    # (and if needed migrates) the database meanwhile, and results fill in as
+    # they arrive instead of keeping the window from appearing.
+    root.update()
+    marks.append(("paint", time.time()))
+    app.load()
+    if probe:
+        _probe_startup(root, app, Path(probe), marks)
+
+    def on_close():
+        # ensure running entry is left as is; do not auto‑stop
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    root.mainloop()
+    # also reached via File → Exit, which destroys the root directly
+    db.close()
+    if recorder is not None:
+        recorder.save()
@@ -1,5 +1,15 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+# The one-file executable unpacks everything it carries on each start, so it
+# carries only what the app imports. NumPy is optional (batch.py falls back to
+# plain Python) and left out; the rest are stdlib modules nothing here uses.
+EXCLUDES = [
+    'numpy',
+    'unittest', 'doctest', 'pydoc', 'pydoc_data', 'pdb', 'test', 'lib2to3', 'idlelib',
+    'turtle', 'turtledemo', 'tkinter.tix', 'tkinter.dnd', 'curses',
+    'xml', 'xmlrpc', 'ftplib', 'imaplib', 'poplib', 'smtplib', 'mailbox', 'http.server',
+    'multiprocessing', 'ssl', '_pydecimal', 'distutils', 'setuptools', 'pip',
+]
 
 a = Analysis(
     ['main.py'],
@@ -10,9 +20,9 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUDES,
     noarchive=False,
-    optimize=0,
+    optimize=2,  # drop asserts and docstrings: nothing at runtime reads them
 )
 pyz = PYZ(a.pure)
 
@@ -26,7 +36,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,  # UPX-packed libraries are unpacked again on every start
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
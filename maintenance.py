@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Database maintenance while the app is idle
+==========================================
+
+``python main.py maintain`` runs every due step now. The GUI runs them one
+step at a time, and only while nothing is being tracked and the window has
+had no key press or click for IDLE_AFTER seconds. The steps are:
+
+- ``convert``: once per database, switch to ``auto_vacuum=INCREMENTAL``.
+  This takes one full VACUUM; databases created since then start out that
+  way.
+- ``analyze``: at most once per ANALYZE_INTERVAL, refresh the planner
+  statistics. The first time this is an ANALYZE; later it is
+  ``PRAGMA optimize``, which only analyzes what changed enough to matter.
+  Both are sampled (ANALYSIS_LIMIT rows per index), so they take
+  milliseconds on any history.
+- ``vacuum``: while the free list holds VACUUM_MIN_FREE pages or more,
+  return up to VACUUM_PAGES of them to the file system.
+
+The steps run on the Store's own connection: PRAGMA optimize looks at the
+queries that connection has run. In the GUI that is the database thread,
+so a step waits its turn behind the app's queries and never holds up the
+window. Every step appends its duration and the space it freed to
+``maintenance.log`` in the user data folder.
+"""
+from __future__ import annotations
+
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from tracker import Store, user_data_dir
+
+LOG_NAME = "maintenance.log"
+IDLE_AFTER = 120  # seconds without input before the GUI counts as idle
+ANALYZE_INTERVAL = 7 * 24 * 3600  # seconds between statistics refreshes
+ANALYSIS_LIMIT = 1000  # rows sampled per index by ANALYZE / PRAGMA optimize
+VACUUM_MIN_FREE = 256  # free pages (1 MiB at the default page size) before vacuuming
+VACUUM_PAGES = 256  # pages released per step
+RECHECK_INTERVAL = 600  # seconds the GUI waits once nothing is due
+
+INCREMENTAL = 2  # PRAGMA auto_vacuum value
+# partial indexes that hold the running entry: at most one row, usually none
+RUNNING_INDEXES = ("idx_entries_open", "idx_entries_one_running")
+ANALYZED_KEY = "maintenance_analyzed"  # meta: epoch of the last statistics refresh
+
+
+class StepResult(NamedTuple):
+    step: str
+    seconds: float
+    reclaimed: int  # bytes freed in the database file
+
+
+def log_path() -> Path:
+    return user_data_dir() / LOG_NAME
+
+
+def _free_pages(store: Store) -> int:
+    return store.conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+
+
+def next_step(store: Store, now: Optional[float] = None) -> Optional[str]:
+    """The maintenance step due for `store`, or None."""
+    if store.readonly:
+        return None
+    if store.conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] != INCREMENTAL:
+        return "convert"
+    now = time.time() if now is None else now
+    if now - float(store.get_meta(ANALYZED_KEY, 0)) >= ANALYZE_INTERVAL:
+        return "analyze"
+    if _free_pages(store) >= VACUUM_MIN_FREE:
+        return "vacuum"
+    return None
+
+
+def run_step(store: Store, step: str, log: Optional[Path] = None) -> StepResult:
+    """Run one maintenance `step` (see next_step) and append it to the log."""
+    conn = store.conn
+    page_size = conn.execute("PRAGMA main.page_size").fetchone()[0]
+    free_before = _free_pages(store)
+    pages_before = conn.execute("PRAGMA main.page_count").fetchone()[0]
+    started = time.perf_counter()
+    if step == "convert":
+        conn.execute("PRAGMA main.auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM main")  # the new setting only applies to a rebuilt file
+    elif step == "analyze":
+        conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+        has_stats = conn.execute("SELECT 1 FROM main.sqlite_master WHERE name='sqlite_stat1'").fetchone()
+        conn.execute("PRAGMA main.optimize" if has_stats else "ANALYZE main.entries")
+        _pin_running_indexes(store)
+        store.set_meta(ANALYZED_KEY, int(time.time()))
+    elif step == "vacuum":
+        # frees one page per sqlite3_step(); execute() stops after the first one
+        # (the pragma returns no columns), executescript() steps it to the end
+        conn.executescript(f"PRAGMA main.incremental_vacuum({VACUUM_PAGES})")
+    else:
+        raise ValueError(f"Unknown maintenance step: {step}")
+    if step in ("convert", "vacuum"):
+        # in WAL mode the file only shrinks once a checkpoint has copied the changed pages back
+        conn.execute("PRAGMA main.wal_checkpoint(TRUNCATE)")
+    seconds = time.perf_counter() - started
+    if step == "vacuum":
+        reclaimed = (free_before - _free_pages(store)) * page_size
+    else:
+        reclaimed = max(pages_before - conn.execute("PRAGMA main.page_count").fetchone()[0], 0) * page_size
+    result = StepResult(step, seconds, reclaimed)
+    _log(log or log_path(), result)
+    return result
+
+
+def _pin_running_indexes(store: Store) -> None:
+    """Give the running-entry indexes statistics even when they were analyzed empty.
+
+    Maintenance runs while nothing is tracked, and ANALYZE writes no row for
+    an empty index. The planner then takes it for as large as the table and
+    looks for the running entry by project instead: hundreds of ms per
+    start/stop on a large history rather than one index probe.
+    """
+    with store.transaction() as cur:
+        for name in RUNNING_INDEXES:
+            if not cur.execute("SELECT 1 FROM main.sqlite_stat1 WHERE idx=?", (name,)).fetchone():
+                cur.execute("INSERT INTO main.sqlite_stat1(tbl, idx, stat) VALUES('entries', ?, '1 1')", (name,))
+    store.conn.execute("ANALYZE main.sqlite_schema")  # reload the statistics
+
+
+def run_all(store: Store, log: Optional[Path] = None) -> List[StepResult]:
+    """Run every due step until none is left (``python main.py maintain``)."""
+    results = []
+    while True:
+        step = next_step(store)
+        if step is None:
+            return results
+        results.append(run_step(store, step, log))
+
+
+def _log(path: Path, result: StepResult) -> None:
+    line = (
+        f"{datetime.now().isoformat(timespec='seconds')}\t{result.step}\t"
+        f"{result.seconds * 1000:.1f} ms\t{result.reclaimed / 1024:.0f} KiB reclaimed\n"
+    )
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as fh:
+            fh.write(line)
+    except OSError:
+        pass  # a missing log line is no reason to fail the step
+
+
+class MaintenanceScheduler:
+    """Decide when the GUI runs the next maintenance step.
+
+    The GUI asks due() from its 1 s tick and, if so, runs step() on its
+    database thread; `in_flight` is set meanwhile. Once nothing is due it
+    waits RECHECK_INTERVAL before looking again. The last error, if any,
+    is kept in `error`.
+    """
+
+    def __init__(self, log: Optional[Path] = None, idle_after: float = IDLE_AFTER):
+        self.log = log or log_path()
+        self.idle_after = idle_after
+        self.in_flight = False
+        self.error: Optional[BaseException] = None
+        self._next_check = 0.0  # time.monotonic() before which nothing is looked at
+
+    def due(self, idle_for: float) -> bool:
+        """True if a step may run now, `idle_for` seconds after the last input."""
+        return not self.in_flight and idle_for >= self.idle_after and time.monotonic() >= self._next_check
+
+    def step(self, store: Store) -> Optional[StepResult]:
+        """Run the next due step, if any. Call on the store's thread."""
+        try:
+            step = next_step(store)
+            if step is not None:
+                self.error = None
+                return run_step(store, step, self.log)
+        except sqlite3.Error as ex:  # e.g. locked by another instance: try again later
+            self.error = ex
+            print(f"jattrack: maintenance failed: {ex}", file=sys.stderr)
+        self._next_check = time.monotonic() + RECHECK_INTERVAL
+        return None
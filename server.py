@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local JSON/HTTP API for editor plugins, status bars and scripts
+===============================================================
+
+Start it with ``python main.py serve [--host H] [--port P] [--readers N]``.
+
+Endpoints (all responses are JSON)
+----------------------------------
+GET  /status                  running entry and today's total
+GET  /today                   today's totals per project
+GET  /entries                 ?from=D&to=D&project=P&q=TEXT&limit=N&after=CURSOR
+GET  /summary                 ?from=D&to=D&by=project|day|week|month
+POST /start                   {"project": "...", "task": "...", "notes": "..."}
+POST /stop
+
+Reads run on a small pool of read-only connections, writes on a single
+writer thread. ``/status`` and ``/today`` are answered from a cached
+snapshot that is dropped on every write made here and, within
+WATCH_INTERVAL seconds, on writes from other processes (GUI, CLI, sync).
+
+The server binds to localhost by default and only answers requests whose
+Host header names this machine as localhost, 127.0.0.1 or [::1], so a web
+page cannot reach it through DNS rebinding (a name of its own that resolves
+to 127.0.0.1). POST bodies must be sent as ``application/json``, which a web
+page cannot do cross-origin without a CORS preflight that this server never
+approves.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from urllib.parse import parse_qs, urlsplit
+
+from tracker import API_PORT, DaySnapshot, Store
+
+if TYPE_CHECKING:
+    from diagnostics import Recorder
+
+T = TypeVar("T")
+
+WATCH_INTERVAL = 0.5  # seconds between PRAGMA data_version polls for external writes
+MAX_BODY = 64 * 1024
+MAX_LIMIT = 1000
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "[::1]")
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 415: "Unsupported Media Type",
+           500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class StorePool:
+    """One writer Store on a dedicated thread plus `readers` read-only Stores.
+
+    Each read borrows a reader for the duration of one job, so a reader's
+    connection is only ever used by one thread at a time.
+    """
+
+    def __init__(self, path: Path, readers: int = 4, recorder: Optional[Recorder] = None):
+        self.path = path
+        self.size = readers
+        self.recorder = recorder
+        self._write_exec = ThreadPoolExecutor(1, thread_name_prefix="jattrack-writer")
+        self._read_exec = ThreadPoolExecutor(readers, thread_name_prefix="jattrack-reader")
+        self._idle: "asyncio.Queue[Store]" = asyncio.Queue()
+        self.writer: Optional[Store] = None
+
+    def _open(self, readonly: bool) -> Store:
+        store = Store(self.path, readonly=readonly)
+        if self.recorder is not None:
+            self.recorder.instrument_store(store)
+        return store
+
+    async def open(self) -> None:
+        loop = asyncio.get_running_loop()
+        # the writer creates and migrates the database before any reader opens it
+        self.writer = await loop.run_in_executor(self._write_exec, self._open, False)
+        for _ in range(self.size):
+            self._idle.put_nowait(await loop.run_in_executor(self._read_exec, self._open, True))
+
+    async def read(self, fn: Callable[[Store], T]) -> T:
+        store = await self._idle.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._read_exec, self._run_read, store, fn)
+        finally:
+            self._idle.put_nowait(store)
+
+    @staticmethod
+    def _run_read(store: Store, fn: Callable[[Store], T]) -> T:
+        store.poll_changes()  # drop the reader's caches if anyone wrote since its last job
+        return fn(store)
+
+    async def write(self, fn: Callable[[Store], T]) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._write_exec, fn, self.writer)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self._write_exec.submit(self.writer.conn.close).result()
+        self._write_exec.shutdown()
+        while not self._idle.empty():
+            self._idle.get_nowait().conn.close()
+        self._read_exec.shutdown()
+
+
+def _entry_json(r) -> Dict[str, Any]:
+    return {
+        "id": r["id"], "project": r["project"], "task": r["task"], "notes": r["notes"] or "",
+        "start": r["start_ts"], "end": r["end_ts"], "duration_s": int(r["duration_s"] or 0),
+    }
+
+
+def _status_json(snap: DaySnapshot, now: datetime) -> Dict[str, Any]:
+    running = None
+    if snap.running_id is not None:
+        running = {
+            "id": snap.running_id, "project": snap.running_project, "task": snap.running_task,
+            "start": snap.running_start.isoformat(), "elapsed_s": snap.elapsed(now),
+        }
+    return {"running": running, "today_s": snap.total(now)}
+
+
+def _arg(query: Dict[str, list], name: str, default: Optional[str] = None) -> Optional[str]:
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def _date_arg(query: Dict[str, list], name: str, default: date) -> date:
+    value = _arg(query, name)
+    try:
+        return date.fromisoformat(value) if value else default
+    except ValueError:
+        raise HttpError(400, f"invalid {name!r} date {value!r}, expected YYYY-MM-DD")
+
+
+def _is_local_host(value: str) -> bool:
+    """True for a Host header of localhost, 127.0.0.1 or [::1], with or without a port."""
+    host = value.lower()
+    name, colon, port = host.rpartition(":")
+    if colon and port.isdigit():
+        host = name
+    return host in LOCAL_HOSTS
+
+
+class ApiServer:
+    def __init__(self, pool: StorePool):
+        self.pool = pool
+        self.routes: Dict[Tuple[str, str], Callable[..., Awaitable[Tuple[int, Any]]]] = {
+            ("GET", "/status"): self.get_status,
+            ("GET", "/today"): self.get_today,
+            ("GET", "/entries"): self.get_entries,
+            ("GET", "/summary"): self.get_summary,
+            ("POST", "/start"): self.post_start,
+            ("POST", "/stop"): self.post_stop,
+        }
+        # cached today snapshot; the generation discards loads that raced a write
+        self._snapshot: Optional[DaySnapshot] = None
+        self._generation = 0
+        self._loading: Optional["asyncio.Future[None]"] = None
+
+    # --- status cache ---
+    def invalidate(self) -> None:
+        self._snapshot = None
+        self._generation += 1
+
+    async def snapshot(self) -> DaySnapshot:
+        snap = self._snapshot
+        if snap is not None and snap.day == date.today():
+            return snap
+        # one load serves every request that arrives while it runs
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load_snapshot())
+        await asyncio.shield(self._loading)
+        return self._snapshot or await self.snapshot()
+
+    async def _load_snapshot(self) -> None:
+        try:
+            while True:
+                generation = self._generation
+                snap = await self.pool.read(lambda s: s.today_snapshot())
+                if generation == self._generation:
+                    self._snapshot = snap
+                    return
+        finally:
+            self._loading = None
+
+    async def watch(self) -> None:
+        """Invalidate the cache when another process writes (one PRAGMA per poll)."""
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            if await self.pool.write(lambda s: s.poll_changes()):
+                self.invalidate()
+
+    # --- endpoints ---
+    async def get_status(self, query, body) -> Tuple[int, Any]:
+        return 200, _status_json(await self.snapshot(), datetime.now())
+
+    async def get_today(self, query, body) -> Tuple[int, Any]:
+        today = date.today()
+        rows = await self.pool.read(lambda s: s.summary(today, today, "project"))
+        return 200, {"date": today.isoformat(), "total_s": sum(s for _, s in rows),
+                     "projects": [{"project": k, "seconds": s} for k, s in rows]}
+
+    async def get_entries(self, query, body) -> Tuple[int, Any]:
+        today = date.today()
+        start = _date_arg(query, "from", today.replace(day=1))
+        end = _date_arg(query, "to", today)
+        project = _arg(query, "project")
+        text = (_arg(query, "q") or "").strip()
+        after = _arg(query, "after")
+        offset, keyset, window = 0, None, None
+        try:
+            limit = max(1, min(MAX_LIMIT, int(_arg(query, "limit", "200"))))
+            # cursor: "EPOCH:ID" for plain listings; for searches a row offset
+            # and the ranked window, "OFFSET:LO:HI" (see Store.search_window)
+            if text and after:
+                offset, *bounds = (int(part) for part in after.split(":"))
+                if bounds:
+                    lo, hi = bounds
+                    window = (lo, hi)
+            elif after:
+                epoch, _, entry_id = after.partition(":")
+                keyset = (int(epoch), int(entry_id))
+        except ValueError:
+            raise HttpError(400, "invalid 'limit' or 'after'")
+        if text:
+            def search(s: Store) -> Tuple[Optional[Tuple[int, int]], List[Any]]:
+                # the first page fixes the window; later pages rank the same matches
+                w = window or s.search_window(text, start, end, project)
+                return w, s.search(text, start, end, project, limit=limit, offset=offset, window=w)
+
+            window, rows = await self.pool.read(search)
+            cursor = ":".join(str(n) for n in (offset + len(rows), *(window or ())))
+        else:
+            rows = await self.pool.read(lambda s: s.query_page(start, end, project, after=keyset, limit=limit))
+            cursor = f"{rows[-1]['start_epoch']}:{rows[-1]['id']}" if rows else None
+        return 200, {"entries": [_entry_json(r) for r in rows], "next": cursor if len(rows) == limit else None}
+
+    async def get_summary(self, query, body) -> Tuple[int, Any]:
+        today = date.today()
+        start = _date_arg(query, "from", today.replace(day=1))
+        end = _date_arg(query, "to", today)
+        by = _arg(query, "by", "project")
+        if by not in ("project", "day", "week", "month"):
+            raise HttpError(400, f"invalid 'by' {by!r}")
+        rows = await self.pool.read(lambda s: s.summary(start, end, by))
+        return 200, {"by": by, "total_s": sum(s for _, s in rows), "rows": [{"key": k, "seconds": s} for k, s in rows]}
+
+    async def post_start(self, query, body) -> Tuple[int, Any]:
+        project = str(body.get("project") or "").strip()
+        if not project:
+            raise HttpError(400, "'project' is required")
+        task = str(body.get("task") or "(untitled)")
+        notes = str(body.get("notes") or "")
+        try:
+            await self.pool.write(lambda s: s.start_entry(project, task, notes))
+        finally:
+            self.invalidate()
+        return 201, _status_json(await self.snapshot(), datetime.now())
+
+    async def post_stop(self, query, body) -> Tuple[int, Any]:
+        def stop(s: Store) -> bool:
+            running = s.get_running_entry()
+            if running is None:
+                return False
+            s.stop_entry(int(running["id"]))
+            return True
+
+        try:
+            stopped = await self.pool.write(stop)
+        finally:
+            self.invalidate()
+        if not stopped:
+            raise HttpError(409, "not running")
+        return 200, _status_json(await self.snapshot(), datetime.now())
+
+    # --- HTTP ---
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str], raw: bytes) -> Tuple[int, Any]:
+        if not _is_local_host(headers.get("host", "")):
+            raise HttpError(403, "Host must be localhost, 127.0.0.1 or [::1]")
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                raise HttpError(405, f"{method} not allowed on {url.path}")
+            raise HttpError(404, f"no such endpoint {url.path}")
+        body: Dict[str, Any] = {}
+        if method == "POST":
+            if headers.get("content-type", "").split(";")[0].strip() != "application/json":
+                raise HttpError(415, "POST bodies must be application/json")
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError:
+                raise HttpError(400, "body is not valid JSON")
+            if not isinstance(body, dict):
+                raise HttpError(400, "body must be a JSON object")
+        try:
+            return await handler(parse_qs(url.query), body)
+        except ValueError as ex:  # Store validation, e.g. an empty project name
+            raise HttpError(400, str(ex))
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection, keeping it open between them."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "request body too large"}
+                    keep_alive = False
+                else:
+                    raw = await reader.readexactly(length) if length else b""
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    try:
+                        status, payload = await self.dispatch(method, target, headers, raw)
+                    except HttpError as ex:
+                        status, payload = ex.status, {"error": str(ex)}
+                    except Exception as ex:  # keep serving; the client gets a 500
+                        print(f"jattrack serve: {method} {target}: {ex!r}", file=sys.stderr)
+                        status, payload = 500, {"error": "internal error"}
+                data = json.dumps(payload).encode()
+                head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n")
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode("latin-1") + b"\r\n" + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # malformed request or client went away
+        finally:
+            writer.close()
+
+
+async def _serve(db_path: Path, host: str, port: int, readers: int, recorder: Optional[Recorder]) -> None:
+    pool = StorePool(db_path, readers, recorder)
+    await pool.open()
+    api = ApiServer(pool)
+    server = await asyncio.start_server(api.handle, host, port)
+    watcher = asyncio.ensure_future(api.watch())
+    for sock in server.sockets:
+        addr = sock.getsockname()
+        print(f"Serving {db_path} on http://{addr[0]}:{addr[1]}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+        pool.close()
+
+
+def serve(db_path: Path, host: str = "127.0.0.1", port: int = API_PORT, readers: int = 4,
+          recorder: Optional[Recorder] = None) -> None:
+    """Run the API server until interrupted (Ctrl+C)."""
+    try:
+        asyncio.run(_serve(db_path, host, port, readers, recorder))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if recorder is not None:
+            recorder.save()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sync between devices through a shared folder
+============================================
+
+``python main.py sync FOLDER`` on each machine, with FOLDER shared between
+them (a network drive, a Dropbox or Syncthing folder, a USB stick carried
+around). Each database appends the changes it made itself to
+``<device id>.changes.jsonl`` in the folder and reads the other devices'
+files from where it stopped last time, so a sync moves only what changed
+since the previous one. Both offsets are kept in the database (the meta
+table) per folder.
+
+Every file has a single writer, so the folder never sees write conflicts;
+conflicting edits of one entry are resolved by Store.apply_records. A
+database file copied to another machine keeps its device id: move data to
+a new machine with sync (or export-changes) instead of copying the file.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Tuple
+
+from tracker import Store
+
+SYNC_SUFFIX = ".changes.jsonl"
+
+
+def sync_folder(store: Store, folder: Path) -> Tuple[int, int, int]:
+    """Apply the other devices' new changes from `folder` and send this device's.
+
+    Returns (sent, applied, ignored).
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    key = str(folder.resolve())
+    own = folder / f"{store.device_id}{SYNC_SUFFIX}"
+
+    applied = ignored = 0
+    for path in sorted(folder.glob(f"*{SYNC_SUFFIX}")):
+        if path == own:
+            continue
+        read_key = f"sync_read:{key}:{path.name}"
+        offset = int(store.get_meta(read_key, 0))
+        with path.open("rb") as f:
+            if f.seek(0, 2) < offset:
+                offset = 0  # replaced or truncated: reading it all again is harmless
+            f.seek(offset)
+            data = f.read()
+        # a line still being written (or synced) is left for next time
+        complete = data[:data.rfind(b"\n") + 1]
+        if not complete:
+            continue
+        lines = complete.decode("utf-8").splitlines()
+        with store.transaction():
+            a, i = store.apply_records(json.loads(line) for line in lines if line.strip())
+            store.set_meta(read_key, offset + len(complete))
+        applied += a
+        ignored += i
+
+    # after applying, so that what just arrived is already behind the pointer
+    sent_key = f"sync_sent:{key}"
+    last, records = store.changes_since(int(store.get_meta(sent_key, 0)), own_only=True)
+    if records:
+        with own.open("a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    store.set_meta(sent_key, last)
+    return len(records), applied, ignored
@@ -0,0 +1,2115 @@
+# -*- coding: utf-8 -*-
+"""
+Store, schema migrations and command line interface of the time tracker
+=======================================================================
+
+Imported by the ``main.py`` launcher, so that ``python main.py`` compiles only
+the launcher and this module comes from its cached bytecode. The GUI
+(gui.py), the API server (server.py) and the optional modules (backup.py,
+maintenance.py, sync.py, diagnostics.py) are imported only by the commands
+that use them.
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import heapq
+import itertools
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, date
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Optional, List, NamedTuple, Tuple, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from batch import EntryBatch
+    from diagnostics import Recorder
+
+# tkinter is deliberately not imported here: the command line interface must
+# start fast, so the GUI (gui.py) is only loaded when it is actually shown.
+
+APP_NAME = "TimeTracker"
+DB_NAME = "timetracker.sqlite3"
+API_PORT = 8765  # `serve` (server.py)
+
+# ----------------------------
+# Utility helpers
+# ----------------------------
+
+def user_data_dir() -> Path:
+    """Return a per‑user data directory suitable for the platform."""
+    if sys.platform.startswith("win"):
+        base = os.environ.get("APPDATA") or Path.home() / "AppData" / "Roaming"
+        return Path(base) / APP_NAME
+    else:
+        # Linux and others
+        base = os.environ.get("XDG_DATA_HOME") or (Path.home() / ".local" / "share")
+        return Path(base) / APP_NAME
+
+
+def pretty_duration(seconds: int) -> str:
+    neg = seconds < 0
+    seconds = abs(int(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    sign = "-" if neg else ""
+    return f"{sign}{h:02d}:{m:02d}:{s:02d}"
+
+
+def parse_hhmm(value: str) -> Optional[int]:
+    """Parse HH:MM or H:MM into seconds. Return None if invalid."""
+    try:
+        parts = value.strip().split(":")
+        if len(parts) not in (2, 3):
+            return None
+        h = int(parts[0])
+        m = int(parts[1])
+        s = int(parts[2]) if len(parts) == 3 else 0
+        if not (0 <= m < 60 and 0 <= s < 60):
+            return None
+        return h * 3600 + m * 60 + s
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def day_bounds(day: date) -> Tuple[int, int]:
+    """Return the local calendar day as a half‑open [start, end) epoch range."""
+    start = datetime.combine(day, datetime.min.time())
+    return int(start.timestamp()), int((start + timedelta(days=1)).timestamp())
+
+
+def split_days(start_epoch: int, end_epoch: int) -> Iterator[Tuple[str, int]]:
+    """Yield (ISO day, seconds) for every local calendar day the interval touches."""
+    day = datetime.fromtimestamp(start_epoch).date()
+    while start_epoch < end_epoch:
+        _, day_end = day_bounds(day)
+        seg_end = min(end_epoch, day_end)
+        yield day.isoformat(), seg_end - start_epoch
+        start_epoch = seg_end
+        day += timedelta(days=1)
+
+
+def iso_to_epoch(ts: str) -> Tuple[int, int]:
+    """Parse an ISO timestamp (naive = local time) into (epoch seconds, UTC offset seconds)."""
+    dt = datetime.fromisoformat(ts)
+    epoch = int(dt.timestamp())
+    offset = dt.utcoffset()
+    # localtime() is much cheaper than astimezone(), which matters for bulk imports
+    return epoch, int(offset.total_seconds()) if offset is not None else time.localtime(epoch).tm_gmtoff
+
+
+# ----------------------------
+# Schema migrations
+# ----------------------------
+
+def _migrate_epoch_columns(cur: sqlite3.Cursor) -> None:
+    """v1: integer epoch columns next to the ISO text, backfilled in bulk.
+
+    SQLite's own date functions do the local‑time → UTC conversion, so the
+    backfill is a single UPDATE instead of a Python loop over every row.
+    """
+    cur.execute("ALTER TABLE entries ADD COLUMN start_epoch INTEGER")
+    cur.execute("ALTER TABLE entries ADD COLUMN end_epoch INTEGER")
+    cur.execute("ALTER TABLE entries ADD COLUMN utc_offset INTEGER")  # seconds east of UTC at start
+    cur.execute(
+        """
+        UPDATE entries SET
+            start_epoch = CAST(strftime('%s', start_ts, 'utc') AS INTEGER),
+            end_epoch = CAST(strftime('%s', end_ts, 'utc') AS INTEGER),
+            utc_offset = CAST(strftime('%s', start_ts) AS INTEGER)
+                       - CAST(strftime('%s', start_ts, 'utc') AS INTEGER)
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_start_epoch ON entries(start_epoch)")
+
+
+def _migrate_indexes(cur: sqlite3.Cursor) -> None:
+    """v2: one index per access path used by Store (see bench.py plans)."""
+    # the ISO text is no longer filtered on; the epoch index replaces it
+    cur.execute("DROP INDEX IF EXISTS idx_entries_start")
+    # running entry lookup: only ever contains the (at most few) open entries
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_open ON entries(start_epoch) WHERE end_epoch IS NULL")
+    # history filtered by project
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_project_start ON entries(project_id, start_epoch)")
+    # rebuild_rollup(cur, lo, hi), the recount of a few days: entries that end after lo
+    # (a short range when lo is recent), start < hi checked in the index; finished entries only
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entries_end ON entries(end_epoch, start_epoch) WHERE end_epoch IS NOT NULL"
+    )
+    # sorted project list for the comboboxes (dropped in v11: ProjectRegistry sorts in memory)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_projects_name_nocase ON projects(name COLLATE NOCASE)")
+
+
+def _migrate_daily_rollup(cur: sqlite3.Cursor) -> None:
+    """v3: per-day/per-project totals of finished entries, split at local midnight.
+
+    Kept current by the Store write methods rather than triggers: splitting an
+    interval into days needs a loop, and SQLite does not allow CTEs in triggers.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_rollup(
+            day TEXT NOT NULL,          -- local calendar day, YYYY-MM-DD
+            project_id INTEGER NOT NULL,
+            seconds INTEGER NOT NULL,
+            PRIMARY KEY(day, project_id)
+        ) WITHOUT ROWID
+        """
+    )
+    rebuild_rollup(cur)
+
+
+def rebuild_rollup(cur: sqlite3.Cursor, lo: Optional[int] = None, hi: Optional[int] = None) -> None:
+    """Recompute daily_rollup for the local days covering epochs [lo, hi), or for everything."""
+    if lo is None or hi is None:
+        cur.execute("DELETE FROM daily_rollup")
+        lo, hi = -(2 ** 62), 2 ** 62
+        src = cur.connection.execute(
+            "SELECT id, project_id, start_epoch, end_epoch FROM entries WHERE end_epoch IS NOT NULL"
+        )
+    else:
+        first = datetime.fromtimestamp(lo).date()
+        last = datetime.fromtimestamp(max(lo, hi - 1)).date()
+        lo, _ = day_bounds(first)
+        _, hi = day_bounds(last)
+        cur.execute("DELETE FROM daily_rollup WHERE day BETWEEN ? AND ?", (first.isoformat(), last.isoformat()))
+        src = cur.connection.execute(
+            "SELECT id, project_id, start_epoch, end_epoch FROM entries WHERE end_epoch > ? AND +start_epoch < ?",
+            (lo, hi),
+        )
+    from batch import EntryBatch  # NumPy, when installed, is only loaded here
+
+    totals = EntryBatch.from_rows(src).per_day(lo, hi)
+    cur.executemany(
+        "INSERT INTO daily_rollup(day, project_id, seconds) VALUES(?,?,?)",
+        ((day, pid, seconds) for (day, pid), seconds in totals.items()),
+    )
+
+
+FTS_INSERT_TRIGGER = """
+    CREATE TRIGGER entries_fts_ai AFTER INSERT ON entries BEGIN
+        INSERT INTO entries_fts(rowid, task, notes) VALUES (new.id, new.task, new.notes);
+    END
+"""
+
+
+def _migrate_fts(cur: sqlite3.Cursor) -> None:
+    """v4: FTS5 index over entries.task/notes, kept in sync by triggers.
+
+    Skipped (and searched with LIKE instead) when SQLite lacks FTS5.
+    """
+    try:
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE entries_fts USING fts5(
+                task, notes, content='entries', content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2', prefix='2 3 4'
+            )
+            """
+        )
+    except sqlite3.OperationalError:
+        return
+    cur.execute(FTS_INSERT_TRIGGER)
+    cur.execute(
+        """
+        CREATE TRIGGER entries_fts_ad AFTER DELETE ON entries BEGIN
+            INSERT INTO entries_fts(entries_fts, rowid, task, notes) VALUES ('delete', old.id, old.task, old.notes);
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER entries_fts_au AFTER UPDATE OF task, notes ON entries BEGIN
+            INSERT INTO entries_fts(entries_fts, rowid, task, notes) VALUES ('delete', old.id, old.task, old.notes);
+            INSERT INTO entries_fts(rowid, task, notes) VALUES (new.id, new.task, new.notes);
+        END
+        """
+    )
+    cur.execute("INSERT INTO entries_fts(entries_fts) VALUES ('rebuild')")
+
+
+# tables whose changes other instances are told about, see Store.poll_changes()
+CHANGE_TOPICS = ("entries", "projects")
+
+
+def _migrate_change_counter(cur: sqlite3.Cursor) -> None:
+    """v5: per-table change counters, bumped by triggers on every write from any client."""
+    cur.execute("CREATE TABLE change_counter(topic TEXT PRIMARY KEY, n INTEGER NOT NULL) WITHOUT ROWID")
+    for topic in CHANGE_TOPICS:
+        cur.execute("INSERT INTO change_counter(topic, n) VALUES(?, 0)", (topic,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(
+                f"""
+                CREATE TRIGGER {topic}_changed_{event.lower()} AFTER {event} ON {topic} BEGIN
+                    UPDATE change_counter SET n = n + 1 WHERE topic='{topic}';
+                END
+                """
+            )
+
+
+def _migrate_single_running(cur: sqlite3.Cursor) -> None:
+    """v6: at most one running entry, enforced by a unique partial index.
+
+    Two instances could each start an entry before; all but the newest open
+    entry are closed where the next one started.
+    """
+    open_rows = cur.execute(
+        "SELECT id, start_epoch FROM entries WHERE end_epoch IS NULL ORDER BY start_epoch, id"
+    ).fetchall()
+    for row, newer in zip(open_rows, open_rows[1:]):
+        end_epoch = max(row["start_epoch"], newer["start_epoch"])
+        cur.execute(
+            "UPDATE entries SET end_ts=?, end_epoch=?, duration_s=? - start_epoch WHERE id=?",
+            (datetime.fromtimestamp(end_epoch).isoformat(), end_epoch, end_epoch, row["id"]),
+        )
+    if len(open_rows) > 1:
+        rebuild_rollup(cur, open_rows[0]["start_epoch"], open_rows[-1]["start_epoch"] + 1)
+    # every open entry has the same key, so a second one violates uniqueness
+    cur.execute("CREATE UNIQUE INDEX idx_entries_one_running ON entries((end_epoch IS NULL)) WHERE end_epoch IS NULL")
+
+
+def _migrate_meta(cur: sqlite3.Cursor) -> None:
+    """v7: small key/value table for database-wide settings (see Store.archive)."""
+    cur.execute("CREATE TABLE meta(key TEXT PRIMARY KEY, value) WITHOUT ROWID")
+
+
+# a fresh entries.uid, random so that ids from different devices never collide
+NEW_UID = "lower(hex(randomblob(16)))"
+
+
+def _migrate_change_log(cur: sqlite3.Cursor) -> None:
+    """v8: a global id per entry, an append-only change log and this database's device id (see Store.apply_changes).
+
+    Entries that exist already get an id but no log rows: they are sent in
+    full the first time changes are exported from the beginning.
+    """
+    cur.execute("ALTER TABLE entries ADD COLUMN uid TEXT")
+    cur.execute(f"UPDATE entries SET uid = {NEW_UID}")
+    cur.execute("CREATE UNIQUE INDEX idx_entries_uid ON entries(uid)")
+    # Store passes the uid itself; this covers rows written by other means
+    cur.execute(
+        f"""
+        CREATE TRIGGER entries_uid AFTER INSERT ON entries WHEN new.uid IS NULL BEGIN
+            UPDATE entries SET uid = {NEW_UID} WHERE id = new.id;
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE change_log(
+            seq INTEGER PRIMARY KEY,    -- local order, what export_changes(since) counts in
+            uid TEXT NOT NULL,          -- entries.uid
+            clock INTEGER NOT NULL,     -- hybrid logical clock of the change, ms
+            device TEXT NOT NULL,       -- device id of the database that made it
+            deleted INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cur.execute("CREATE INDEX idx_change_log_uid ON change_log(uid, seq)")
+    cur.execute("CREATE INDEX idx_change_log_clock ON change_log(clock)")
+    cur.execute("INSERT INTO meta(key, value) VALUES('device_id', lower(hex(randomblob(8))))")
+
+
+# Finished entries grouped by the number of decimal digits of their duration:
+# an entry in group d lasts less than 10**d seconds. Queries must spell the
+# expression exactly like this (with the e. alias) for the index to apply.
+SPAN_DIGITS = "length(e.end_epoch - e.start_epoch)"
+# (digits, 10**digits) for every group, as SQL VALUES: up to 10**10 s, three centuries
+SPAN_GROUPS = ", ".join(f"({d}, {10 ** d})" for d in range(1, 11))
+
+
+def _migrate_span_index(cur: sqlite3.Cursor) -> None:
+    """v9: an interval index on the entries' [start, end) for overlap queries (see Store.overlapping).
+
+    Within a duration group (SPAN_DIGITS) an entry that reaches into [a, b)
+    must start after a - 10**d, so every group is one bounded range of
+    start_epoch: ten index seeks, whatever the size of the history.
+    """
+    cur.execute(
+        "CREATE INDEX idx_entries_span ON entries(length(end_epoch - start_epoch), start_epoch) "
+        "WHERE end_epoch IS NOT NULL"
+    )
+
+
+# The v1 backfill, per row: epochs and UTC offset from the local ISO text.
+LEGACY_EPOCHS = """
+    start_epoch = CAST(strftime('%s', start_ts, 'utc') AS INTEGER),
+    end_epoch = CAST(strftime('%s', end_ts, 'utc') AS INTEGER),
+    utc_offset = CAST(strftime('%s', start_ts) AS INTEGER) - CAST(strftime('%s', start_ts, 'utc') AS INTEGER)
+"""
+# A change_log row like Store._log_changes writes, clocked in SQL
+LEGACY_LOG = """
+    INSERT INTO change_log(uid, clock, device, deleted) SELECT {uid},
+        max(CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER),
+            COALESCE((SELECT MAX(clock) FROM change_log), 0) + 1),
+        (SELECT value FROM meta WHERE key='device_id'), {deleted}
+"""
+
+
+def _migrate_legacy_writers(cur: sqlite3.Cursor) -> None:
+    """v10: triggers that do for older builds' writes what Store does itself.
+
+    Builds from before v1 write only the ISO text. For the inserts, deletes
+    and start/end changes they make, the triggers fill in the epoch columns,
+    log the change for sync and queue the days touched in rollup_stale,
+    which Store._repair_rollup recounts (the split into days needs a loop).
+    A Store write is told apart by its epochs (set with the text) and, for
+    deletes, by the change_log row written first. Project, task or notes
+    edits alone look the same from both and stay unlogged.
+    """
+    cur.execute("CREATE TABLE rollup_stale(lo INTEGER NOT NULL, hi INTEGER NOT NULL)")
+    # replaces the v8 uid trigger, so that the uid is set before the change is logged
+    cur.execute("DROP TRIGGER entries_uid")
+    cur.execute(
+        f"""
+        CREATE TRIGGER entries_ai AFTER INSERT ON entries WHEN new.uid IS NULL OR new.start_epoch IS NULL BEGIN
+            UPDATE entries SET uid = COALESCE(uid, {NEW_UID}) WHERE id = new.id;
+            UPDATE entries SET {LEGACY_EPOCHS} WHERE id = new.id AND new.start_epoch IS NULL;
+            {LEGACY_LOG.format(uid="uid", deleted=0)} FROM entries WHERE id = new.id AND new.start_epoch IS NULL;
+            INSERT INTO rollup_stale(lo, hi) SELECT start_epoch, end_epoch FROM entries
+                WHERE id = new.id AND new.start_epoch IS NULL AND end_epoch IS NOT NULL;
+        END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER entries_legacy_au AFTER UPDATE OF start_ts, end_ts ON entries
+        WHEN (new.start_ts IS NOT old.start_ts AND new.start_epoch IS old.start_epoch)
+          OR (new.end_ts IS NOT old.end_ts AND new.end_epoch IS old.end_epoch) BEGIN
+            UPDATE entries SET {LEGACY_EPOCHS} WHERE id = new.id;
+            {LEGACY_LOG.format(uid="new.uid", deleted=0)};
+            INSERT INTO rollup_stale(lo, hi)
+                SELECT min(start_epoch, COALESCE(old.start_epoch, start_epoch)),
+                       max(COALESCE(end_epoch, start_epoch), COALESCE(old.end_epoch, old.start_epoch, start_epoch))
+                FROM entries WHERE id = new.id;
+        END
+        """
+    )
+    # Store logs a delete before making it; archive() moves entries that ended before archived_before
+    cur.execute(
+        f"""
+        CREATE TRIGGER entries_legacy_ad AFTER DELETE ON entries
+        WHEN (SELECT deleted FROM change_log WHERE uid = old.uid ORDER BY seq DESC LIMIT 1) IS NOT 1
+         AND COALESCE(old.end_epoch >= (SELECT value FROM meta WHERE key='archived_before'), 1) BEGIN
+            {LEGACY_LOG.format(uid="old.uid", deleted=1)} WHERE old.uid IS NOT NULL;
+            INSERT INTO rollup_stale(lo, hi) SELECT old.start_epoch, old.end_epoch WHERE old.end_epoch IS NOT NULL;
+        END
+        """
+    )
+    # rows older builds started or stopped since v1
+    cur.execute(
+        "INSERT INTO rollup_stale(lo, hi) "
+        "SELECT CAST(strftime('%s', start_ts, 'utc') AS INTEGER), CAST(strftime('%s', end_ts, 'utc') AS INTEGER) "
+        "FROM entries WHERE end_ts IS NOT NULL AND end_epoch IS NULL"
+    )
+    cur.execute(f"UPDATE entries SET {LEGACY_EPOCHS} WHERE start_epoch IS NULL OR (end_ts IS NOT NULL AND end_epoch IS NULL)")
+
+
+def _migrate_drop_name_index(cur: sqlite3.Cursor) -> None:
+    """v11: drop the v2 project-name index; ProjectRegistry matches and sorts names in memory."""
+    cur.execute("DROP INDEX IF EXISTS idx_projects_name_nocase")
+
+
+# shortest untracked stretch reported by Store.gaps_and_overlaps, in seconds
+MIN_GAP = 15 * 60
+
+
+# Applied in order; PRAGMA user_version records how many have run.
+MIGRATIONS = (
+    _migrate_epoch_columns,
+    _migrate_indexes,
+    _migrate_daily_rollup,
+    _migrate_fts,
+    _migrate_change_counter,
+    _migrate_single_running,
+    _migrate_meta,
+    _migrate_change_log,
+    _migrate_span_index,
+    _migrate_legacy_writers,
+    _migrate_drop_name_index,
+)
+
+
+# ----------------------------
+# Archive partitions
+# ----------------------------
+
+# Store.bulk_import drops these and creates them again at the end, when the
+# import is at least DEFER_INDEXES_ROWS rows and DEFER_INDEXES_SHARE of the
+# entries already there. Its duplicate check reads idx_entries_project_start,
+# so that one stays; the triggers have nothing to do for rows that come with
+# a uid and epochs, apart from one change counter increment.
+DEFERRED_SCHEMA = ("idx_entries_start_epoch", "idx_entries_end", "idx_entries_span", "idx_entries_uid",
+                   "idx_change_log_uid", "entries_changed_insert", "entries_ai")
+DEFER_INDEXES_ROWS = 10_000
+DEFER_INDEXES_SHARE = 0.25
+IMPORT_ROW_BYTES = 100  # about one entry in a CSV export or JSONL history, to guess the row count
+
+# per-year files of archived entries live in this folder next to the database
+ARCHIVE_DIR = "archive"
+
+# archives kept attached between queries (SQLite allows 10 attached databases)
+ARCHIVES_ATTACHED = 4
+
+ENTRY_GONE = "Entry not found: it was deleted, or archived (archived entries are read-only)"
+
+ENTRY_COLUMNS = "id, project_id, task, notes, start_ts, end_ts, duration_s, start_epoch, end_epoch, utc_offset"
+
+
+def _create_archive_schema(cur: sqlite3.Cursor, schema: str) -> None:
+    """The entries table of the main database, minus what only live entries need."""
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.entries(
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL,  -- main.projects
+            task TEXT NOT NULL,
+            notes TEXT,
+            start_ts TEXT NOT NULL,
+            end_ts TEXT,
+            duration_s INTEGER,
+            start_epoch INTEGER,
+            end_epoch INTEGER,
+            utc_offset INTEGER
+        )
+        """
+    )
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_entries_start_epoch ON entries(start_epoch)")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_entries_project_start ON entries(project_id, start_epoch)")
+
+
+# ----------------------------
+# Data layer
+# ----------------------------
+
+class DaySnapshot(NamedTuple):
+    """In‑memory view of one day's totals so the UI can tick without I/O."""
+    day: date
+    finished_s: int  # clamped seconds of all finished entries on `day`
+    running_id: Optional[int] = None
+    running_start: Optional[datetime] = None
+    running_project: str = ""
+    running_task: str = ""
+
+    def elapsed(self, now: datetime) -> int:
+        if self.running_start is None:
+            return 0
+        return int((now - self.running_start).total_seconds())
+
+    def total(self, now: datetime) -> int:
+        total = self.finished_s
+        if self.running_start is not None:
+            start_of_day = datetime.combine(self.day, datetime.min.time())
+            eff_start = max(self.running_start, start_of_day)
+            if now > eff_start:
+                total += int((now - eff_start).total_seconds())
+        return total
+
+
+class ProjectRegistry:
+    """In‑memory name↔id map of all projects with a sorted index for completion.
+
+    Store keeps it current on every committed upsert. Other threads (the GUI)
+    may read it concurrently: updates replace the sorted index in one
+    assignment, so readers always see a consistent snapshot.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, int]] = ()):
+        self._ids: Dict[str, int] = {}
+        self._sorted: Tuple[Tuple[str, str], ...] = ()  # (casefolded name, name), sorted
+        self.reload(rows)
+
+    def reload(self, rows: Iterable[Tuple[str, int]]) -> None:
+        ids = dict(rows)
+        self._ids = ids
+        self._sorted = tuple(sorted((name.casefold(), name) for name in ids))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def id_of(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def add(self, name: str, project_id: int) -> None:
+        if name in self._ids:
+            return
+        self._ids[name] = project_id
+        entries = list(self._sorted)
+        bisect.insort(entries, (name.casefold(), name))
+        self._sorted = tuple(entries)
+
+    def names(self) -> List[str]:
+        return [name for _, name in self._sorted]
+
+    def by_id(self) -> Dict[int, str]:
+        return {project_id: name for name, project_id in self._ids.items()}
+
+    def match(self, text: str, limit: int = 200) -> List[str]:
+        """Names starting with `text` (case-insensitive), then names containing it."""
+        needle = text.strip().casefold()
+        entries = self._sorted
+        if not needle:
+            return [name for _, name in entries[:limit]]
+        # prefix matches are a contiguous run of the sorted index
+        lo = bisect.bisect_left(entries, (needle,))
+        hi = lo
+        while hi < len(entries) and entries[hi][0].startswith(needle) and hi - lo < limit:
+            hi += 1
+        result = [name for _, name in entries[lo:hi]]
+        if len(result) < limit:
+            for i, (folded, name) in enumerate(entries):
+                if needle in folded and not lo <= i < hi:
+                    result.append(name)
+                    if len(result) >= limit:
+                        break
+        return result
+
+
+def _read_import_records(src: Path, fmt: str) -> Iterator[Tuple[str, str, str, str, str]]:
+    """Yield (project, task, notes, start_ts, end_ts) from a CSV export or JSONL file."""
+    if fmt == "jsonl":
+        import json
+
+        with src.open(encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                yield (
+                    str(obj.get("project") or ""),
+                    str(obj.get("task") or ""),
+                    str(obj.get("notes") or ""),
+                    str(obj.get("start") or obj.get("start_ts") or ""),
+                    str(obj.get("end") or obj.get("end_ts") or ""),
+                )
+    elif fmt == "csv":
+        import csv
+
+        with src.open(newline="", encoding="utf-8") as f:
+            # same header as export_csv; ID and Duration are recomputed on import
+            reader = csv.DictReader(f)
+            missing = {"Project", "Task", "Notes", "Start", "End"} - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"{src.name}: missing CSV columns {', '.join(sorted(missing))}")
+            for row in reader:
+                yield row["Project"], row["Task"], row["Notes"] or "", row["Start"], row["End"] or ""
+    else:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+
+class Store:
+    def __init__(self, path: Path, readonly: bool = False):
+        """Open (and create or migrate) the database at `path`.
+
+        A `readonly` Store opens an existing, migrated database with a
+        read-only connection that may be handed between threads (one at a
+        time); its write methods fail with sqlite3.OperationalError.
+        """
+        self.path = path
+        self.readonly = readonly
+        self._tx_depth = 0
+        self._tx_projects: Dict[str, int] = {}  # upserted in the open transaction, not yet in the registry
+        self._today: Optional[DaySnapshot] = None
+        if readonly:
+            self.conn = sqlite3.connect(
+                f"{path.resolve().as_uri()}?mode=ro", uri=True, isolation_level=None, check_same_thread=False
+            )
+            self.conn.row_factory = sqlite3.Row
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # autocommit mode: transactions are opened explicitly by transaction()
+            self.conn = sqlite3.connect(self.path, isolation_level=None)
+            self.conn.row_factory = sqlite3.Row
+            # only takes effect for a new file; maintenance.py converts existing ones
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # WAL lets readers proceed during writes and needs one fsync per commit
+            # (at checkpoints only with synchronous=NORMAL), which is still durable
+            # against application crashes. Falls back silently where WAL is unsupported.
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self._init_schema()
+        self.registry = ProjectRegistry(self.conn.execute("SELECT name, id FROM projects"))
+        self.has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='entries_fts'"
+        ).fetchone() is not None
+        self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self._counters: Dict[str, int] = dict(self.conn.execute("SELECT topic, n FROM change_counter"))
+        self.device_id: str = self.get_meta("device_id")
+        self._attached: List[int] = []  # archive years, least recently used first
+        self._scan_archives()
+        self._repair_rollup()
+
+    def reload(self) -> None:
+        """Re-read everything cached from the database, after its file was replaced (backup.restore_backup)."""
+        if self._tx_depth:
+            raise RuntimeError("reload() inside a transaction")
+        if not self.readonly:
+            self._migrate()  # the restored copy may predate the current schema
+        self.registry.reload(self.conn.execute("SELECT name, id FROM projects"))
+        self.has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='entries_fts'"
+        ).fetchone() is not None
+        self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self._counters = dict(self.conn.execute("SELECT topic, n FROM change_counter"))
+        self.device_id = self.get_meta("device_id")
+        self._today = None
+        self._scan_archives()
+        self._repair_rollup()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Run a unit of work atomically with a single COMMIT.
+
+        Nested use joins the outer transaction, so public operations can call
+        each other and still commit once. BEGIN IMMEDIATE takes the write lock
+        up front instead of failing with SQLITE_BUSY halfway through.
+        """
+        if self._tx_depth:
+            self._tx_depth += 1
+            try:
+                yield self.conn.cursor()
+            finally:
+                self._tx_depth -= 1
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._tx_depth = 1
+        try:
+            yield self.conn.cursor()
+        except BaseException:
+            self._tx_depth = 0
+            self._tx_projects.clear()
+            if self.conn.in_transaction:  # some errors already roll back inside SQLite
+                self.conn.execute("ROLLBACK")
+            raise
+        self._tx_depth = 0
+        try:
+            self.conn.execute("COMMIT")
+        except BaseException:  # e.g. SQLITE_BUSY without WAL: do not leave the transaction open
+            self._tx_projects.clear()
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+        # publish new projects only once they are durable
+        for name, project_id in self._tx_projects.items():
+            self.registry.add(name, project_id)
+        self._tx_projects.clear()
+
+    def _init_schema(self):
+        with self.transaction() as cur:
+            # version 0: the original schema, kept as-is so old databases need no special casing
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS projects(
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
+                );
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries(
+                    id INTEGER PRIMARY KEY,
+                    project_id INTEGER NOT NULL,
+                    task TEXT NOT NULL,
+                    notes TEXT,
+                    start_ts TEXT NOT NULL,
+                    end_ts TEXT,
+                    duration_s INTEGER, -- cached finalized duration
+                    FOREIGN KEY(project_id) REFERENCES projects(id)
+                );
+                """
+            )
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_entries_start ON entries(start_ts);
+                """
+            )
+        self._migrate()
+
+    def _migrate(self) -> None:
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            # each step runs in its own transaction together with its version bump
+            with self.transaction() as cur:
+                migration(cur)
+                cur.execute(f"PRAGMA user_version = {target}")
+
+    def poll_changes(self) -> FrozenSet[str]:
+        """Return the CHANGE_TOPICS other connections wrote to since the last poll.
+
+        Costs a single PRAGMA when nothing changed, so it can run every second.
+        Caches built from a changed table are dropped. Writes made through this
+        Store may be reported too, once another connection has written.
+        """
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return frozenset()
+        self._data_version = version
+        counters = dict(self.conn.execute("SELECT topic, n FROM change_counter"))
+        changed = frozenset(topic for topic, n in counters.items() if self._counters.get(topic) != n)
+        self._counters = counters
+        if "projects" in changed:
+            self.registry.reload(self.conn.execute("SELECT name, id FROM projects"))
+        if "entries" in changed:
+            self._today = None
+            self._scan_archives()  # another instance may have archived
+            self._repair_rollup()
+        return changed
+
+    def _repair_rollup(self) -> None:
+        """Recount the rollup days queued by older builds' writes (see _migrate_legacy_writers)."""
+        if self.readonly or self.conn.execute("SELECT 1 FROM rollup_stale LIMIT 1").fetchone() is None:
+            return
+        with self.transaction() as cur:
+            for lo, hi in cur.execute("SELECT lo, hi FROM rollup_stale").fetchall():
+                rebuild_rollup(cur, lo, max(hi, lo + 1))
+            cur.execute("DELETE FROM rollup_stale")
+        self._today = None
+
+    # --- settings ---
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        row = self.conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_meta(self, key: str, value: Any) -> None:
+        with self.transaction() as cur:
+            cur.execute(
+                "INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (key, value),
+            )
+
+    # --- project ops ---
+    def upsert_project(self, name: str) -> int:
+        name = name.strip()
+        if not name:
+            raise ValueError("Project name cannot be empty")
+        pid = self.registry.id_of(name) or self._tx_projects.get(name)
+        if pid is not None:
+            return pid
+        with self.transaction() as cur:
+            # the no-op DO UPDATE makes RETURNING yield the id for existing names too
+            cur.execute(
+                "INSERT INTO projects(name) VALUES(?) "
+                "ON CONFLICT(name) DO UPDATE SET name=excluded.name RETURNING id",
+                (name,),
+            )
+            pid = self._tx_projects[name] = int(cur.fetchone()[0])
+        return pid
+
+    def projects(self) -> List[str]:
+        return self.registry.names()
+
+    # --- entry ops ---
+    def start_entry(self, project_name: str, task: str, notes: str) -> int:
+        with self.transaction() as cur:
+            # stop any running entry first
+            running = self.get_running_entry()
+            if running:
+                self.stop_entry(running["id"])  # auto‑stop previous
+            pid = self.upsert_project(project_name)
+            now = datetime.now().replace(microsecond=0).astimezone()
+            cur.execute(
+                "INSERT INTO entries(project_id, task, notes, start_ts, start_epoch, utc_offset, uid) "
+                f"VALUES(?,?,?,?,?,?,{NEW_UID})",
+                (
+                    pid,
+                    task.strip(),
+                    notes.strip(),
+                    now.replace(tzinfo=None).isoformat(),
+                    int(now.timestamp()),
+                    int(now.utcoffset().total_seconds()),
+                ),
+            )
+            entry_id = int(cur.lastrowid)
+            self._log_changes(cur, "id=?", (entry_id,))
+        self._today = None
+        return entry_id
+
+    def stop_entry(self, entry_id: int) -> None:
+        with self.transaction() as cur:
+            cur.execute("SELECT project_id, start_epoch, end_epoch FROM entries WHERE id=?", (entry_id,))
+            row = cur.fetchone()
+            if not row:
+                return
+            if row["end_epoch"] is not None:
+                # e.g. stopped from another instance meanwhile; keep the end it recorded
+                raise ValueError("Entry is no longer running")
+            end = datetime.now().replace(microsecond=0)
+            end_epoch = int(end.timestamp())
+            cur.execute(
+                "UPDATE entries SET end_ts=?, end_epoch=?, duration_s=? - start_epoch WHERE id=?",
+                (end.isoformat(), end_epoch, end_epoch, entry_id),
+            )
+            self._log_changes(cur, "id=?", (entry_id,))
+            self._rollup_remove(cur, row)
+            self._rollup_add(cur, row["project_id"], row["start_epoch"], end_epoch)
+        self._today = None
+
+    def finalize_running_if_any(self) -> None:
+        with self.transaction():
+            r = self.get_running_entry()
+            if r:
+                self.stop_entry(int(r["id"]))
+
+    def get_running_entry(self) -> Optional[sqlite3.Row]:
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            SELECT e.*, p.name as project
+            FROM entries e JOIN projects p ON e.project_id = p.id
+            WHERE e.end_epoch IS NULL
+            ORDER BY e.start_epoch DESC
+            LIMIT 1
+            """
+        )
+        return cur.fetchone()
+
+    def get_entry(self, entry_id: int) -> Optional[sqlite3.Row]:
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            SELECT e.*, p.name as project,
+                   COALESCE(e.duration_s, e.end_epoch - e.start_epoch) AS duration_s
+            FROM entries e JOIN projects p ON e.project_id=p.id
+            WHERE e.id=?
+            """,
+            (entry_id,),
+        )
+        return cur.fetchone()
+
+    def delete_entry(self, entry_id: int) -> None:
+        with self.transaction() as cur:
+            cur.execute("SELECT project_id, start_epoch, end_epoch FROM entries WHERE id=?", (entry_id,))
+            old = cur.fetchone()
+            if old is None:
+                raise ValueError(ENTRY_GONE)
+            self._log_changes(cur, "id=?", (entry_id,), deleted=True)
+            cur.execute("DELETE FROM entries WHERE id=?", (entry_id,))
+            self._rollup_remove(cur, old)
+        self._today = None
+
+    def update_entry(self, entry_id: int, project_name: str, task: str, notes: str, start_ts: str, end_ts: Optional[str]) -> None:
+        start_epoch, utc_offset = iso_to_epoch(start_ts)
+        end_epoch = duration_s = None
+        if end_ts:
+            end_epoch, _ = iso_to_epoch(end_ts)
+            duration_s = end_epoch - start_epoch
+        with self.transaction() as cur:
+            pid = self.upsert_project(project_name)
+            cur.execute("SELECT project_id, start_epoch, end_epoch FROM entries WHERE id=?", (entry_id,))
+            old = cur.fetchone()
+            if old is None:
+                raise ValueError(ENTRY_GONE)
+            try:
+                cur.execute(
+                    """
+                    UPDATE entries SET project_id=?, task=?, notes=?, start_ts=?, end_ts=?, duration_s=?,
+                                       start_epoch=?, end_epoch=?, utc_offset=?
+                    WHERE id=?
+                    """,
+                    (pid, task.strip(), notes.strip(), start_ts, end_ts, duration_s,
+                     start_epoch, end_epoch, utc_offset, entry_id),
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError("Another entry is already running; stop it first") from None
+            self._log_changes(cur, "id=?", (entry_id,))
+            self._rollup_remove(cur, old)
+            if end_epoch is not None:
+                self._rollup_add(cur, pid, start_epoch, end_epoch)
+        self._today = None
+
+    # --- bulk edits: one statement for the whole selection ---
+    def _old_rows(self, cur: sqlite3.Cursor, ids: List[int]) -> List[sqlite3.Row]:
+        cur.execute(
+            f"SELECT id, project_id, start_epoch, end_epoch FROM entries WHERE id IN ({','.join('?' * len(ids))})", ids
+        )
+        return cur.fetchall()
+
+    def update_entries(
+        self, ids: Iterable[int], project: Optional[str] = None, task: Optional[str] = None, shift_s: int = 0
+    ) -> int:
+        """Move entries to `project`, rename their task and/or shift their times by `shift_s` seconds.
+
+        What is left at None (or 0) stays as it is per entry. One UPDATE in one
+        transaction; ids that no longer exist (deleted, archived) are skipped.
+        Returns the number of entries changed.
+        """
+        ids = list(ids)
+        if not ids or (project is None and task is None and not shift_s):
+            return 0
+        marks = ",".join("?" * len(ids))
+        sets: List[str] = []
+        params: List[object] = []
+        with self.transaction() as cur:
+            if project is not None:
+                sets.append("project_id=?")
+                params.append(self.upsert_project(project))
+            if task is not None:
+                sets.append("task=?")
+                params.append(task.strip() or "(untitled)")
+            if shift_s:
+                archived_before = self.archived_before()
+                moved_in = f"SELECT 1 FROM entries WHERE id IN ({marks}) AND start_epoch + ? < ?"
+                if archived_before is not None and cur.execute(moved_in, (*ids, shift_s, archived_before)).fetchone():
+                    raise ValueError("Entries cannot be moved into an archived period")
+                # SET expressions see the old row, so every column shifts from the same start;
+                # the ISO text and offset are recomputed in local time like iso_to_epoch does
+                local = "strftime('%Y-%m-%dT%H:%M:%S', {0} + ?, 'unixepoch', 'localtime')"
+                sets += [
+                    f"start_ts={local.format('start_epoch')}",
+                    f"end_ts={local.format('end_epoch')}",
+                    f"utc_offset=CAST(strftime('%s', {local.format('start_epoch')}) AS INTEGER) - (start_epoch + ?)",
+                    "start_epoch=start_epoch + ?",
+                    "end_epoch=end_epoch + ?",
+                ]
+                params += [shift_s] * 6
+            old = self._old_rows(cur, ids) if project is not None or shift_s else []
+            cur.execute(f"UPDATE entries SET {', '.join(sets)} WHERE id IN ({marks})", (*params, *ids))
+            changed = cur.rowcount
+            self._log_changes(cur, f"id IN ({marks})", ids)
+            for row in old:
+                self._rollup_remove(cur, row)
+            for row in self._old_rows(cur, ids) if old else ():
+                if row["end_epoch"] is not None:
+                    self._rollup_add(cur, row["project_id"], row["start_epoch"], row["end_epoch"])
+        self._today = None
+        return changed
+
+    def delete_entries(self, ids: Iterable[int]) -> int:
+        """Delete entries with one DELETE in one transaction; returns how many existed."""
+        ids = list(ids)
+        if not ids:
+            return 0
+        marks = ",".join("?" * len(ids))
+        with self.transaction() as cur:
+            old = self._old_rows(cur, ids)
+            self._log_changes(cur, f"id IN ({marks})", ids, deleted=True)
+            cur.execute(f"DELETE FROM entries WHERE id IN ({marks})", ids)
+            for row in old:
+                self._rollup_remove(cur, row)
+        self._today = None
+        return len(old)
+
+    # --- daily rollup maintenance ---
+    @staticmethod
+    def _rollup_add(cur: sqlite3.Cursor, project_id: int, start_epoch: int, end_epoch: int, sign: int = 1) -> None:
+        cur.executemany(
+            "INSERT INTO daily_rollup(day, project_id, seconds) VALUES(?,?,?) "
+            "ON CONFLICT(day, project_id) DO UPDATE SET seconds = seconds + excluded.seconds",
+            [(day, project_id, sign * seconds) for day, seconds in split_days(start_epoch, end_epoch)],
+        )
+        if sign < 0:
+            cur.execute(
+                "DELETE FROM daily_rollup WHERE day BETWEEN ? AND ? AND project_id=? AND seconds=0",
+                (datetime.fromtimestamp(start_epoch).date().isoformat(),
+                 datetime.fromtimestamp(end_epoch).date().isoformat(), project_id),
+            )
+
+    def _rollup_remove(self, cur: sqlite3.Cursor, row: Optional[sqlite3.Row]) -> None:
+        """Take a finished entry (project_id, start_epoch, end_epoch) back out of the rollup."""
+        if row is not None and row["end_epoch"] is not None:
+            self._rollup_add(cur, row["project_id"], row["start_epoch"], row["end_epoch"], sign=-1)
+
+    def _entry_filter(self, start_date: date, end_date: date, project: Optional[str]) -> Tuple[str, List[object]]:
+        start_epoch, _ = day_bounds(start_date)
+        _, end_epoch = day_bounds(end_date)
+        where = "e.start_epoch >= ? AND e.start_epoch < ?"
+        params: List[object] = [start_epoch, end_epoch]
+        if project:
+            # resolve the name once so the (project_id, start_epoch) index drives the scan
+            where += " AND e.project_id=(SELECT id FROM projects WHERE name=?)"
+            params.append(project)
+        return where, params
+
+    def _partitions(self, start_date: date, end_date: date) -> List[int]:
+        """Archive years (newest first) that can hold entries starting in the date range."""
+        return [year for year in self.archive_years if start_date.year <= year <= end_date.year]
+
+    def _read_partitions(
+        self, sql: str, params: List[object], start_date: date, end_date: date, batch_size: int = 500
+    ) -> Iterator[sqlite3.Row]:
+        """Run `sql` on the entries and on every archive the date range reaches.
+
+        `sql` reads ``FROM {entries} e`` and orders by start_epoch DESC, id DESC;
+        the partitions are merged in that order. Archives are queried one after
+        the other, newest first, so only one of them has to be attached at a time.
+        """
+        hot = self._fetch_rows(sql.format(entries="main.entries"), params, batch_size)
+        years = self._partitions(start_date, end_date)
+        if not years:
+            return hot
+
+        def archived() -> Iterator[sqlite3.Row]:
+            # archives hold disjoint years, so reading them in turn keeps the order
+            for year in years:
+                schema = self._attach_archive(year)
+                yield from self._fetch_rows(sql.format(entries=f"{schema}.entries"), params, batch_size)
+
+        return heapq.merge(hot, archived(), key=lambda r: (r["start_epoch"], r["id"]), reverse=True)
+
+    def _fetch_rows(self, sql: str, params: List[object], batch_size: int) -> Iterator[sqlite3.Row]:
+        cur = self.conn.cursor()
+        cur.execute(sql, params)
+        try:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cur.close()
+
+    def iter_entries(
+        self, start_date: date, end_date: date, project: Optional[str], batch_size: int = 500
+    ) -> Iterator[sqlite3.Row]:
+        """Yield the filtered entries newest first, fetching `batch_size` rows at a time."""
+        where, params = self._entry_filter(start_date, end_date, project)
+        return self._read_partitions(
+            "SELECT e.id, p.name AS project, e.task, e.notes, e.start_ts, e.end_ts, e.start_epoch, "
+            "COALESCE(e.duration_s, e.end_epoch - e.start_epoch) AS duration_s "
+            "FROM {entries} e JOIN projects p ON e.project_id=p.id "
+            f"WHERE {where} ORDER BY e.start_epoch DESC, e.id DESC",
+            params, start_date, end_date, batch_size,
+        )
+
+    def query_entries(self, start_date: date, end_date: date, project: Optional[str]) -> List[sqlite3.Row]:
+        return list(self.iter_entries(start_date, end_date, project))
+
+    def query_page(
+        self,
+        start_date: date,
+        end_date: date,
+        project: Optional[str],
+        after: Optional[Tuple[int, int]] = None,
+        limit: int = 200,
+    ) -> List[sqlite3.Row]:
+        """Return one page of entries, newest first.
+
+        Pagination is keyset based: pass the ``(start_epoch, id)`` of the last row
+        of the previous page as `after`, so every page is an index seek rather than
+        an ever-growing OFFSET scan.
+        """
+        where, params = self._entry_filter(start_date, end_date, project)
+        if after is not None:
+            where += " AND (e.start_epoch, e.id) < (?, ?)"
+            params.extend(after)
+        params.append(limit)
+        rows = self._read_partitions(
+            "SELECT e.id, p.name AS project, e.task, e.notes, e.start_ts, e.end_ts, e.start_epoch, "
+            "COALESCE(e.duration_s, e.end_epoch - e.start_epoch) AS duration_s "
+            "FROM {entries} e JOIN projects p ON e.project_id=p.id "
+            f"WHERE {where} ORDER BY e.start_epoch DESC, e.id DESC LIMIT ?",
+            params, start_date, end_date, limit,
+        )
+        return list(itertools.islice(rows, limit))
+
+    def get_entries(self, ids: Iterable[int]) -> List[sqlite3.Row]:
+        """Rows for `ids` in the layout of query_page; ids that no longer exist are left out."""
+        ids = list(ids)
+        if not ids:
+            return []
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT e.id, p.name AS project, e.task, e.notes, e.start_ts, e.end_ts, e.start_epoch, "
+            "COALESCE(e.duration_s, e.end_epoch - e.start_epoch) AS duration_s "
+            "FROM entries e JOIN projects p ON e.project_id=p.id "
+            f"WHERE e.id IN ({','.join('?' * len(ids))})",
+            ids,
+        )
+        return cur.fetchall()
+
+    def query_totals(self, start_date: date, end_date: date, project: Optional[str]) -> Tuple[int, int]:
+        """Return (row count, summed seconds) for a filter without fetching the rows."""
+        where, params = self._entry_filter(start_date, end_date, project)
+        sql = (
+            "SELECT COUNT(*), COALESCE(SUM(COALESCE(e.duration_s, e.end_epoch - e.start_epoch)), 0) "
+            f"FROM {{entries}} e WHERE {where}"
+        )
+        count, seconds = self.conn.execute(sql.format(entries="main.entries"), params).fetchone()
+        for year in self._partitions(start_date, end_date):
+            schema = self._attach_archive(year)
+            n, s = self.conn.execute(sql.format(entries=f"{schema}.entries"), params).fetchone()
+            count += n
+            seconds += s
+        return int(count), int(seconds)
+
+    def load_batch(self, start_date: date, end_date: date, project: Optional[str] = None) -> "EntryBatch":
+        """The filtered entries, archives included, as a batch.EntryBatch for aggregation.
+
+        A running entry ends at the time of loading.
+        """
+        from batch import EntryBatch
+
+        where, params = self._entry_filter(start_date, end_date, project)
+        sql = f"SELECT e.id, e.project_id, e.start_epoch, COALESCE(e.end_epoch, ?) FROM {{entries}} e WHERE {where}"
+        params.insert(0, int(time.time()))
+        batch = EntryBatch(self.registry.by_id())
+        batch.extend(self.conn.execute(sql.format(entries="main.entries"), params))
+        for year in self._partitions(start_date, end_date):
+            schema = self._attach_archive(year)
+            batch.extend(self.conn.execute(sql.format(entries=f"{schema}.entries"), params))
+        return batch
+
+    def sum_today(self) -> int:
+        return self.today_snapshot().total(datetime.now())
+
+    def today_snapshot(self) -> DaySnapshot:
+        """Return today's cached totals, reloading only after a write or a date change."""
+        today = date.today()
+        if self._today is None or self._today.day != today:
+            self._today = self._load_day(today)
+        return self._today
+
+    def _load_day(self, day: date) -> DaySnapshot:
+        cur = self.conn.cursor()
+        # finished entries are already split at midnight in the rollup
+        cur.execute("SELECT COALESCE(SUM(seconds), 0) FROM daily_rollup WHERE day=?", (day.isoformat(),))
+        finished = int(cur.fetchone()[0])
+
+        running = self.get_running_entry()
+        if not running:
+            return DaySnapshot(day=day, finished_s=finished)
+        return DaySnapshot(
+            day=day,
+            finished_s=finished,
+            running_id=int(running["id"]),
+            running_start=datetime.fromtimestamp(running["start_epoch"]),
+            running_project=running["project"],
+            running_task=running["task"],
+        )
+
+    # --- full-text search ---
+    # Only the newest SEARCH_WINDOW matches are ranked: bm25 costs a few
+    # microseconds per hit, which adds up to seconds for a common word in a
+    # large history, while older hits of such a word are rarely what is wanted.
+    # They follow the ranked ones, newest first.
+    SEARCH_WINDOW = 500
+
+    @staticmethod
+    def _fts_query(text: str) -> str:
+        # every word must match; a trailing * makes a word a prefix. Quoting
+        # neutralises the other FTS5 operators.
+        terms = []
+        for word in text.split():
+            star = "*" if word.endswith("*") else ""
+            word = word.rstrip("*")
+            if word:
+                terms.append('"' + word.replace('"', '""') + '"' + star)
+        return " ".join(terms)
+
+    def _search_from(self, text: str, start_date: date, end_date: date, project: Optional[str]) -> Tuple[str, List[object]]:
+        where, params = self._entry_filter(start_date, end_date, project)
+        if self.has_fts:
+            return (
+                "FROM entries_fts JOIN entries e ON e.id=entries_fts.rowid "
+                f"WHERE entries_fts MATCH ? AND {where}",
+                [self._fts_query(text), *params],
+            )
+        like = "%" + text.replace("*", " ").strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return (
+            "FROM entries e "
+            f"WHERE (e.task LIKE ? ESCAPE '\\' OR e.notes LIKE ? ESCAPE '\\') AND {where}",
+            [like, like, *params],
+        )
+
+    def search_window(
+        self, text: str, start_date: date, end_date: date, project: Optional[str]
+    ) -> Optional[Tuple[int, int]]:
+        """(lowest id, highest id) of the newest SEARCH_WINDOW matches, the part of a search that is ranked.
+
+        None without FTS (matches are listed newest first) or without matches.
+        Pass it to every search() call for the pages of one listing, so each
+        page ranks the same matches.
+        """
+        if not self.has_fts or not text.replace("*", " ").strip():
+            return None
+        from_where, params = self._search_from(text, start_date, end_date, project)
+        cur = self.conn.cursor()
+        cur.execute(
+            f"SELECT MIN(id), MAX(id) FROM (SELECT entries_fts.rowid AS id {from_where} "
+            "ORDER BY entries_fts.rowid DESC LIMIT ?)",
+            [*params, self.SEARCH_WINDOW],
+        )
+        lo, hi = cur.fetchone()
+        return None if lo is None else (int(lo), int(hi))
+
+    def search(
+        self,
+        text: str,
+        start_date: date,
+        end_date: date,
+        project: Optional[str],
+        limit: int = 200,
+        offset: int = 0,
+        window: Optional[Tuple[int, int]] = None,
+    ) -> List[sqlite3.Row]:
+        """Entries whose task or notes match `text`, best match first.
+
+        Combines with the usual date/project filter. Each row carries a
+        ``snippet`` column with the matched words in [brackets]. The matches
+        in `window` (see search_window; by default the current one) are ranked,
+        older ones follow newest first and newer ones are left out, so pages
+        fetched with the same window never overlap or skip a match.
+        """
+        if not text.replace("*", " ").strip():
+            return []
+        if self.has_fts and window is None:
+            window = self.search_window(text, start_date, end_date, project)
+            if window is None:
+                return []
+        from_where, params = self._search_from(text, start_date, end_date, project)
+        if not self.has_fts:
+            hits = f"SELECT e.id, COALESCE(NULLIF(e.notes, ''), e.task) AS snippet {from_where}"
+            return self._search_page(hits, params, "e.start_epoch DESC, e.id DESC", limit, offset)
+        fields = "SELECT e.id, {} AS rank, snippet(entries_fts, -1, '[', ']', '…', 10) AS snippet "
+        in_window = f"{from_where} AND entries_fts.rowid BETWEEN ? AND ?"
+        rows = self._search_page(fields.format("entries_fts.rank") + in_window, [*params, *window],
+                                 "hits.rank, hits.id DESC", limit, offset)
+        if len(rows) < limit:
+            if rows:
+                ranked = offset + len(rows)
+            else:
+                ranked = self.conn.execute(f"SELECT COUNT(*) {in_window}", [*params, *window]).fetchone()[0]
+            older = (fields.format("NULL") + f"{from_where} AND entries_fts.rowid < ? "
+                     "ORDER BY entries_fts.rowid DESC LIMIT ? OFFSET ?")
+            rows += self._search_page(older, [*params, window[0], limit - len(rows), max(0, offset - ranked)],
+                                      "hits.id DESC", limit - len(rows), 0)
+        return rows
+
+    def _search_page(self, hits: str, params: List[object], order: str, limit: int, offset: int) -> List[sqlite3.Row]:
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT e.id, p.name AS project, e.task, e.notes, e.start_ts, e.end_ts, e.start_epoch, "
+            "COALESCE(e.duration_s, e.end_epoch - e.start_epoch) AS duration_s, hits.snippet "
+            f"FROM ({hits}) AS hits JOIN entries e ON e.id=hits.id JOIN projects p ON e.project_id=p.id "
+            f"ORDER BY {order} LIMIT ? OFFSET ?",
+            [*params, limit, offset],
+        )
+        return cur.fetchall()
+
+    def search_totals(self, text: str, start_date: date, end_date: date, project: Optional[str]) -> Tuple[int, int]:
+        """Return (match count, summed seconds) for a search, like query_totals."""
+        if not text.replace("*", " ").strip():
+            return 0, 0
+        from_where, params = self._search_from(text, start_date, end_date, project)
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT COUNT(*), COALESCE(SUM(COALESCE(e.duration_s, e.end_epoch - e.start_epoch)), 0) " + from_where,
+            params,
+        )
+        count, seconds = cur.fetchone()
+        return int(count), int(seconds)
+
+    def bulk_import(self, src: Path, fmt: Optional[str] = None, batch_size: int = 5000) -> Tuple[int, int]:
+        """Import finished entries from a CSV export or a JSONL file in one transaction.
+
+        Rows are streamed from `src` and inserted in `batch_size` chunks with
+        executemany. Rows that already exist (same project, task and start) or
+        have no end time are skipped, as are rows from archived periods (see
+        archive). Returns (inserted, skipped).
+
+        A large import builds most entries indexes once at the end instead of
+        row by row (see _indexes_deferred).
+        """
+        fmt = fmt or ("jsonl" if src.suffix.lower() in (".jsonl", ".ndjson", ".json") else "csv")
+        records = _read_import_records(src, fmt)
+        project_ids: Dict[str, int] = {}  # local memo in front of upsert_project for the hot loop
+        inserted = skipped = valid = 0
+        lo, hi = None, None  # epoch span of the imported rows, for the rollup
+        # archived periods are read-only; this also keeps the rollup rebuild off archived days
+        archived_before = self.archived_before() or -(2 ** 62)
+        rows_guess = src.stat().st_size // IMPORT_ROW_BYTES
+        with self.transaction() as cur, self._fts_deferred(cur), self._indexes_deferred(cur, rows_guess):
+            last_id = cur.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0]
+            batch: List[Tuple[object, ...]] = []
+            for project, task, notes, start_ts, end_ts in records:
+                project = project.strip()
+                if not project or not start_ts or not end_ts:
+                    skipped += 1
+                    continue
+                pid = project_ids.get(project)
+                if pid is None:
+                    pid = project_ids[project] = self.upsert_project(project)
+                start_epoch, utc_offset = iso_to_epoch(start_ts)
+                end_epoch, _ = iso_to_epoch(end_ts)
+                if start_epoch < archived_before:
+                    skipped += 1
+                    continue
+                valid += 1
+                lo = start_epoch if lo is None else min(lo, start_epoch)
+                hi = end_epoch if hi is None else max(hi, end_epoch)
+                batch.append((pid, task.strip() or "(untitled)", notes.strip(), start_ts, end_ts,
+                              end_epoch - start_epoch, start_epoch, end_epoch, utc_offset))
+                if len(batch) >= batch_size:
+                    inserted += self._insert_import_batch(cur, batch)
+                    batch = []
+            if batch:
+                inserted += self._insert_import_batch(cur, batch)
+            if inserted:
+                self._log_changes(cur, "id > ?", (last_id,))
+                rebuild_rollup(cur, lo, hi)
+        self._today = None
+        return inserted, skipped + valid - inserted
+
+    @contextmanager
+    def _fts_deferred(self, cur: sqlite3.Cursor) -> Iterator[None]:
+        """Index the entries inserted inside the block in one pass at its end.
+
+        The per-row FTS trigger costs ~50 µs per insert (FTS5 flushes at every
+        statement); without it a bulk insert is several times faster. Must run
+        inside a transaction, so the trigger is never missing for other clients.
+        """
+        if not self.has_fts:
+            yield
+            return
+        last_id = cur.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0]
+        cur.execute("DROP TRIGGER entries_fts_ai")
+        yield
+        cur.execute("INSERT INTO entries_fts(rowid, task, notes) SELECT id, task, notes FROM entries WHERE id > ?",
+                    (last_id,))
+        cur.execute(FTS_INSERT_TRIGGER)
+
+    @contextmanager
+    def _indexes_deferred(self, cur: sqlite3.Cursor, rows: int) -> Iterator[None]:
+        """Build the DEFERRED_SCHEMA indexes in one pass at the end of the block.
+
+        Each index costs a B-tree insert per row, the uid indexes a random one;
+        CREATE INDEX sorts instead. It also reads the whole table, so this only
+        happens when about `rows` new rows are a large part of it. Must run
+        inside a transaction, like _fts_deferred.
+        """
+        # the id range: as good as COUNT(*) here and without reading the table
+        existing = cur.execute("SELECT COALESCE(MAX(id), 0) - COALESCE(MIN(id), 0) FROM entries").fetchone()[0]
+        if rows < DEFER_INDEXES_ROWS or rows < existing * DEFER_INDEXES_SHARE:
+            yield
+            return
+        schema = cur.execute(
+            f"SELECT type, name, sql FROM sqlite_master WHERE name IN ({', '.join('?' * len(DEFERRED_SCHEMA))})",
+            DEFERRED_SCHEMA,
+        ).fetchall()
+        for kind, name, _ in schema:
+            cur.execute(f"DROP {kind.upper()} {name}")
+        yield
+        for _, _, sql in schema:
+            cur.execute(sql)
+        cur.execute("UPDATE change_counter SET n = n + 1 WHERE topic='entries'")
+
+    @staticmethod
+    def _insert_import_batch(cur: sqlite3.Cursor, batch: List[Tuple[object, ...]]) -> int:
+        # NOT EXISTS is an index seek on (project_id, start_epoch) and also
+        # catches duplicates inside the file, since earlier batches are visible.
+        cur.executemany(
+            f"""
+            INSERT INTO entries(project_id, task, notes, start_ts, end_ts, duration_s, start_epoch, end_epoch, utc_offset, uid)
+            SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, {NEW_UID}
+            WHERE NOT EXISTS (SELECT 1 FROM entries WHERE project_id=?1 AND start_epoch=?7 AND task=?2)
+            """,
+            batch,
+        )
+        return cur.rowcount
+
+    def summary(
+        self, start_date: date, end_date: date, group_by: str = "day", include_running: bool = True
+    ) -> List[Tuple[str, int]]:
+        """Return (key, seconds) totals for the date range from daily_rollup.
+
+        `group_by` is one of "day", "week" (key = the Monday), "month" or
+        "project". The running entry is added up to now unless
+        `include_running` is false. Only the rollup is read, so the cost
+        depends on days × projects rather than on the number of entries.
+        """
+        keys = {
+            "day": "r.day",
+            "week": "date(r.day, '-' || ((CAST(strftime('%w', r.day) AS INTEGER) + 6) % 7) || ' days')",
+            "month": "substr(r.day, 1, 7)",
+            "project": "p.name",
+        }
+        if group_by not in keys:
+            raise ValueError(f"Unknown grouping: {group_by}")
+        cur = self.conn.cursor()
+        cur.execute(
+            f"SELECT {keys[group_by]} AS k, SUM(r.seconds) "
+            "FROM daily_rollup r JOIN projects p ON r.project_id=p.id "
+            "WHERE r.day BETWEEN ? AND ? GROUP BY k",
+            (start_date.isoformat(), end_date.isoformat()),
+        )
+        totals = {k: int(v) for k, v in cur.fetchall()}
+
+        running = self.get_running_entry() if include_running else None
+        if running:
+            lo, _ = day_bounds(start_date)
+            _, hi = day_bounds(end_date)
+            now = int(time.time())
+            for day, seconds in split_days(max(running["start_epoch"], lo), min(now, hi)):
+                if group_by == "project":
+                    key = running["project"]
+                elif group_by == "week":
+                    d = date.fromisoformat(day)
+                    key = (d - timedelta(days=d.weekday())).isoformat()
+                elif group_by == "month":
+                    key = day[:7]
+                else:
+                    key = day
+                totals[key] = totals.get(key, 0) + seconds
+
+        if group_by == "project":
+            return sorted(totals.items(), key=lambda kv: (-kv[1], kv[0]))
+        return sorted(totals.items())
+
+    # --- overlaps and gaps ---
+    def overlapping(self, start_epoch: int, end_epoch: Optional[int], exclude: Optional[int] = None) -> List[sqlite3.Row]:
+        """Entries that share time with [start_epoch, end_epoch), in start order.
+
+        An `end_epoch` of None, like the running entry, lasts until now.
+        `exclude` is left out (the entry being edited). Uses idx_entries_span
+        and idx_entries_open: a handful of index seeks on any history.
+        """
+        end_epoch = int(time.time()) if end_epoch is None else end_epoch
+        fields = "e.id AS id, p.name AS project, e.task, e.start_ts, e.end_ts, e.start_epoch, e.end_epoch"
+        cur = self.conn.cursor()
+        cur.execute(
+            f"""
+            WITH span(digits, longest) AS (VALUES {SPAN_GROUPS})
+            SELECT {fields} FROM span JOIN entries e JOIN projects p ON p.id = e.project_id
+            WHERE {SPAN_DIGITS} = span.digits AND e.start_epoch > ?1 - span.longest AND e.start_epoch < ?2
+              AND e.end_epoch > ?1 AND e.id IS NOT ?3
+            UNION ALL
+            SELECT {fields} FROM entries e JOIN projects p ON p.id = e.project_id
+            WHERE e.end_epoch IS NULL AND e.start_epoch < ?2 AND ?4 > ?1 AND e.id IS NOT ?3
+            ORDER BY start_epoch, id
+            """,
+            (start_epoch, end_epoch, exclude, int(time.time())),
+        )
+        return cur.fetchall()
+
+    def gaps_and_overlaps(
+        self, start_date: date, end_date: date, min_gap: int = MIN_GAP
+    ) -> Tuple[List[Tuple[int, int]], List[Tuple[sqlite3.Row, sqlite3.Row, int]]]:
+        """Untracked time and double-booked time between `start_date` and `end_date`.
+
+        Gaps are (start_epoch, end_epoch) stretches of at least `min_gap`
+        seconds between two entries of the same day; the time before a day's
+        first entry and after its last is not a gap. Overlaps are
+        (earlier entry, later entry, seconds shared). One overlapping() query
+        and a pass over the entries found.
+        """
+        lo, _ = day_bounds(start_date)
+        _, hi = day_bounds(end_date)
+        now = int(time.time())
+        gaps: List[Tuple[int, int]] = []
+        overlaps: List[Tuple[sqlite3.Row, sqlite3.Row, int]] = []
+        active: List[Tuple[int, sqlite3.Row]] = []  # (end, entry) of entries not over yet
+        covered: Optional[int] = None  # tracked up to here
+        for r in self.overlapping(lo, hi):
+            start = r["start_epoch"]
+            end = now if r["end_epoch"] is None else r["end_epoch"]
+            active = [(e, a) for e, a in active if e > start]
+            overlaps.extend((a, r, min(e, end) - start) for e, a in active)
+            active.append((end, r))
+            if (
+                covered is not None and start - covered >= min_gap and lo <= covered and start <= hi
+                and datetime.fromtimestamp(covered).date() == datetime.fromtimestamp(start).date()
+            ):
+                gaps.append((covered, start))
+            covered = end if covered is None else max(covered, end)
+        return gaps, overlaps
+
+    def export_csv(self, rows: Iterable[sqlite3.Row], dest: Path) -> int:
+        """Write `rows` (typically from iter_entries) as they are read; return the row count."""
+        import csv
+
+        count = 0
+        with dest.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["ID", "Project", "Task", "Notes", "Start", "End", "Duration (h:mm:ss)"])
+            for r in rows:
+                writer.writerow([
+                    r["id"], r["project"], r["task"], r["notes"], r["start_ts"], r["end_ts"],
+                    pretty_duration(int(r["duration_s"] or 0)),
+                ])
+                count += 1
+        return count
+
+    # --- archive partitions ---
+    def archive_path(self, year: int) -> Path:
+        return self.path.parent / ARCHIVE_DIR / f"{self.path.stem}-{year}.sqlite3"
+
+    def _scan_archives(self) -> None:
+        prefix = self.path.stem + "-"
+        years = []
+        try:
+            for f in (self.path.parent / ARCHIVE_DIR).iterdir():
+                year = f.stem[len(prefix):]
+                if f.suffix == ".sqlite3" and f.stem.startswith(prefix) and year.isdigit():
+                    years.append(int(year))
+        except OSError:
+            pass  # no archive folder
+        self.archive_years = sorted(years, reverse=True)
+
+    def _attach_archive(self, year: int) -> str:
+        """ATTACH the archive of `year` (creating it if need be) and return its schema name."""
+        schema = f"archive_{year}"
+        if year in self._attached:
+            self._attached.remove(year)
+            self._attached.append(year)
+            return schema
+        while len(self._attached) >= ARCHIVES_ATTACHED:
+            try:
+                self.conn.execute(f"DETACH DATABASE archive_{self._attached[0]}")
+            except sqlite3.OperationalError:
+                break  # still being read; dropped on a later call
+            del self._attached[0]
+        self.conn.execute(f"ATTACH DATABASE ? AS {schema}", (str(self.archive_path(year)),))
+        self._attached.append(year)
+        return schema
+
+    def archived_before(self) -> Optional[int]:
+        """Epoch before which entries may have been archived, or None if nothing was."""
+        value = self.get_meta("archived_before")
+        return None if value is None else int(value)
+
+    def archive(self, before: date, vacuum: bool = True) -> Dict[int, int]:
+        """Move entries that ended before `before` into per-year archive databases.
+
+        Each entry goes to ``archive/<database name>-<year>.sqlite3`` by the
+        local year it started in, and is still returned by iter_entries,
+        query_page and query_totals whenever their date range reaches that year.
+        Archived entries are read-only and not searched; daily_rollup keeps
+        their totals, so reports never open an archive. The newest entry always
+        stays, so new ids never collide with archived ones. One transaction per
+        year; moving again after an interruption completes the move.
+        `vacuum` shrinks the database file afterwards. Returns {year: moved}.
+        """
+        cutoff, _ = day_bounds(before)
+        first, last_id = self.conn.execute(
+            "SELECT MIN(start_epoch), (SELECT MAX(id) FROM entries) FROM entries WHERE end_epoch < ?", (cutoff,)
+        ).fetchone()
+        moved: Dict[int, int] = {}
+        if first is None:
+            return moved
+        self.archive_path(0).parent.mkdir(parents=True, exist_ok=True)
+        for year in range(datetime.fromtimestamp(first).year, before.year + 1):
+            lo, _ = day_bounds(date(year, 1, 1))
+            hi, _ = day_bounds(date(year + 1, 1, 1))
+            where = "end_epoch < ? AND start_epoch >= ? AND start_epoch < ? AND id < ?"
+            params = (cutoff, lo, hi, last_id)
+            if self.conn.execute(f"SELECT 1 FROM main.entries WHERE {where} LIMIT 1", params).fetchone() is None:
+                continue
+            schema = self._attach_archive(year)
+            with self.transaction() as cur:
+                _create_archive_schema(cur, schema)
+                # REPLACE: a row left in both files by an interrupted move takes the live version
+                cur.execute(
+                    f"INSERT OR REPLACE INTO {schema}.entries({ENTRY_COLUMNS}) "
+                    f"SELECT {ENTRY_COLUMNS} FROM main.entries WHERE {where}",
+                    params,
+                )
+                moved[year] = cur.rowcount
+                # first, so the delete is not taken for an older build's (see _migrate_legacy_writers)
+                cur.execute(
+                    "INSERT INTO meta(key, value) VALUES('archived_before', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value=max(value, excluded.value)",
+                    (cutoff,),
+                )
+                cur.execute(f"DELETE FROM main.entries WHERE {where}", params)
+        self._scan_archives()
+        if moved and self.has_fts:
+            # merge away the deletions, which otherwise keep their index pages in use
+            with self.transaction() as cur:
+                cur.execute("INSERT INTO entries_fts(entries_fts) VALUES ('optimize')")
+        if moved and vacuum:
+            self.conn.execute("VACUUM main")
+            # in WAL mode the rebuilt pages are in the -wal file until a checkpoint copies them back
+            self.conn.execute("PRAGMA main.wal_checkpoint(TRUNCATE)")
+        return moved
+
+    # --- change log and sync between devices ---
+    # Every write through Store appends (uid, clock, device) rows to change_log
+    # in the same transaction. Clocks are hybrid logical clocks: wall time in
+    # ms, but always past every change this database has seen, so a later edit
+    # wins even between machines whose clocks disagree a little. Conflicts
+    # resolve by the larger (clock, device), the same way on every device.
+
+    def _next_clock(self, cur: sqlite3.Cursor) -> int:
+        last = cur.execute("SELECT MAX(clock) FROM change_log").fetchone()[0] or 0
+        return max(int(time.time() * 1000), last + 1)
+
+    def _log_changes(self, cur: sqlite3.Cursor, where: str, params: Iterable[object], deleted: bool = False) -> None:
+        """Record the entries matching `where` as changed here (for deletes: before deleting them)."""
+        cur.execute(
+            f"INSERT INTO change_log(uid, clock, device, deleted) SELECT uid, ?, ?, ? FROM entries WHERE {where}",
+            (self._next_clock(cur), self.device_id, int(deleted), *params),
+        )
+
+    def changes_since(self, since: int = 0, own_only: bool = False) -> Tuple[int, List[Dict[str, Any]]]:
+        """Entries changed after change number `since`, one record each, and the newest change number.
+
+        A record holds the entry's current state, or ``"deleted": true``, with
+        the clock and device of its latest change. since=0 also returns the
+        entries from before the change log, with clock 0. `own_only` leaves out
+        entries whose latest change came from another device. Archived entries
+        are left out.
+        """
+        last = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+        own = "AND c.device = ?" if own_only else ""
+        rows = self.conn.execute(
+            f"""
+            SELECT c.uid, c.clock, c.device, c.deleted, p.name AS project, e.task, e.notes,
+                   e.start_ts, e.end_ts, e.start_epoch, e.end_epoch, e.utc_offset
+            FROM change_log c
+            LEFT JOIN entries e ON e.uid = c.uid
+            LEFT JOIN projects p ON p.id = e.project_id
+            WHERE c.seq > ? AND c.seq <= ? {own}
+              AND c.seq = (SELECT MAX(seq) FROM change_log WHERE uid = c.uid)
+            ORDER BY c.seq
+            """,
+            (since, last, self.device_id) if own_only else (since, last),
+        ).fetchall()
+        if since <= 0:
+            rows += self.conn.execute(
+                """
+                SELECT e.uid, 0 AS clock, ? AS device, 0 AS deleted, p.name AS project, e.task, e.notes,
+                       e.start_ts, e.end_ts, e.start_epoch, e.end_epoch, e.utc_offset
+                FROM entries e JOIN projects p ON p.id = e.project_id
+                WHERE NOT EXISTS (SELECT 1 FROM change_log c WHERE c.uid = e.uid)
+                """,
+                (self.device_id,),
+            ).fetchall()
+        records = []
+        for r in rows:
+            record: Dict[str, Any] = {"uid": r["uid"], "clock": r["clock"], "device": r["device"]}
+            if r["deleted"]:
+                record["deleted"] = True
+            elif r["project"] is None:
+                continue  # archived since
+            else:
+                record.update(
+                    project=r["project"], task=r["task"], notes=r["notes"], start=r["start_ts"], end=r["end_ts"],
+                    start_epoch=r["start_epoch"], end_epoch=r["end_epoch"], utc_offset=r["utc_offset"],
+                )
+            records.append(record)
+        return last, records
+
+    def export_changes(self, dest: Path, since: int = 0) -> Tuple[int, int]:
+        """Write changes_since(`since`) to `dest` as JSON lines, for apply_changes on another device.
+
+        Returns (records written, the change number to pass as `since` next time).
+        """
+        import json
+
+        last, records = self.changes_since(since)
+        with dest.open("w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return len(records), last
+
+    def apply_changes(self, src: Path) -> Tuple[int, int]:
+        """Merge a file written by export_changes on another device; returns (applied, ignored)."""
+        import json
+
+        with src.open(encoding="utf-8") as f:
+            return self.apply_records(json.loads(line) for line in f if line.strip())
+
+    def apply_records(self, records: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """Apply change records (see changes_since) in one transaction; returns (applied, ignored).
+
+        A record is ignored unless its (clock, device) is newer than the latest
+        change of that entry seen here, so applying twice, or in any order,
+        ends in the same state. Changes to archived periods are ignored.
+        """
+        applied = ignored = 0
+        archived_before = self.archived_before() or -(2 ** 62)
+        with self.transaction() as cur, self._fts_deferred(cur):
+            for record in records:
+                if self._apply_record(cur, record, archived_before):
+                    applied += 1
+                else:
+                    ignored += 1
+        self._today = None
+        return applied, ignored
+
+    def _apply_record(self, cur: sqlite3.Cursor, record: Dict[str, Any], archived_before: int) -> bool:
+        uid = str(record["uid"])
+        version = (int(record["clock"]), str(record["device"]))
+        known = cur.execute(
+            "SELECT clock, device FROM change_log WHERE uid=? ORDER BY seq DESC LIMIT 1", (uid,)
+        ).fetchone()
+        if known is not None and (known["clock"], known["device"]) >= version:
+            return False
+        old = cur.execute("SELECT id, project_id, start_epoch, end_epoch FROM entries WHERE uid=?", (uid,)).fetchone()
+        deleted = bool(record.get("deleted"))
+        if deleted:
+            # kept even for unknown entries, so an older edit arriving later is ignored;
+            # logged before the delete like every Store delete (see _migrate_legacy_writers)
+            cur.execute("INSERT INTO change_log(uid, clock, device, deleted) VALUES(?,?,?,1)", (uid, *version))
+            if old is not None:
+                cur.execute("DELETE FROM entries WHERE id=?", (old["id"],))
+                self._rollup_remove(cur, old)
+            return True
+        start_epoch, end_epoch = int(record["start_epoch"]), record["end_epoch"]
+        if start_epoch < archived_before:
+            return False
+        pid = self.upsert_project(str(record["project"]))
+        task, notes = str(record["task"]), str(record["notes"] or "")
+        if old is None:
+            # the same entry imported on both devices before they synced: adopt the other id
+            old = cur.execute(
+                "SELECT id, project_id, start_epoch, end_epoch FROM entries e "
+                "WHERE project_id=? AND start_epoch=? AND task=? "
+                "AND NOT EXISTS (SELECT 1 FROM change_log c WHERE c.uid = e.uid)",
+                (pid, start_epoch, task),
+            ).fetchone()
+        start_ts, end_ts = str(record["start"]), record["end"]
+        local = False  # whether the entry as stored differs from the record
+        if end_epoch is None:
+            # one running entry at most: the one that started first ends where the other started
+            running = cur.execute(
+                "SELECT id, project_id, start_epoch, end_epoch FROM entries WHERE end_epoch IS NULL AND uid IS NOT ?",
+                (uid,),
+            ).fetchone()
+            if running is not None and running["start_epoch"] <= start_epoch:
+                cur.execute(
+                    "UPDATE entries SET end_ts=?, end_epoch=?, duration_s=? - start_epoch WHERE id=?",
+                    (datetime.fromtimestamp(start_epoch).isoformat(), start_epoch, start_epoch, running["id"]),
+                )
+                self._log_changes(cur, "id=?", (running["id"],))
+                self._rollup_add(cur, running["project_id"], running["start_epoch"], start_epoch)
+            elif running is not None:
+                end_epoch = running["start_epoch"]
+                end_ts = datetime.fromtimestamp(end_epoch).isoformat()
+                local = True
+        values = (pid, task, notes, start_ts, end_ts, None if end_epoch is None else int(end_epoch) - start_epoch,
+                  start_epoch, end_epoch, record["utc_offset"], uid)
+        if old is None:
+            cur.execute(
+                "INSERT INTO entries(project_id, task, notes, start_ts, end_ts, duration_s, start_epoch, end_epoch, "
+                "utc_offset, uid) VALUES(?,?,?,?,?,?,?,?,?,?)",
+                values,
+            )
+        else:
+            cur.execute(
+                "UPDATE entries SET project_id=?, task=?, notes=?, start_ts=?, end_ts=?, duration_s=?, "
+                "start_epoch=?, end_epoch=?, utc_offset=?, uid=? WHERE id=?",
+                (*values, old["id"]),
+            )
+            self._rollup_remove(cur, old)
+        if end_epoch is not None:
+            self._rollup_add(cur, pid, start_epoch, int(end_epoch))
+        cur.execute("INSERT INTO change_log(uid, clock, device, deleted) VALUES(?,?,?,0)", (uid, *version))
+        if local:
+            self._log_changes(cur, "uid=?", (uid,))  # sent back, so the other device ends it too
+        return True
+
+
+# ----------------------------
+# Command line interface
+# ----------------------------
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {value!r}, expected YYYY-MM-DD")
+
+
+def _add_range_args(p: "argparse.ArgumentParser") -> None:
+    today = date.today()
+    p.add_argument("--from", dest="start", type=_parse_date, default=today.replace(day=1),
+                   help="first day (YYYY-MM-DD, default: first of this month)")
+    p.add_argument("--to", dest="end", type=_parse_date, default=today,
+                   help="last day (YYYY-MM-DD, default: today)")
+
+
+def _start_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("project")
+    p.add_argument("task", nargs="?", default="(untitled)")
+    p.add_argument("-n", "--notes", default="")
+
+
+def _report_args(p: "argparse.ArgumentParser") -> None:
+    _add_range_args(p)
+    p.add_argument("--by", choices=("project", "day", "week", "month"), default="project",
+                   help="grouping (default: project)")
+
+
+def _gaps_args(p: "argparse.ArgumentParser") -> None:
+    today = date.today()
+    p.add_argument("--from", dest="start", type=_parse_date, default=today - timedelta(days=today.weekday()),
+                   help="first day (YYYY-MM-DD, default: Monday of this week)")
+    p.add_argument("--to", dest="end", type=_parse_date, default=today,
+                   help="last day (YYYY-MM-DD, default: today)")
+    p.add_argument("--min-gap", type=int, default=MIN_GAP // 60,
+                   help=f"shortest gap shown, in minutes (default: {MIN_GAP // 60})")
+
+
+def _import_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("--format", choices=("csv", "jsonl"), default=None,
+                   help="input format (default: from the file extension)")
+    p.add_argument("src", type=Path)
+
+
+def _export_args(p: "argparse.ArgumentParser") -> None:
+    _add_range_args(p)
+    p.add_argument("--project", default=None)
+    p.add_argument("dest", type=Path)
+
+
+def _archive_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("--before", type=_parse_date, default=date(date.today().year - 1, 1, 1),
+                   help="archive entries that ended before this day (default: January 1 of last year)")
+    p.add_argument("--no-vacuum", dest="vacuum", action="store_false",
+                   help="do not shrink the database file afterwards")
+
+
+def _backup_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("--list", action="store_true", help="list the backups instead")
+    p.add_argument("--keep", type=int, default=None, help="backups to keep (default: 7)")
+
+
+def _restore_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("src", type=Path, nargs="?", default=None, help="backup file (default: the newest backup)")
+
+
+def _export_changes_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("--since", type=int, default=0,
+                   help="change number printed by the previous export (default: 0, everything)")
+    p.add_argument("dest", type=Path)
+
+
+def _apply_changes_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("src", type=Path)
+
+
+def _sync_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("folder", type=Path)
+
+
+def _serve_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("--host", default="127.0.0.1", help="interface to bind (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=API_PORT, help="TCP port (default: %(default)s)")
+    p.add_argument("--readers", type=int, default=4, help="read-only connections (default: 4)")
+
+
+def _stats_args(p: "argparse.ArgumentParser") -> None:
+    p.add_argument("--json", action="store_true", help="print the raw stats as JSON")
+    p.add_argument("--statements", type=int, default=10, metavar="N",
+                   help="number of slowest SQL statements to list (default: 10)")
+    p.add_argument("--reset", action="store_true", help="delete the recorded stats")
+
+
+# command: (help, function adding its arguments)
+COMMANDS: Dict[str, Tuple[str, Optional[Callable[["argparse.ArgumentParser"], None]]]] = {
+    "gui": ("open the window (default when no command is given)", None),
+    "start": ("start tracking (stops a running entry first)", _start_args),
+    "stop": ("stop the running entry", None),
+    "status": ("show the running entry", None),
+    "today": ("show today's total", None),
+    "report": ("totals for a date range", _report_args),
+    "gaps": ("untracked gaps and overlapping entries (default: this week)", _gaps_args),
+    "import": ("import entries from a CSV export or JSONL file", _import_args),
+    "export": ("export entries as CSV", _export_args),
+    "archive": ("move old entries into per-year archive files", _archive_args),
+    "backup": ("copy the database to the backups folder (see backup.py)", _backup_args),
+    "restore": ("replace the database with a backup", _restore_args),
+    "maintain": ("refresh planner statistics and shrink the file (see maintenance.py)", None),
+    "export-changes": ("write entries changed since a change number (for apply-changes)", _export_changes_args),
+    "apply-changes": ("merge changes exported on another device", _apply_changes_args),
+    "sync": ("exchange changes with other devices through a shared folder (see sync.py)", _sync_args),
+    "serve": ("serve a local JSON/HTTP API (see server.py)", _serve_args),
+    "stats": ("show the timings recorded with --stats", _stats_args),
+}
+
+
+def _command_in(argv: List[str]) -> Optional[str]:
+    """The command `argv` names, or None if it names none (or asks for the top-level help)."""
+    args = iter(argv)
+    for arg in args:
+        if arg in ("--db", "--slow-ms"):
+            next(args, None)  # their value
+        elif arg in ("-h", "--help"):
+            return None
+        elif not arg.startswith("-"):
+            return arg if arg in COMMANDS else None
+    return None
+
+
+def build_parser(command: Optional[str] = None) -> "argparse.ArgumentParser":
+    """The argument parser; given a `command`, the parser for that command only.
+
+    Building all COMMANDS costs more than the rest of a short command such
+    as `status` (bench.py startup), so main() builds just the one named.
+    """
+    parser = argparse.ArgumentParser(prog="jattrack", description="Just-Another-Time-TRACKer")
+    parser.add_argument("--db", type=Path, default=None,
+                        help=f"database file (default: {user_data_dir() / DB_NAME})")
+    parser.add_argument("--stats", action="store_true",
+                        help="record timings for `stats` and Help → Diagnostics (or set TIMETRACKER_STATS=1)")
+    parser.add_argument("--slow-ms", type=float, default=None,
+                        help="log SQL statements slower than this (default: $TIMETRACKER_SLOW_MS or 50)")
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    for name, (summary, add_args) in COMMANDS.items():
+        if command in (None, name):
+            p = sub.add_parser(name, help=summary)
+            if add_args is not None:
+                add_args(p)
+    return parser
+
+
+def open_recorder(args: "argparse.Namespace") -> Optional[Recorder]:
+    """Return a diagnostics.Recorder if instrumentation is enabled for this run, else None."""
+    if not (args.stats or os.environ.get("TIMETRACKER_STATS", "0") not in ("", "0")):
+        return None
+    from diagnostics import DEFAULT_SLOW_MS, Recorder  # only loaded when asked for
+
+    slow_ms = args.slow_ms
+    if slow_ms is None:
+        slow_ms = float(os.environ.get("TIMETRACKER_SLOW_MS") or DEFAULT_SLOW_MS)
+    return Recorder.open(user_data_dir(), slow_ms)
+
+
+def show_stats(args: "argparse.Namespace") -> int:
+    import json
+
+    from diagnostics import STATS_NAME, format_report, load_stats
+
+    path = user_data_dir() / STATS_NAME
+    if args.reset:
+        path.unlink(missing_ok=True)
+        print(f"Removed {path}")
+    elif args.json:
+        print(json.dumps(load_stats(path), indent=1))
+    else:
+        print(format_report(load_stats(path), args.statements))
+    return 0
+
+
+def cli(args: "argparse.Namespace", recorder: Optional[Recorder] = None) -> int:
+    store: Optional[Store] = None
+    try:
+        # inside the try: a bad --db path is reported like every other failure
+        store = Store(args.db or user_data_dir() / DB_NAME)
+        if recorder is not None:
+            recorder.instrument_store(store)
+        if args.command == "start":
+            store.start_entry(args.project, args.task, args.notes)
+            snap = store.today_snapshot()
+            print(f"Started: {snap.running_project} — {snap.running_task}")
+        elif args.command == "stop":
+            snap = store.today_snapshot()
+            if snap.running_id is None:
+                print("Not running")
+                return 1
+            store.stop_entry(snap.running_id)
+            print(f"Stopped: {snap.running_project} — {snap.running_task} "
+                  f"({pretty_duration(snap.elapsed(datetime.now()))})")
+        elif args.command == "status":
+            snap = store.today_snapshot()
+            if snap.running_id is None:
+                print("Not running")
+            else:
+                print(f"Running: {snap.running_project} — {snap.running_task} "
+                      f"({pretty_duration(snap.elapsed(datetime.now()))})")
+        elif args.command == "today":
+            print(f"Today: {pretty_duration(store.sum_today())}")
+        elif args.command == "report":
+            rows = store.summary(args.start, args.end, args.by)
+            width = max([len(key) for key, _ in rows] + [5])
+            for key, seconds in rows:
+                print(f"{key:<{width}}  {pretty_duration(seconds)}")
+            print(f"{'Total':<{width}}  {pretty_duration(sum(s for _, s in rows))}")
+        elif args.command == "gaps":
+            gaps, overlaps = store.gaps_and_overlaps(args.start, args.end, args.min_gap * 60)
+            at = lambda epoch: datetime.fromtimestamp(epoch).strftime("%a %Y-%m-%d %H:%M")
+            print(f"Gaps of {args.min_gap} minutes or more: {len(gaps)}")
+            for start, end in gaps:
+                print(f"  {at(start)}–{datetime.fromtimestamp(end):%H:%M}  {pretty_duration(end - start)}")
+            print(f"Overlapping entries: {len(overlaps)}")
+            for first, second, seconds in overlaps:
+                print(f"  {at(second['start_epoch'])}  {pretty_duration(seconds)}  "
+                      f"#{first['id']} {first['project']} — {first['task']}  ×  "
+                      f"#{second['id']} {second['project']} — {second['task']}")
+        elif args.command == "import":
+            inserted, skipped = store.bulk_import(args.src, args.format)
+            print(f"Imported {inserted} entries ({skipped} skipped)")
+        elif args.command == "export":
+            count = store.export_csv(store.iter_entries(args.start, args.end, args.project), args.dest)
+            print(f"Exported {count} entries to {args.dest}")
+        elif args.command == "backup":
+            from backup import KEEP_BACKUPS, list_backups, make_backup
+
+            if args.list:
+                for path in list_backups(store.path):
+                    print(f"{path}  {path.stat().st_size / 2 ** 20:.1f} MiB")
+            else:
+                print(f"Backed up to {make_backup(store.path, keep=args.keep or KEEP_BACKUPS)}")
+        elif args.command == "restore":
+            from backup import is_scheduled, list_backups, restore_backup
+
+            src = args.src or next((p for p in list_backups(store.path) if is_scheduled(p)), None)
+            if src is None:
+                print("No backups found")
+                return 1
+            saved = restore_backup(store, src)
+            print(f"Restored {src} (previous contents saved to {saved})")
+        elif args.command == "maintain":
+            from maintenance import run_all
+
+            results = run_all(store)
+            for r in results:
+                print(f"{r.step}: {r.seconds * 1000:.1f} ms, {r.reclaimed / 1024:.0f} KiB reclaimed")
+            if not results:
+                print("Nothing to do")
+        elif args.command == "export-changes":
+            count, last = store.export_changes(args.dest, args.since)
+            print(f"Exported {count} changes to {args.dest}; next time use --since {last}")
+        elif args.command == "apply-changes":
+            applied, ignored = store.apply_changes(args.src)
+            print(f"Applied {applied} changes ({ignored} already known or superseded)")
+        elif args.command == "sync":
+            from sync import sync_folder
+
+            sent, applied, ignored = sync_folder(store, args.folder)
+            print(f"Sent {sent} changes, applied {applied} ({ignored} already known or superseded)")
+        elif args.command == "archive":
+            moved = store.archive(args.before, args.vacuum)
+            for year, count in sorted(moved.items()):
+                print(f"{year}: {count} entries → {store.archive_path(year)}")
+            print(f"Archived {sum(moved.values())} entries")
+        return 0
+    except (ValueError, OSError, sqlite3.DatabaseError) as ex:
+        print(f"jattrack: {ex}", file=sys.stderr)
+        return 1
+    finally:
+        if store is not None:
+            store.conn.close()
+        if recorder is not None:
+            recorder.save()
+
+
+# ----------------------------
+# Entry point
+# ----------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser(_command_in(argv)).parse_args(argv)
+    if args.command == "stats":
+        return show_stats(args)
+    recorder = open_recorder(args)
+    if args.command in (None, "gui"):
+        from gui import run  # tkinter is only imported for the GUI
+
+        run(args.db or user_data_dir() / DB_NAME, recorder)
+        return 0
+    if args.command == "serve":
+        from server import serve  # asyncio is only imported for the server
+
+        serve(args.db or user_data_dir() / DB_NAME, args.host, args.port, args.readers, recorder)
+        return 0
+    return cli(args, recorder)
+